@@ -0,0 +1,59 @@
+"""
+Benchmark and correctness check of the vectorized Analyzer signals against the 30 row sliding window loop.
+
+The indicators of synthetic daily bars of --tickers tickers over --years years are computed with the
+Indicator_Engine and rounded like the main table, that is the backtest window. Analyzer.analyze runs on all of them
+in the 'vectorized' analyzer mode and on the first --legacy-tickers tickers over the last --legacy-days days in the
+'loop' mode, whose sliding deepcopy windows need minutes for a few years of one ticker. Both are reported in rows
+per second and the analysis of the loop is compared with the vectorized one of the same rows. Run it from the
+project root:
+
+    python -m benchmark.analyzer_benchmark --tickers 500 --years 20
+"""
+import sys
+import time
+import argparse
+from pandas import DataFrame
+from stock_observer.analyzer import Analyzer
+from benchmark.transformer_benchmark import price_frame, benchmark_transformer
+
+
+def mode_analyzer(config, analyzer_mode: str) -> Analyzer:
+    config['Mode']['analyzer mode'] = analyzer_mode
+    return Analyzer(config=config)
+
+
+def main(arguments) -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tickers", type=int, default=500)
+    parser.add_argument("--years", type=int, default=20)
+    parser.add_argument("--legacy-tickers", type=int, default=5, help="tickers run through the loop")
+    parser.add_argument("--legacy-days", type=int, default=250, help="last rows of every ticker run through the loop")
+    args = parser.parse_args(arguments)
+
+    transformer = benchmark_transformer()
+    main_df = transformer.indicator_engine.compute(data_df=price_frame(tickers=args.tickers, years=args.years))
+    main_df = main_df.round(3)
+    print(f"{args.tickers} tickers x {args.years} years: {len(main_df)} rows")
+
+    vectorized = mode_analyzer(config=transformer.config, analyzer_mode='vectorized')
+    start = time.perf_counter()
+    vectorized.analyze(data_df=main_df)
+    vectorized_time = time.perf_counter() - start
+    print(f"vectorized : {vectorized_time:8.2f}s, {len(main_df) / vectorized_time:12.0f} rows/s")
+
+    legacy_df = main_df[main_df['ticker'] < f"T{args.legacy_tickers:04d}"].groupby('ticker').tail(args.legacy_days)
+    legacy_df = legacy_df.reset_index(drop=True)
+    loop = mode_analyzer(config=transformer.config, analyzer_mode='loop')
+    start = time.perf_counter()
+    loop_result = loop.analyze(data_df=legacy_df)
+    loop_time = time.perf_counter() - start
+    print(f"loop       : {loop_time:8.2f}s, {len(legacy_df) / loop_time:12.0f} rows/s ({len(legacy_df)} rows)")
+    print(f"speedup    : {len(main_df) / vectorized_time / (len(legacy_df) / loop_time):8.1f}x")
+
+    vectorized_result: DataFrame = vectorized.analyze(data_df=legacy_df)
+    print(f"{len(loop_result)} analysed rows, identical to the loop: {vectorized_result.equals(loop_result)}")
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,64 @@
+"""
+Correctness check and benchmark of the vectorized line angles against rolling().apply(slope_cal).
+
+The indicators of synthetic daily bars are computed with the Indicator_Engine. The three angles of transform() are
+then computed for all the tickers with Transformer.add_angles, and for the first --legacy-tickers tickers with the
+per-feature Transformer.add_angle. The unrounded line_angles kernel output is compared bit by bit with slope_cal
+applied to every window. Run it from the project root:
+
+    python -m benchmark.angle_benchmark --tickers 500 --years 20
+"""
+import sys
+import time
+import argparse
+import numpy as np
+from stock_observer.kernels import segment_positions, line_angles
+from stock_observer.transformer import Transformer
+from benchmark.transformer_benchmark import price_frame, benchmark_transformer
+
+
+def main(arguments) -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tickers", type=int, default=500)
+    parser.add_argument("--years", type=int, default=20)
+    parser.add_argument("--legacy-tickers", type=int, default=20, help="tickers run through add_angle")
+    args = parser.parse_args(arguments)
+
+    transformer = benchmark_transformer()
+    data_df = transformer.indicator_engine.compute(data_df=price_frame(tickers=args.tickers, years=args.years))
+    features = [f'MA_{transformer.moving_avg_period_1}', f'MA_{transformer.moving_avg_period_2}',
+                f'ATR_{transformer.atr_period}']
+    data_df = data_df.drop(columns=[f'{feature}_alpha' for feature in features])
+    print(f"{args.tickers} tickers x {args.years} years: {len(data_df)} rows, angles of {', '.join(features)}")
+
+    start = time.perf_counter()
+    angle_df = Transformer.add_angles(data_df=data_df.copy(), features=features)
+    vectorized_time = time.perf_counter() - start
+    print(f"add_angles : {vectorized_time:8.2f}s, {len(data_df) / vectorized_time:12.0f} rows/s")
+
+    legacy_df = data_df[data_df['ticker'] < f"T{args.legacy_tickers:04d}"].reset_index(drop=True)
+    start = time.perf_counter()
+    for feature in features:
+        legacy_df = transformer.add_angle(data_df=legacy_df, feature=feature)
+    legacy_time = time.perf_counter() - start
+    print(f"add_angle  : {legacy_time:8.2f}s, {len(legacy_df) / legacy_time:12.0f} rows/s ({len(legacy_df)} rows)")
+    print(f"speedup    : {len(data_df) / vectorized_time / (len(legacy_df) / legacy_time):8.1f}x")
+
+    rounded_equal = all(np.array_equal(legacy_df[f'{feature}_alpha'].to_numpy(),
+                                       angle_df[f'{feature}_alpha'].to_numpy()[:len(legacy_df)], equal_nan=True)
+                        for feature in features)
+    print(f"rounded angles equal to add_angle: {rounded_equal}")
+
+    positions = segment_positions(legacy_df['ticker'].to_numpy())
+    angles = line_angles(values=legacy_df[features].to_numpy(dtype=np.float64), positions=positions)
+    for i, feature in enumerate(features):
+        expected = legacy_df.groupby('ticker')[feature].rolling(window=5, min_periods=5) \
+            .apply(Transformer.slope_cal).to_numpy()
+        identical = np.array_equal(angles[:, i].view(np.int64)[~np.isnan(expected)],
+                                   expected.view(np.int64)[~np.isnan(expected)]) \
+            and np.array_equal(np.isnan(angles[:, i]), np.isnan(expected))
+        print(f"{feature:8s} bit-identical to slope_cal: {identical}")
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,76 @@
+"""
+Speed and accuracy of the rolling_bollinger kernel.
+
+Speed: the kernel against Transformer.add_bollinger_bands (groupby rolling std, merge and re-sort) on synthetic daily
+bars of --tickers tickers over --years years.
+Accuracy: the standard deviation of a high-priced ticker with small moves (price around --price, daily moves of
+--move) from the kernel, from pandas rolling std and from the sum of squares formula, against the exact value of
+statistics.stdev on --windows windows. Run it from the project root:
+
+    python -m benchmark.bollinger_benchmark --tickers 500 --years 20
+"""
+import sys
+import time
+import argparse
+import statistics
+import numpy as np
+from pandas import Series
+from stock_observer.kernels import segment_positions, rolling_bollinger
+from benchmark.transformer_benchmark import price_frame, benchmark_transformer
+
+
+def sum_of_squares_deviation(values: np.ndarray, window: int) -> np.ndarray:
+    """
+    sqrt((sum(x^2) - sum(x)^2 / n) / (n - 1)) from running sums, the formula that cancels on high prices
+    """
+    sums = np.concatenate([[0], np.cumsum(values)])
+    squares = np.concatenate([[0], np.cumsum(values ** 2)])
+    window_sum = sums[window:] - sums[:-window]
+    window_squares = squares[window:] - squares[:-window]
+    variance = (window_squares - window_sum ** 2 / window) / (window - 1)
+    return np.concatenate([np.full(window - 1, np.nan), np.sqrt(np.maximum(variance, 0))])
+
+
+def main(arguments) -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tickers", type=int, default=500)
+    parser.add_argument("--years", type=int, default=20)
+    parser.add_argument("--price", type=float, default=400000, help="price level of the accuracy test")
+    parser.add_argument("--move", type=float, default=0.5, help="daily move of the accuracy test")
+    parser.add_argument("--windows", type=int, default=2000, help="windows checked against statistics.stdev")
+    args = parser.parse_args(arguments)
+
+    transformer = benchmark_transformer()
+    n_days = transformer.bollinger_bands_period
+    data_df = transformer.add_moving_avg(data_df=price_frame(tickers=args.tickers, years=args.years), n_days=n_days)
+    print(f"{args.tickers} tickers x {args.years} years: {len(data_df)} rows, period {n_days}")
+
+    start = time.perf_counter()
+    positions = segment_positions(data_df['ticker'].to_numpy())
+    op = ((data_df['open'] + data_df['close']) / 2).to_numpy(dtype=np.float64)
+    _, _, lower, upper = rolling_bollinger(values=op, positions=positions, window=n_days)
+    kernel_time = time.perf_counter() - start
+    start = time.perf_counter()
+    legacy_df = transformer.add_bollinger_bands(data_df=data_df.copy(), n_days=n_days)
+    legacy_time = time.perf_counter() - start
+    print(f"rolling_bollinger   : {kernel_time:8.2f}s, {len(data_df) / kernel_time:12.0f} rows/s")
+    print(f"add_bollinger_bands : {legacy_time:8.2f}s, {len(data_df) / legacy_time:12.0f} rows/s")
+    print(f"max band difference : {np.nanmax(np.abs(legacy_df[f'BB_U_{n_days}'].to_numpy() - upper)):.2e}")
+
+    rng = np.random.default_rng(0)
+    values = args.price + rng.normal(0, args.move, args.windows + n_days - 1).cumsum()
+    values = np.round(values, 2)
+    exact = np.array([statistics.stdev(values[i - n_days + 1:i + 1]) for i in range(n_days - 1, len(values))])
+    _, kernel, _, _ = rolling_bollinger(values=values, positions=np.arange(len(values)), window=n_days)
+    deviations = {'rolling_bollinger': kernel[n_days - 1:],
+                  'pandas rolling std': Series(values).rolling(n_days).std().to_numpy()[n_days - 1:],
+                  'sum of squares': sum_of_squares_deviation(values, n_days)[n_days - 1:]}
+    print(f"accuracy at price {args.price:.0f} with moves of {args.move}, standard deviation around "
+          f"{np.median(exact):.3f}:")
+    for name, deviation in deviations.items():
+        error = np.abs(deviation - exact) / exact
+        print(f"{name:20s} max relative error {error.max():.2e}, median {np.median(error):.2e}")
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,155 @@
+"""
+Benchmark of the Alpha Vantage downloader against a local stub HTTP server.
+
+Runs Downloader.prices_downloader for several requests-per-minute quota settings and reports the achieved
+tickers/minute. Run it from the project root:
+
+    python -m benchmark.downloader_benchmark --quotas 60 300 1200 6000 --seconds 10
+    python -m benchmark.downloader_benchmark --quotas 600 --server-quota 20 --server-window 10 --cci-source local
+"""
+import sys
+import json
+import math
+import time
+import argparse
+import tempfile
+import threading
+from collections import deque
+from datetime import date, timedelta
+from configparser import ConfigParser
+from urllib.parse import urlparse, parse_qs
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from pandas import DataFrame
+from log_setup import get_logger
+from stock_observer.downloader import Downloader
+
+logger = get_logger(__name__)
+
+
+def stub_payload(function: str, days: int = 100) -> dict:
+    dates = [str(date(2020, 1, 1) + timedelta(days=i)) for i in range(days)]
+    if function == 'CCI':
+        return {'Technical Analysis: CCI': {d: {'CCI': f"{(i % 200) - 100:.4f}"} for i, d in enumerate(dates)}}
+    return {'Time Series (Daily)': {d: {'1. open': f"{100 + i:.4f}", '2. high': f"{101 + i:.4f}",
+                                         '3. low': f"{99 + i:.4f}", '4. close': f"{100.5 + i:.4f}",
+                                         '5. volume': str(1000000 + i)} for i, d in enumerate(dates)}}
+
+
+def stub_server(latency: float, quota: float = None, window: float = 60) -> ThreadingHTTPServer:
+    """
+    :param latency: response time in seconds
+    :param quota: requests served per window before answering with an Alpha Vantage "Note" body, None for no quota
+    :param window: sliding quota window in seconds
+    """
+    bodies = {function: json.dumps(stub_payload(function)).encode() for function in ['TIME_SERIES_DAILY', 'CCI']}
+    throttled_body = json.dumps({'Note': 'Thank you for using Alpha Vantage! Our standard API call frequency is '
+                                         f'{quota} calls per {window:.0f} seconds.'}).encode()
+    served = deque()
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self):
+            function = parse_qs(urlparse(self.path).query)['function'][0]
+            time.sleep(latency)
+            body = bodies[function]
+            if quota is not None:
+                with lock:
+                    now = time.monotonic()
+                    while served and served[0] < now - window:
+                        served.popleft()
+                    if len(served) >= quota:
+                        body = throttled_body
+                    else:
+                        served.append(now)
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def benchmark_config(url: str, requests_per_minute: int, workers: int, cci_source: str = 'api',
+                     cooldown: float = 60) -> ConfigParser:
+    # every run gets an empty response cache so that all the requests go to the stub server
+    config = ConfigParser()
+    config.read_dict({
+        'General': {'download journal directory': tempfile.mkdtemp(prefix='download_journal_')},
+        'Data_Sources': {'equity price csv': 'data/downloaded/equity_price',
+                         'fundamentals csv': 'data/downloaded/fundamentals'},
+        'MySQL': {'stage table name': 'equity_price_stage', 'main table name': 'equity_price_main',
+                  'decision table name': 'decision_result', 'primary key mode': 'string',
+                  'ticker dictionary table name': 'ticker_dictionary'},
+        'API': {'alphavantage API key': 'demo', 'marketstack API key': 'demo', 'alphavantage url': url,
+                'marketstack url': url, 'finviz url': url,
+                'alphavantage requests per minute': str(requests_per_minute), 'download workers': str(workers),
+                'alphavantage min requests per minute': '1', 'alphavantage rate increase': '0.5',
+                'alphavantage throttle retries': '5',
+                'alphavantage throttle cooldown seconds': str(cooldown),
+                'finviz requests per minute': '60', 'finviz workers': '2',
+                'marketstack symbols per request': '100', 'marketstack page limit': '1000'},
+        'HTTP': {'timeout seconds': '30', 'max retries': '3', 'backoff seconds': '1',
+                 'max connections per host': str(workers)},
+        'Indicator': {'cci source': cci_source, 'cci period': '30', 'atr period': '20'},
+        'Calendar': {'data available hour': '18', 'compact max gap days': '99'},
+        'Providers': {'price provider': 'alphavantage', 'indicator provider': 'alphavantage',
+                      'fundamentals provider': 'finviz', 'local data directory': 'data/fixtures'},
+        'Schedule': {'priority': 'tier', 'tier column': 'tier', 'alert lookback days': '5',
+                     'download window minutes': '0'},
+        'Cache': {'cache directory': tempfile.mkdtemp(prefix='response_cache_'), 'max size mb': '512',
+                  'alphavantage price ttl hours': '6', 'alphavantage cci ttl hours': '6',
+                  'marketstack eod ttl hours': '6', 'finviz quote ttl hours': '24'}})
+    return config
+
+
+def main(arguments) -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--quotas", type=int, nargs='+', default=[60, 300, 1200, 6000],
+                        help="requests per minute settings to benchmark")
+    parser.add_argument("--seconds", type=float, default=10, help="target duration of each run")
+    parser.add_argument("--latency", type=float, default=0.2, help="stub server response time in seconds")
+    parser.add_argument("--workers", type=int, default=8, help="download workers")
+    parser.add_argument("--server-quota", type=float,
+                        help="requests per window the stub server serves before returning throttle notes")
+    parser.add_argument("--server-window", type=float, default=60,
+                        help="quota window of the stub server in seconds, also used as the throttle cooldown")
+    parser.add_argument("--cci-source", default='api', choices=['api', 'local'],
+                        help="'api' downloads the CCI with a second request per ticker, 'local' only the prices")
+    args = parser.parse_args(arguments)
+
+    server = stub_server(latency=args.latency, quota=args.server_quota, window=args.server_window)
+    url = f"http://127.0.0.1:{server.server_address[1]}/query"
+    results = []
+    for quota in args.quotas:
+        requests_per_ticker = 2 if args.cci_source == 'api' else 1
+        n_tickers = max(4, math.ceil(quota / requests_per_ticker * args.seconds / 60))
+        ticker_list = DataFrame({'ticker': [f"T{i:04d}" for i in range(n_tickers)]})
+        downloader = Downloader(benchmark_config(url=url, requests_per_minute=quota, workers=args.workers,
+                                                 cci_source=args.cci_source, cooldown=args.server_window))
+        start = time.perf_counter()
+        data_df = downloader.prices_downloader(ticker_list=ticker_list, table_name='equity_price_stage',
+                                               output_size='compact', mode='bulk')
+        elapsed = time.perf_counter() - start
+        results.append((quota, n_tickers, len(data_df), elapsed, n_tickers / elapsed * 60))
+        for host, summary in downloader.http_client.latency_report().items():
+            logger.info(f"{quota} rpm {host}: {summary}")
+        for provider, summary in downloader.provider_report().items():
+            logger.info(f"{quota} rpm {provider}: {summary}")
+    server.shutdown()
+
+    print(f"{'quota rpm':>10} {'tickers':>8} {'rows':>8} {'seconds':>9} {'tickers/min':>12}")
+    for quota, n_tickers, rows, elapsed, rate in results:
+        print(f"{quota:>10} {n_tickers:>8} {rows:>8} {elapsed:>9.2f} {rate:>12.1f}")
+    print("Sequential downloader with the fixed 30 second sleep: at most 2.0 tickers/min")
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
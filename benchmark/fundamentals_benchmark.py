@@ -0,0 +1,85 @@
+"""
+Benchmark of the FinViz quote page parsing on saved HTML fixtures.
+
+Compares the previous parser (full page tree + one soup.find per metric + cell by cell DataFrame writes) with the
+single-pass snapshot table parser. Without --fixtures, synthetic quote pages shaped like the FinViz ones are
+generated. Run it from the project root:
+
+    python -m benchmark.fundamentals_benchmark --pages 50
+    python -m benchmark.fundamentals_benchmark --fixtures path/to/saved/pages
+"""
+import sys
+import time
+import argparse
+import tempfile
+from pathlib import Path
+from pandas import DataFrame
+from bs4 import BeautifulSoup as bs
+from stock_observer.fundamentals import FUNDAMENTAL_METRICS, parse_snapshot_table
+
+
+def fixture_page(ticker: str, seed: int) -> str:
+    cells = ''.join(f'<td class="snapshot-td2-cp" width="7%">{metric}</td>'
+                    f'<td class="snapshot-td2" width="8%"><b>{(seed * 7 + i) % 997 / 10:.2f}</b></td>'
+                    + ('</tr><tr class="table-dark-row">' if i % 6 == 5 else '')
+                    for i, metric in enumerate(FUNDAMENTAL_METRICS))
+    news = ''.join(f'<tr><td width="130" align="right">Jan-{i % 28 + 1:02d}-20 09:{i % 60:02d}AM</td>'
+                   f'<td align="left"><a href="https://news.example.com/{ticker}/{i}" class="tab-link-news">'
+                   f'{ticker} headline number {i} about the company results and outlook</a></td></tr>'
+                   for i in range(100))
+    menu = ''.join(f'<td class="navbar"><a href="/screener.ashx?v={i}" class="nav-link">Menu {i}</a></td>'
+                   for i in range(60))
+    return f'<html><head><title>{ticker} Stock Quote</title></head><body>' \
+           f'<table class="header"><tr>{menu}</tr></table>' \
+           f'<table class="fullview-title"><tr><td><b>{ticker}</b></td></tr></table>' \
+           f'<table width="100%" class="snapshot-table2"><tr class="table-dark-row">{cells}</tr></table>' \
+           f'<table class="fullview-news-outer">{news}</table></body></html>'
+
+
+def legacy_parse(pages: dict) -> DataFrame:
+    data_df = DataFrame(columns=FUNDAMENTAL_METRICS)
+    for symbol, html in pages.items():
+        soup = bs(html, "lxml")
+        for m in data_df.columns:
+            data_df.loc[symbol, m] = soup.find(text=m).find_next(class_='snapshot-td2').text
+    return data_df
+
+
+def single_pass_parse(pages: dict) -> DataFrame:
+    rows = []
+    for symbol, html in pages.items():
+        snapshot = parse_snapshot_table(html)
+        rows.append([snapshot.get(metric) for metric in FUNDAMENTAL_METRICS])
+    return DataFrame(rows, index=list(pages), columns=FUNDAMENTAL_METRICS)
+
+
+def main(arguments) -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--fixtures", type=Path, help="directory of saved quote pages named <TICKER>.html")
+    parser.add_argument("--pages", type=int, default=50, help="number of synthetic pages to generate")
+    args = parser.parse_args(arguments)
+
+    fixtures = args.fixtures
+    if fixtures is None:
+        fixtures = Path(tempfile.mkdtemp(prefix='finviz_fixtures_'))
+        for i in range(args.pages):
+            (fixtures / f"T{i:04d}.html").write_text(fixture_page(f"T{i:04d}", seed=i))
+    pages = {path.stem: path.read_bytes() for path in sorted(fixtures.glob('*.html'))}
+
+    start = time.perf_counter()
+    legacy_df = legacy_parse(pages)
+    legacy_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    single_pass_df = single_pass_parse(pages)
+    single_pass_time = time.perf_counter() - start
+
+    identical = legacy_df.astype(str).equals(single_pass_df.astype(str))
+    print(f"pages: {len(pages)}, average size {sum(map(len, pages.values())) / len(pages) / 1024:.0f} KB")
+    print(f"previous parser    : {legacy_time / len(pages) * 1000:8.2f} ms/page")
+    print(f"single pass parser : {single_pass_time / len(pages) * 1000:8.2f} ms/page")
+    print(f"speedup            : {legacy_time / single_pass_time:8.1f}x, identical values: {identical}")
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,99 @@
+"""
+Benchmark of the daily transform with the kept indicator state against the full lookback recompute.
+
+Synthetic daily bars are split into a history and --days new days. The history is transformed once to create the
+state, then every new day is transformed the way Transformer.transform does it: only the new bar (and the last kept
+one, for the revision check) comes from the stage, the kept bars are put in front and the state is saved again.
+Every new row is compared with a full recompute of the whole history, and the cost per day is compared with the
+old recompute of the last --lookback days of every ticker. The stage table and the main table watermarks are
+simulated in memory. Run it from the project root:
+
+    python -m benchmark.incremental_benchmark --tickers 500 --days 20
+"""
+import sys
+import time
+import argparse
+import tempfile
+import numpy as np
+from pathlib import Path
+from datetime import timedelta
+from pandas import DataFrame
+from stock_observer.transformer import Transformer
+from stock_observer.indicator_state import Indicator_State
+from benchmark.transformer_benchmark import price_frame, benchmark_transformer
+
+
+def indicators(transformer: Transformer, data_df: DataFrame) -> DataFrame:
+    return transformer.indicator_engine.compute(data_df=data_df)
+
+
+def last_dates(state: Indicator_State) -> dict:
+    return state.tail_df.groupby('ticker')['date'].max().to_dict()
+
+
+def main(arguments) -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tickers", type=int, default=500)
+    parser.add_argument("--years", type=int, default=5)
+    parser.add_argument("--days", type=int, default=20, help="new days transformed one by one")
+    parser.add_argument("--lookback", type=int, nargs='+', default=[70, 250, 1000],
+                        help="calendar days recomputed per ticker by the old path")
+    args = parser.parse_args(arguments)
+
+    transformer = benchmark_transformer()
+    transformer.indicator_state.path = Path(tempfile.mkdtemp(prefix='indicator_state_')) / 'indicator_state.pkl'
+    stage_df = price_frame(tickers=args.tickers, years=args.years)
+    stage_columns = list(stage_df.columns)
+    reference_df = indicators(transformer=transformer, data_df=stage_df.copy())
+    features = list(reference_df.columns[len(stage_columns):])
+    dates = np.sort(stage_df['date'].unique())
+    print(f"{args.tickers} tickers, {len(dates) - args.days} days of history, {args.days} new days, "
+          f"{transformer.indicator_state.warm_up_bars} bars kept per ticker")
+
+    history_df = stage_df[stage_df['date'] <= dates[-args.days - 1]]
+    transformer.indicator_state.save(data_df=indicators(transformer=transformer, data_df=history_df)[stage_columns])
+
+    incremental_time = 0
+    identical = True
+    state = transformer.indicator_state
+    for previous_day, day in zip(dates[-args.days - 1:-1], dates[-args.days:]):
+        # what data_load returns from the stage table: the last kept bar and the new one
+        new_df = stage_df[(stage_df['date'] == previous_day) | (stage_df['date'] == day)]
+        # after every run the main table holds everything up to the last kept bar
+        latest_dates = last_dates(state)
+        start = time.perf_counter()
+        state.load()
+        since = state.resumable(latest_dates=latest_dates)
+        data_df, revised = state.prepend(data_df=new_df, since=since)
+        data_df = indicators(transformer=transformer, data_df=data_df)
+        state.save(data_df=data_df[stage_columns])
+        data_df = data_df[data_df['date'] == day].reset_index(drop=True)
+        incremental_time += time.perf_counter() - start
+        expected_df = reference_df[reference_df['date'] == day].reset_index(drop=True)
+        identical &= not revised and all(np.array_equal(data_df[feature].to_numpy(dtype=np.float64),
+                                                        expected_df[feature].to_numpy(dtype=np.float64),
+                                                        equal_nan=True) for feature in features)
+    print(f"kept state       : {incremental_time / args.days * 1000:8.1f} ms per day, "
+          f"{incremental_time / args.days / args.tickers * 1e6:6.0f} us per ticker, "
+          f"new rows identical to a full recompute: {identical}")
+
+    for lookback in args.lookback:
+        day = dates[-1]
+        window_df = stage_df[stage_df['date'] > day - timedelta(days=lookback + 3)]
+        start = time.perf_counter()
+        indicators(transformer=transformer, data_df=window_df.copy())
+        lookback_time = time.perf_counter() - start
+        print(f"{lookback:5d} day recompute: {lookback_time * 1000:8.1f} ms per day, "
+              f"{lookback_time / args.tickers * 1e6:6.0f} us per ticker")
+
+    # a revised last bar sends the ticker back to the full recompute
+    state.load()
+    since = state.resumable(latest_dates=last_dates(state))
+    revised_df = stage_df[stage_df['date'] == dates[-1]].copy()
+    revised_df.loc[revised_df.index[0], 'close'] += 1
+    _, revised = state.prepend(data_df=revised_df, since=since)
+    print(f"revised tickers detected: {revised}")
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
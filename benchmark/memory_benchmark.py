@@ -0,0 +1,121 @@
+"""
+Memory of the Transformer and Analyzer stages with the table layout and with the compact frames.
+
+Synthetic daily bars of --tickers tickers over --years years go through the stages of a bulk Transformer.transform
+(no main table watermark, so every row is written) and the last 60 days of --analyzer-tickers tickers through
+Analyzer.analyze. For every stage the size of the frame, the peak of the Python allocations during the stage
+(tracemalloc, NumPy and pandas buffers included) and the peak RSS of the process so far are reported. Every layout
+runs in its own process so that the RSS peaks do not mix. Run it from the project root:
+
+    python -m benchmark.memory_benchmark --tickers 500 --years 20
+"""
+import sys
+import time
+import argparse
+import resource
+import tempfile
+import subprocess
+import tracemalloc
+from pathlib import Path
+from types import SimpleNamespace
+from datetime import timedelta
+from pandas import DataFrame
+from stock_observer.analyzer import Analyzer
+from stock_observer.transformer import Transformer
+from benchmark.transformer_benchmark import price_frame, benchmark_transformer
+
+LAYOUTS = ['table', 'compact']
+
+
+class Stage_Report:
+    def __init__(self, layout: str):
+        self.layout = layout
+        self.start = None
+        print(f"{layout} layout\n{'stage':16s} {'rows':>9s} {'frame MB':>10s} {'stage peak MB':>14s} "
+              f"{'peak RSS MB':>12s} {'seconds':>8s}")
+
+    def begin(self) -> None:
+        tracemalloc.reset_peak()
+        self.start = time.perf_counter()
+
+    def report(self, stage: str, data_df: DataFrame) -> None:
+        elapsed = time.perf_counter() - self.start
+        _, peak = tracemalloc.get_traced_memory()
+        frame_size = data_df.memory_usage(deep=True).sum()
+        # ru_maxrss is in kB on Linux
+        peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        print(f"{stage:16s} {len(data_df):9d} {frame_size / 2 ** 20:10.1f} {peak / 2 ** 20:14.1f} {peak_rss:12.1f} "
+              f"{elapsed:8.2f}")
+
+
+def layout_transformer(layout: str) -> Transformer:
+    config = benchmark_transformer().config
+    config['General']['compact frames'] = 'true' if layout == 'compact' else 'false'
+    transformer = Transformer(config)
+    transformer.indicator_state.path = Path(tempfile.mkdtemp(prefix='indicator_state_')) / 'indicator_state.pkl'
+    # a bulk load, no ticker is in the main table yet
+    transformer.watermarks = SimpleNamespace(latest_dates=lambda table_name: {})
+    return transformer
+
+
+def run_layout(args) -> None:
+    transformer = layout_transformer(layout=args.layout)
+    frame_layout = transformer.frame_layout
+    tracemalloc.start()
+    stages = Stage_Report(layout=args.layout)
+
+    stages.begin()
+    data_df = price_frame(tickers=args.tickers, years=args.years)
+    stage_columns = list(data_df.columns)
+    data_df = frame_layout.compact_frame(data_df)
+    stages.report('stage rows', data_df)
+
+    stages.begin()
+    data_df = transformer.indicator_engine.compute(data_df=data_df)
+    data_df = frame_layout.compact_frame(data_df)
+    stages.report('indicators', data_df)
+
+    stages.begin()
+    transformer.indicator_state.save(data_df=data_df[stage_columns])
+    stages.report('indicator state', data_df)
+
+    stages.begin()
+    data_df = transformer.data_date_filter(data_df)
+    if frame_layout.compact:
+        main_df = frame_layout.round(frame_layout.expand(data_df), decimals=3)
+    else:
+        main_df = data_df.round(3)
+    stages.report('main table rows', main_df)
+
+    if not args.analyzer_tickers:
+        return
+    stages.begin()
+    analyzer = Analyzer(config=transformer.config)
+    last_day = main_df['date'].max()
+    analysis_df = main_df[(main_df['ticker'] < f"T{args.analyzer_tickers:04d}")
+                          & (main_df['date'] > last_day - timedelta(days=60))].reset_index(drop=True)
+    del data_df, main_df
+    analysis_df = frame_layout.expand(analyzer.analyze(data_df=frame_layout.compact_frame(analysis_df)))
+    stages.report('analysis', analysis_df)
+
+
+def main(arguments) -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tickers", type=int, default=500)
+    parser.add_argument("--years", type=int, default=20)
+    parser.add_argument("--analyzer-tickers", type=int, default=20,
+                        help="tickers run through the Analyzer, 0 skips it")
+    parser.add_argument("--layout", choices=LAYOUTS, help="run one layout in this process")
+    args = parser.parse_args(arguments)
+
+    if args.layout:
+        run_layout(args)
+        return
+    print(f"{args.tickers} tickers x {args.years} years")
+    for layout in LAYOUTS:
+        subprocess.run([sys.executable, '-m', 'benchmark.memory_benchmark'] + arguments + ['--layout', layout],
+                       check=True)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
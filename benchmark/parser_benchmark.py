@@ -0,0 +1,90 @@
+"""
+Microbenchmark of the Alpha Vantage TIME_SERIES_DAILY parsing on a saved full-history response.
+
+Compares the previous parsing (DataFrame.from_dict of strings, column reordering and a per-row strptime) with the
+columnar AlphaVantage_Provider.parse_time_series_daily. Without --fixture a 20+ year synthetic response is generated.
+Run it from the project root:
+
+    python -m benchmark.parser_benchmark --repeat 20
+    python -m benchmark.parser_benchmark --fixture path/to/TIME_SERIES_DAILY_full.json
+"""
+import sys
+import json
+import time
+import argparse
+import tempfile
+import numpy as np
+from pathlib import Path
+from datetime import datetime
+from pandas import DataFrame, bdate_range
+from stock_observer.providers.alphavantage_provider import AlphaVantage_Provider
+
+
+def fixture_response(days: int) -> dict:
+    dates = bdate_range(end='2020-12-31', periods=days)[::-1]
+    close = 100 + np.random.default_rng(0).normal(0, 1, days).cumsum()
+    return {'Meta Data': {'2. Symbol': 'TEST', '4. Output Size': 'Full size'},
+            'Time Series (Daily)': {str(d.date()): {'1. open': f"{c - 0.5:.4f}", '2. high': f"{c + 1:.4f}",
+                                                    '3. low': f"{c - 1:.4f}", '4. close': f"{c:.4f}",
+                                                    '5. volume': str(1000000 + i)}
+                                    for i, (d, c) in enumerate(zip(dates, close))}}
+
+
+def legacy_parse(response_dict: dict, ticker: str) -> DataFrame:
+    record = DataFrame.from_dict(response_dict['Time Series (Daily)'], orient='index')
+    record['ticker'] = ticker
+    record.reset_index(level=0, inplace=True)
+    cols = list(record.columns)
+    cols = [cols[-1]] + cols[:-1]
+    record = record[cols]
+    record = record.rename(columns={'index': 'date', '1. open': 'open', '3. low': 'low',
+                                    '2. high': 'high', '4. close': 'close', '5. volume': 'volume'})
+    record['date'] = record['date'].map(lambda x: datetime.strptime(x, "%Y-%m-%d").date())
+    return record
+
+
+def best_time(function, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main(arguments) -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--fixture", type=Path, help="saved TIME_SERIES_DAILY outputsize=full response")
+    parser.add_argument("--days", type=int, default=5200, help="trading days of the generated fixture")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args(arguments)
+
+    fixture = args.fixture
+    if fixture is None:
+        fixture = Path(tempfile.mkdtemp(prefix='av_fixture_')) / 'TIME_SERIES_DAILY_full.json'
+        fixture.write_text(json.dumps(fixture_response(args.days)))
+    body = fixture.read_bytes()
+    response_dict = json.loads(body)
+
+    legacy_df = legacy_parse(response_dict, 'TEST')
+    columnar_df = AlphaVantage_Provider.parse_time_series_daily(response_dict['Time Series (Daily)'], 'TEST')
+    identical = np.array_equal(legacy_df[['open', 'high', 'low', 'close']].astype(np.float64).to_numpy(),
+                               columnar_df[['open', 'high', 'low', 'close']].to_numpy()) \
+        and np.array_equal(legacy_df['volume'].astype(np.int64), columnar_df['volume']) \
+        and np.array_equal(np.array(legacy_df['date'], dtype='datetime64[D]'),
+                           columnar_df['date'].to_numpy().astype('datetime64[D]'))
+
+    json_time = best_time(lambda: json.loads(body), args.repeat)
+    legacy_time = best_time(lambda: legacy_parse(response_dict, 'TEST'), args.repeat)
+    time_series = response_dict['Time Series (Daily)']
+    columnar_time = best_time(lambda: AlphaVantage_Provider.parse_time_series_daily(time_series, 'TEST'), args.repeat)
+
+    print(f"fixture: {len(columnar_df)} days, {len(body) / 1024:.0f} KB")
+    print(f"json.loads (both)    : {json_time * 1000:8.2f} ms")
+    print(f"previous parsing     : {legacy_time * 1000:8.2f} ms (values left as strings, dates via strptime)")
+    print(f"columnar parsing     : {columnar_time * 1000:8.2f} ms (datetime64, float64, int64)")
+    print(f"speedup              : {legacy_time / columnar_time:8.1f}x, identical values: {identical}")
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
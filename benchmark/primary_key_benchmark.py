@@ -0,0 +1,80 @@
+"""
+Benchmark of the primary key generation on a synthetic price frame.
+
+Compares the previous add_primary_key (three date conversions and two per-row lambdas) with the vectorized string id
+and the compact BIGINT key, and reports the size of the keys. Run it from the project root:
+
+    python -m benchmark.primary_key_benchmark --tickers 500 --days 1000
+"""
+import sys
+import argparse
+import numpy as np
+from types import SimpleNamespace
+from pandas import DataFrame, bdate_range, to_datetime
+from benchmark.parser_benchmark import best_time
+from stock_observer.downloader import Downloader
+from stock_observer.database.ticker_dictionary import split_compact_key
+
+
+def legacy_primary_key(data: DataFrame) -> DataFrame:
+    data_df = data.copy()
+    data_df['date'] = to_datetime(data_df['date'])
+    data_df['date'] = data_df['date'].map(lambda x: x.date())
+    data_df['date_str'] = data_df['date'].map(lambda x: str(x))
+    data_df['id'] = data_df['ticker'] + "-" + data_df['date_str']
+    cols = list(data_df.columns)
+    cols = [cols[-1]] + cols[:-1]
+    data_df = data_df[cols]
+    data_df.drop(columns='date_str', inplace=True)
+    return data_df
+
+
+class Local_Ticker_Dictionary:
+    """In-memory stand-in of the ticker dictionary table"""
+
+    def __init__(self, tickers):
+        self.mapping = {ticker: i + 1 for i, ticker in enumerate(sorted(tickers))}
+
+    def ids(self, tickers):
+        return tickers.map(self.mapping).to_numpy(dtype=np.int64)
+
+
+def main(arguments) -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tickers", type=int, default=500)
+    parser.add_argument("--days", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(arguments)
+
+    tickers = [f"T{i:04d}" for i in range(args.tickers)]
+    dates = bdate_range(end='2020-12-31', periods=args.days)
+    data_df = DataFrame({'ticker': np.repeat(tickers, args.days),
+                         'date': np.tile(dates.strftime('%Y-%m-%d'), args.tickers),
+                         'close': np.random.default_rng(0).normal(100, 1, args.tickers * args.days)})
+    string_mode = SimpleNamespace(primary_key_mode='string', ticker_dictionary=None)
+    compact_mode = SimpleNamespace(primary_key_mode='compact', ticker_dictionary=Local_Ticker_Dictionary(tickers))
+
+    legacy_df = legacy_primary_key(data_df)
+    string_df = Downloader.add_primary_key(string_mode, data_df)
+    compact_df = Downloader.add_primary_key(compact_mode, data_df)
+    ticker_ids, key_dates = split_compact_key(compact_df['id'].to_numpy())
+    identical = legacy_df['id'].tolist() == string_df['id'].tolist() \
+        and np.array_equal(key_dates, string_df['date'].to_numpy().astype('datetime64[D]')) \
+        and np.array_equal(ticker_ids, compact_mode.ticker_dictionary.ids(data_df['ticker']))
+
+    legacy_time = best_time(lambda: legacy_primary_key(data_df), args.repeat)
+    string_time = best_time(lambda: Downloader.add_primary_key(string_mode, data_df), args.repeat)
+    compact_time = best_time(lambda: Downloader.add_primary_key(compact_mode, data_df), args.repeat)
+
+    print(f"rows: {len(data_df)}")
+    print(f"previous primary key : {legacy_time * 1000:8.1f} ms, "
+          f"{legacy_df['id'].memory_usage(deep=True, index=False) / len(data_df):5.1f} bytes/key")
+    print(f"vectorized string id : {string_time * 1000:8.1f} ms, "
+          f"{string_df['id'].memory_usage(deep=True, index=False) / len(data_df):5.1f} bytes/key")
+    print(f"compact BIGINT key   : {compact_time * 1000:8.1f} ms, "
+          f"{compact_df['id'].memory_usage(deep=True, index=False) / len(data_df):5.1f} bytes/key")
+    print(f"speedup              : {legacy_time / string_time:8.1f}x, identical keys: {identical}")
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,80 @@
+"""
+Offline load test of the price download path with the local file-backed provider.
+
+Generates CSV (or Parquet with --format parquet) fixtures for thousands of tickers, then runs the whole
+Downloader.stock_price_download path on them: scheduling, planning, the batched download grouped by watermark, the
+primary key and the CSV output, followed by the local CCI of the Transformer. No network and no database are used,
+the stage table watermarks are preloaded. Run it from the project root:
+
+    python -m benchmark.provider_benchmark --tickers 5000 --days 500
+"""
+import sys
+import time
+import argparse
+import tempfile
+import numpy as np
+from pathlib import Path
+from datetime import timedelta
+from pandas import DataFrame, bdate_range
+from benchmark.downloader_benchmark import benchmark_config
+from stock_observer.downloader import Downloader
+from stock_observer.transformer import Transformer
+from stock_observer.database.watermark import Watermark_Service
+
+
+def write_fixtures(directory: Path, tickers: list, days: int, file_format: str) -> None:
+    dates = bdate_range(end='2020-12-31', periods=days)
+    rng = np.random.default_rng(0)
+    for ticker in tickers:
+        close = 100 + rng.normal(0, 1, days).cumsum()
+        fixture = DataFrame({'date': dates, 'open': close - 0.5, 'high': close + 1, 'low': close - 1, 'close': close,
+                             'volume': rng.integers(1e5, 1e7, days)})
+        if file_format == 'parquet':
+            fixture.to_parquet(directory / f"{ticker}.parquet", index=False)
+        else:
+            fixture.to_csv(directory / f"{ticker}.csv", index=False)
+
+
+def main(arguments) -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tickers", type=int, default=5000)
+    parser.add_argument("--days", type=int, default=500, help="trading days of every fixture")
+    parser.add_argument("--format", default='csv', choices=['csv', 'parquet'])
+    parser.add_argument("--stored-fraction", type=float, default=0.8,
+                        help="fraction of the tickers that already have history in the stage table")
+    args = parser.parse_args(arguments)
+
+    directory = Path(tempfile.mkdtemp(prefix='local_provider_'))
+    tickers = [f"T{i:05d}" for i in range(args.tickers)]
+    start = time.perf_counter()
+    write_fixtures(directory, tickers, args.days, args.format)
+    print(f"fixtures: {args.tickers} tickers x {args.days} days written in {time.perf_counter() - start:.1f}s")
+
+    config = benchmark_config(url='http://127.0.0.1:1/unused', requests_per_minute=60, workers=8)
+    config['Providers']['price provider'] = 'local'
+    config['Providers']['local data directory'] = str(directory)
+    config['Data_Sources']['equity price csv'] = str(directory / 'output' / 'equity_price')
+    (directory / 'output').mkdir()
+    last_day = bdate_range(end='2020-12-31', periods=args.days)[-1].date()
+    stored = tickers[:int(len(tickers) * args.stored_fraction)]
+    Watermark_Service.preload(table_name=config['MySQL']['stage table name'],
+                              latest={ticker: last_day - timedelta(days=30) for ticker in stored})
+
+    downloader = Downloader(config)
+    start = time.perf_counter()
+    data_df = downloader.stock_price_download(ticker_list=DataFrame({'ticker': tickers}))
+    download_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    data_df = Transformer.add_cci(data_df=data_df, n_days=30)
+    cci_time = time.perf_counter() - start
+
+    print(f"download path : {download_time:8.2f}s, {args.tickers / download_time:8.0f} tickers/s, "
+          f"{len(data_df)} rows, {len(stored)} incremental and {args.tickers - len(stored)} full tickers")
+    print(f"local CCI     : {cci_time:8.2f}s")
+    for name, summary in downloader.provider_report().items():
+        print(f"{name}: {summary}")
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,117 @@
+"""
+Benchmark and correctness check of the weekly and monthly bar resampling.
+
+Synthetic daily bars of --tickers tickers over --years years are resampled by resample_bars, by a pandas
+groupby(ticker, period).agg and by a per-ticker DataFrame.resample loop on the first --legacy-tickers tickers. The
+bars of the three are compared. Then the last --days days are transformed one by one the way
+Transformer.transform_timeframe does it: the daily bars of the open period only, behind the bars kept in the
+indicator state. Every returned row is compared with a full resample and recompute of the history up to that day.
+Run it from the project root:
+
+    python -m benchmark.resample_benchmark --tickers 500 --years 20
+"""
+import sys
+import time
+import argparse
+import tempfile
+import numpy as np
+from pathlib import Path
+from pandas import DataFrame, concat, to_datetime
+from stock_observer.bar_resampler import TIMEFRAMES, BAR_COLUMNS, period_starts, resample_bars
+from benchmark.transformer_benchmark import price_frame, benchmark_transformer
+
+AGGREGATIONS = {'open': 'first', 'high': 'max', 'low': 'min', 'close': 'last', 'volume': 'sum'}
+PANDAS_RULES = {'weekly': 'W-MON', 'monthly': 'MS'}
+
+
+def groupby_bars(data_df: DataFrame, timeframe: str) -> DataFrame:
+    days = to_datetime(data_df['date']).to_numpy().astype('datetime64[D]')
+    periods = data_df.assign(date=period_starts(days=days, timeframe=timeframe).astype(object))
+    return periods.groupby(['ticker', 'date'], sort=True).agg(AGGREGATIONS).reset_index()
+
+
+def pandas_resample_bars(data_df: DataFrame, timeframe: str) -> DataFrame:
+    frames = []
+    for ticker, ticker_df in data_df.groupby('ticker'):
+        ticker_df = ticker_df.set_index(to_datetime(ticker_df['date']))
+        bars_df = ticker_df.resample(PANDAS_RULES[timeframe], label='left', closed='left').agg(AGGREGATIONS)
+        bars_df = bars_df.dropna(subset=['open'])
+        frames.append(bars_df.assign(ticker=ticker, date=bars_df.index.date).reset_index(drop=True))
+    return concat(frames, ignore_index=True)
+
+
+def same_bars(expected_df: DataFrame, result_df: DataFrame) -> bool:
+    return len(expected_df) == len(result_df) and all(
+        np.array_equal(expected_df[column].to_numpy(), result_df[column].to_numpy())
+        for column in ['ticker', 'date'] + list(AGGREGATIONS))
+
+
+def incremental_check(transformer, stage_df: DataFrame, timeframe: str, days: int) -> None:
+    engine = transformer.timeframe_engines[timeframe]
+    state = transformer.timeframe_states[timeframe]
+    state.path = Path(tempfile.mkdtemp(prefix='indicator_state_')) / f'indicator_state_{timeframe}.pkl'
+    primary_key_mode = transformer.primary_key_mode
+    dates = np.sort(stage_df['date'].unique())
+
+    history_df = stage_df[stage_df['date'] <= dates[-days - 1]]
+    state.save(data_df=engine.compute(resample_bars(history_df, timeframe, primary_key_mode))[BAR_COLUMNS])
+    incremental_time = 0
+    full_time = 0
+    identical = True
+    for day in dates[-days:]:
+        # the table watermark is the last kept period, the run before was inserted. The stage query is not timed
+        since = state.tail_df.groupby('ticker')['date'].last().to_dict()
+        daily_df = stage_df[(stage_df['date'] >= stage_df['ticker'].map(since)) & (stage_df['date'] <= day)]
+        start = time.perf_counter()
+        bars_df = resample_bars(data_df=daily_df, timeframe=timeframe, primary_key_mode=primary_key_mode)
+        data_df = engine.compute(data_df=concat([state.history(since=since), bars_df], ignore_index=True))
+        state.save(data_df=data_df[BAR_COLUMNS])
+        data_df = data_df[data_df['date'] >= data_df['ticker'].map(since)].reset_index(drop=True)
+        incremental_time += time.perf_counter() - start
+
+        start = time.perf_counter()
+        full_df = engine.compute(resample_bars(stage_df[stage_df['date'] <= day], timeframe, primary_key_mode))
+        full_time += time.perf_counter() - start
+        full_df = full_df[full_df['date'] >= full_df['ticker'].map(since)].reset_index(drop=True)
+        identical &= len(full_df) == len(data_df) and all(
+            np.allclose(full_df[column].to_numpy(dtype=np.float64), data_df[column].to_numpy(dtype=np.float64),
+                        rtol=0, atol=1e-9, equal_nan=True) for column in engine.features) \
+            and (full_df['id'] == data_df['id']).all()
+    print(f"{timeframe:8s} {days} daily runs: open period {incremental_time / days * 1000:8.1f}ms per run, "
+          f"full history {full_time / days * 1000:8.1f}ms per run, same rows as the full recompute: {identical}")
+
+
+def main(arguments) -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tickers", type=int, default=500)
+    parser.add_argument("--years", type=int, default=20)
+    parser.add_argument("--legacy-tickers", type=int, default=50, help="tickers run through DataFrame.resample")
+    parser.add_argument("--days", type=int, default=10, help="new days transformed one by one")
+    args = parser.parse_args(arguments)
+
+    transformer = benchmark_transformer()
+    stage_df = price_frame(tickers=args.tickers, years=args.years)
+    legacy_df = stage_df[stage_df['ticker'] < f"T{args.legacy_tickers:04d}"]
+    print(f"{args.tickers} tickers x {args.years} years: {len(stage_df)} daily bars")
+
+    for timeframe in TIMEFRAMES:
+        start = time.perf_counter()
+        bars_df = resample_bars(data_df=stage_df, timeframe=timeframe,
+                                primary_key_mode=transformer.primary_key_mode)
+        resample_time = time.perf_counter() - start
+        start = time.perf_counter()
+        grouped_df = groupby_bars(data_df=stage_df, timeframe=timeframe)
+        groupby_time = time.perf_counter() - start
+        start = time.perf_counter()
+        pandas_df = pandas_resample_bars(data_df=legacy_df, timeframe=timeframe)
+        pandas_time = time.perf_counter() - start
+        print(f"{timeframe:8s} resample_bars {resample_time:6.2f}s, groupby agg {groupby_time:6.2f}s, "
+              f"per ticker resample {pandas_time / len(legacy_df) * len(stage_df):6.2f}s (extrapolated), "
+              f"{len(bars_df)} bars, same as groupby: {same_bars(grouped_df, bars_df)}, "
+              f"same as resample: {same_bars(pandas_df, bars_df.iloc[:len(pandas_df)])}")
+    for timeframe in TIMEFRAMES:
+        incremental_check(transformer=transformer, stage_df=stage_df, timeframe=timeframe, days=args.days)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,46 @@
+"""
+Scaling of the Indicator_Engine with the number of worker processes.
+
+Synthetic daily bars of --tickers tickers over --years years are transformed with every --workers setting, the time
+and the speedup over one worker are reported and every output is compared with the single process one. The speedup
+is bounded by the CPU cores of the machine. Run it from the project root:
+
+    python -m benchmark.sharding_benchmark --tickers 500 --years 20 --workers 1 2 4 8 16
+"""
+import os
+import sys
+import time
+import argparse
+import numpy as np
+from benchmark.transformer_benchmark import price_frame, benchmark_transformer
+from stock_observer.indicator_engine import Indicator_Engine
+
+
+def main(arguments) -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tickers", type=int, default=500)
+    parser.add_argument("--years", type=int, default=20)
+    parser.add_argument("--workers", type=int, nargs='+', default=[1, 2, 4, 8, 16])
+    args = parser.parse_args(arguments)
+
+    config = benchmark_transformer().config
+    data_df = price_frame(tickers=args.tickers, years=args.years)
+    print(f"{args.tickers} tickers x {args.years} years: {len(data_df)} rows, {os.cpu_count()} CPU cores")
+
+    reference_df = None
+    reference_time = None
+    for workers in args.workers:
+        engine = Indicator_Engine(config=config, workers=workers)
+        start = time.perf_counter()
+        result_df = engine.compute(data_df=data_df)
+        elapsed = time.perf_counter() - start
+        if reference_df is None:
+            reference_df, reference_time = result_df, elapsed
+        identical = all(np.array_equal(reference_df[column].to_numpy(), result_df[column].to_numpy(), equal_nan=True)
+                        for column in reference_df.columns[len(data_df.columns):])
+        print(f"{workers:3d} workers: {elapsed:8.2f}s, {len(data_df) / elapsed:10.0f} rows/s, "
+              f"speedup {reference_time / elapsed:5.2f}x, identical output: {identical}")
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,94 @@
+"""
+Benchmark of a sweep over the levels of the bucketed Analyzer signals.
+
+The indicators of synthetic daily bars of --tickers tickers over --years years are computed with the
+Indicator_Engine and rounded like the main table, that is the backtest window. window_signals runs once with the
+[Signals] levels of the config and gives the measured values of every analysed row. Then --sweeps random sets of
+ascending levels are looked up over those columns the way Signal_Levels does it, without running the analysis
+again. Every sweep is reported in milliseconds and the config levels are checked to give the same signals as
+window_signals. Run it from the project root:
+
+    python -m benchmark.threshold_benchmark --tickers 500 --years 20
+"""
+import sys
+import time
+import argparse
+import numpy as np
+from copy import deepcopy
+from stock_observer.signal_engine import Signal_Levels, window_signals
+from benchmark.transformer_benchmark import price_frame, benchmark_transformer
+
+SIGNAL_KEYS = ['ma angle levels', 'atr slope levels', 'atr candle levels', 'price change levels']
+
+
+def random_levels(config, rng: np.random.Generator) -> Signal_Levels:
+    """
+    :return: levels of the config each moved by up to 20 %, still ascending
+    """
+    config = deepcopy(config)
+    for key in SIGNAL_KEYS:
+        levels = Signal_Levels.levels(config=config, key=key)
+        levels = np.sort(levels * rng.uniform(0.8, 1.2, len(levels)))
+        config['Signals'][key] = ', '.join(str(level) for level in levels)
+    return Signal_Levels(config=config)
+
+
+def level_signals(levels: Signal_Levels, measures: dict) -> dict:
+    return {'MA_signal': np.where(measures['cross'], levels.ma_signal(angle_diff=measures['MA_angle_diff']), 0),
+            'ATR_slope_change_signal': levels.atr_slope_signal(angle_diff=measures['ATR_angle_diff']),
+            'ATR_candle_size_signal': levels.atr_candle_signal(candle_size=measures['candle_size'],
+                                                               atr=measures['ATR_y']),
+            'price_diff_signal': levels.price_change_signal(price_diff=measures['price_diff'])}
+
+
+def main(arguments) -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tickers", type=int, default=500)
+    parser.add_argument("--years", type=int, default=20)
+    parser.add_argument("--sweeps", type=int, default=20, help="random sets of levels")
+    args = parser.parse_args(arguments)
+
+    transformer = benchmark_transformer()
+    config = transformer.config
+    main_df = transformer.indicator_engine.compute(data_df=price_frame(tickers=args.tickers, years=args.years))
+    main_df = main_df.round(3).sort_values(by=['ticker', 'date'], kind='mergesort', ignore_index=True)
+
+    levels = Signal_Levels(config=config)
+    start = time.perf_counter()
+    signals_df = window_signals(data_df=main_df, levels=levels)
+    analysis_time = time.perf_counter() - start
+    print(f"{args.tickers} tickers x {args.years} years: {len(signals_df)} analysed rows, "
+          f"window_signals {analysis_time:6.2f}s")
+
+    # the values the levels are looked up for, t is the analysed row and y the row before it
+    rows = main_df.index[main_df['id'].isin(signals_df['id'])].to_numpy()
+
+    def column(name: str, at: np.ndarray = rows) -> np.ndarray:
+        return main_df[name].to_numpy()[at]
+
+    ma_5_t, ma_20_t, ma_5_y, ma_20_y = column('MA_5'), column('MA_20'), column('MA_5', rows - 1), \
+        column('MA_20', rows - 1)
+    atr_y = column('ATR_20', rows - 1)
+    measures = {'cross': ((ma_5_y < ma_20_y) & (ma_5_t > ma_20_t)) | ((ma_5_y > ma_20_y) & (ma_5_t < ma_20_t)),
+                'MA_angle_diff': signals_df['MA_angle_diff'].to_numpy(),
+                'ATR_angle_diff': signals_df['ATR_angle_diff'].to_numpy(),
+                'candle_size': np.abs(column('open') - column('close')),
+                'ATR_y': np.where(atr_y == 0, 0.001, atr_y),
+                'price_diff': signals_df['price_diff'].to_numpy()}
+
+    same = all(np.array_equal(signals, signals_df[name].to_numpy())
+               for name, signals in level_signals(levels=levels, measures=measures).items())
+    print(f"config levels give the signals of window_signals: {same}")
+
+    rng = np.random.default_rng(0)
+    sweep = [random_levels(config=config, rng=rng) for _ in range(args.sweeps)]
+    start = time.perf_counter()
+    fired = [sum(int(np.count_nonzero(signals)) for signals in level_signals(levels, measures).values())
+             for levels in sweep]
+    sweep_time = time.perf_counter() - start
+    print(f"{args.sweeps} sets of levels: {sweep_time / args.sweeps * 1000:8.1f}ms per set, "
+          f"non zero signals from {min(fired)} to {max(fired)}")
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,92 @@
+"""
+Benchmark of the Transformer indicators: the Indicator_Engine against the per-indicator sort, merge and iterrows
+steps that transform() used before (add_moving_avg, add_cci, add_atr and add_bollinger_bands).
+
+Synthetic daily bars are generated for --tickers tickers over --years years. The engine runs on all of them, the old
+steps on the first --legacy-tickers only because their iterrows true range needs minutes for the full set. Both are
+reported in rows per second and the outputs are compared on the common tickers. The engine also computes the line
+angles, the old steps do not, see angle_benchmark for those. Run it from the project root:
+
+    python -m benchmark.transformer_benchmark --tickers 500 --years 20
+"""
+import sys
+import time
+import argparse
+import numpy as np
+from configparser import ConfigParser
+from pandas import DataFrame, bdate_range, concat
+from stock_observer.transformer import Transformer
+
+
+def price_frame(tickers: int, years: int, seed: int = 0) -> DataFrame:
+    """
+    :return: daily bars in stage table layout, sorted by ticker and date
+    """
+    dates = bdate_range(end='2020-12-31', periods=years * 252)
+    rng = np.random.default_rng(seed)
+    frames = []
+    for i in range(tickers):
+        close = np.abs(100 + rng.normal(0, 1, len(dates)).cumsum()) + 1
+        frames.append(DataFrame({'id': [f"T{i:04d}-{day}" for day in dates.date], 'ticker': f"T{i:04d}",
+                                 'date': dates.date, 'open': close + rng.normal(0, 0.5, len(dates)),
+                                 'high': close + 1, 'low': close - 1, 'close': close,
+                                 'volume': rng.integers(1e5, 1e7, len(dates)), 'CCI': np.nan}))
+    return concat(frames, ignore_index=True)
+
+
+def benchmark_transformer(cci_source: str = 'local') -> Transformer:
+    config = ConfigParser()
+    config.read('stock-observer-dev.config')
+    config['Indicator']['cci source'] = cci_source
+    return Transformer(config)
+
+
+def legacy_indicators(transformer: Transformer, data_df: DataFrame) -> DataFrame:
+    data_df = transformer.add_moving_avg(data_df=data_df, n_days=transformer.moving_avg_period_1)
+    data_df = transformer.add_moving_avg(data_df=data_df, n_days=transformer.moving_avg_period_2)
+    data_df = transformer.add_cci(data_df=data_df, n_days=transformer.cci_period)
+    data_df = transformer.add_atr(data_df=data_df, n_days=transformer.atr_period)
+    return transformer.add_bollinger_bands(data_df=data_df, n_days=transformer.bollinger_bands_period)
+
+
+def main(arguments) -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tickers", type=int, default=500)
+    parser.add_argument("--years", type=int, default=20)
+    parser.add_argument("--legacy-tickers", type=int, default=20,
+                        help="tickers run through the old steps, 0 skips them")
+    args = parser.parse_args(arguments)
+
+    data_df = price_frame(tickers=args.tickers, years=args.years)
+    transformer = benchmark_transformer()
+    print(f"{args.tickers} tickers x {args.years} years: {len(data_df)} rows")
+
+    start = time.perf_counter()
+    engine_df = transformer.indicator_engine.compute(data_df=data_df.sample(frac=1, random_state=0))
+    engine_time = time.perf_counter() - start
+    print(f"indicator engine : {engine_time:8.2f}s, {len(data_df) / engine_time:12.0f} rows/s")
+    if not args.legacy_tickers:
+        return
+
+    legacy_input = data_df[data_df['ticker'] < f"T{args.legacy_tickers:04d}"].reset_index(drop=True)
+    start = time.perf_counter()
+    legacy_df = legacy_indicators(transformer=transformer, data_df=legacy_input.copy())
+    legacy_time = time.perf_counter() - start
+    print(f"old steps        : {legacy_time:8.2f}s, {len(legacy_input) / legacy_time:12.0f} rows/s "
+          f"({len(legacy_input)} rows)")
+    print(f"speedup          : {len(data_df) / engine_time / (len(legacy_input) / legacy_time):8.1f}x")
+
+    # the old ATR takes the previous close across tickers, so the first ATR window of every ticker differs
+    engine_df = engine_df.iloc[:len(legacy_df)]
+    first_window = (engine_df.groupby('ticker').cumcount() < transformer.atr_period).to_numpy()
+    for column in legacy_df.columns[8:]:
+        engine_values = engine_df[column].to_numpy(dtype=np.float64)
+        legacy_values = legacy_df[column].to_numpy(dtype=np.float64)
+        mask = ~first_window if column.startswith('ATR') else np.ones(len(legacy_df), dtype=bool)
+        difference = np.nanmax(np.abs(engine_values[mask] - legacy_values[mask]))
+        same_nan = np.array_equal(np.isnan(engine_values[mask]), np.isnan(legacy_values[mask]))
+        print(f"{column:10s} max difference {difference:.2e}, same missing values: {same_nan}")
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -49,6 +49,9 @@ class Stock_Observer_Pipeline:
         parser.add_argument("-A", "--analyzer", help="download raw data files", action="store_true")
         parser.add_argument("-DM", "--decision_maker", help="download raw data files", action="store_true")
         parser.add_argument("-N", "--notify", help="download raw data files", action="store_true")
+        parser.add_argument("-R", "--replay", help="serve all downloads from the response cache only",
+                            action="store_true")
+        parser.add_argument("-W", "--workers", help="processes of the transformation", type=int, default=1)
 
         args: Namespace = parser.parse_args(args=arguments)
 
@@ -63,10 +66,16 @@ class Stock_Observer_Pipeline:
                 logger.info("************------------( Downloader started )------------************")
                 pipeline_report_step = self.pipeline_report.create_step("Downloader")
                 try:
-                    download = Downloader(self.config)
+                    download = Downloader(self.config, replay=args.replay)
                     ticker_list = read_csv(self.ticker_list_path)
                     # stock_price_data_df = download.stock_price_download(ticker_list=ticker_list)
                     fundamentals_data_df = download.fundamentals_download(ticker_list=ticker_list)
+                    for host, summary in download.http_client.latency_report().items():
+                        pipeline_report_step.add_info_detail(f"{host}: {summary}")
+                    for provider, summary in download.provider_report().items():
+                        pipeline_report_step.add_info_detail(f"{provider}: {summary}")
+                    for ticker, status in download.ticker_status.items():
+                        pipeline_report_step.add_detail(ticker, status)
                 except BaseException as e:
                     pipeline_report_step.mark_failure(str(e))
                     raise e
@@ -88,8 +97,9 @@ class Stock_Observer_Pipeline:
                 logger.info("************------------( Transformation started )------------************")
                 pipeline_report_step = self.pipeline_report.create_step("Transformation")
                 try:
-                    transformation = Transformer(self.config)
+                    transformation = Transformer(self.config, workers=args.workers)
                     processed_data_df = transformation.transform()
+                    timeframe_data = transformation.transform_timeframes()
                 except BaseException as e:
                     pipeline_report_step.mark_failure(str(e))
                     raise e
@@ -98,10 +108,13 @@ class Stock_Observer_Pipeline:
                 logger.info("************------------( Main database insertion started )------------************")
                 pipeline_report_step = self.pipeline_report.create_step("Main DB Insertion")
                 try:
-                    derivative_features = list(processed_data_df.columns)[8:]
+                    derivative_features = transformation.features
                     main_db = DB_Insertion(self.config)
                     main_db.insertion(data_df=processed_data_df, table_name=self.main_table_name,
                                       table_type='main', derivative_features=derivative_features)
+                    for timeframe, timeframe_df in timeframe_data.items():
+                        main_db.insertion(data_df=timeframe_df, table_name=transformation.timeframe_tables[timeframe],
+                                          table_type='main', derivative_features=derivative_features)
                 except BaseException as e:
                     pipeline_report_step.mark_failure(str(e))
                     raise e
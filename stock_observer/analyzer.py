@@ -5,7 +5,10 @@ from utils import save_csv
 from pandas import DataFrame, read_csv
 from log_setup import get_logger
 from configparser import ConfigParser
-from datetime import timedelta, datetime
+from datetime import timedelta, datetime, date
+from stock_observer.frame_layout import Frame_Layout
+from stock_observer.signal_engine import Signal_Levels, window_signals
+from stock_observer.database.watermark import Watermark_Service
 from stock_observer.database.database_communication import MySQL_Connection
 
 logger = get_logger(__name__)
@@ -18,9 +21,38 @@ class Analyzer:
         self.main_table_name = self.config['MySQL']['main table name']
         self.analysis_table_name = self.config['MySQL']['analysis table name']
         self.path = config['Data_Sources']['analysis equity price csv']
+        self.watermarks = Watermark_Service(config=config)
+        self.frame_layout = Frame_Layout(config=config)
+        self.analyzer_mode = self.config['Mode']['analyzer mode']
+        self.signal_levels = Signal_Levels(config=config)
 
     def analysis(self) -> DataFrame:
-        data_df = self.data_load(day_shift=60)
+        data_df = self.frame_layout.compact_frame(self.data_load(day_shift=60))
+        result = self.frame_layout.expand(self.analyze(data_df=data_df))
+        self.result_logger(table_name=self.analysis_table_name, table_type='analysis', data_df=result)
+        return result
+
+    def analyze(self, data_df: DataFrame) -> DataFrame:
+        """
+        :param data_df: main table rows, in table or compact layout
+        :return: signals of every row, in the layout of data_df
+        """
+        data = self.signals(data_df=data_df)
+        result = data_df.merge(data, on=['id', 'ticker', 'date'], how='outer')
+        result.drop_duplicates(subset='id', inplace=True)
+        result.dropna(inplace=True)
+        result.reset_index(drop=True, inplace=True)
+        return self.frame_layout.compact_frame(result)
+
+    def signals(self, data_df: DataFrame) -> DataFrame:
+        """
+        Signals of the last row of every 30 row window of every ticker. The 'loop' analyzer mode slides the window
+        through the signal functions below, the 'vectorized' one computes the same values with window_signals.
+        :param data_df: main table rows
+        :return: id, ticker, date and the signal columns
+        """
+        if self.analyzer_mode == 'vectorized':
+            return window_signals(data_df=data_df, levels=self.signal_levels)
         ticker_list = data_df.ticker.unique()
         data = DataFrame()
         for ticker in ticker_list:
@@ -42,28 +74,18 @@ class Analyzer:
                                                        ATR_R=ATR_range_result_df, CCI=CCI_result_df,
                                                        PC=price_change_result_df)
                 data = data.append(analyzed_data)
-        result = data_df.merge(data, on=['id', 'ticker', 'date'], how='outer')
-        result.drop_duplicates(subset='id', inplace=True)
-        result.dropna(inplace=True)
-        result.reset_index(drop=True, inplace=True)
-        self.result_logger(table_name=self.analysis_table_name, table_type='analysis', data_df=result)
-        return result
+        return data
 
     def data_load(self, day_shift: int) -> DataFrame:
         logger.info("Data loading from main database")
         ticker_list = read_csv(self.ticker_list_path)
+        latest_dates = self.watermarks.latest_dates(table_name=self.analysis_table_name)
+        mysql = MySQL_Connection(config=self.config)
         data_df = DataFrame()
         for row in ticker_list.iterrows():
             ticker = row[1]['ticker']
-            mysql = MySQL_Connection(config=self.config)
-            latest_date_df = mysql.select(
-                f"SELECT max(date) FROM {self.analysis_table_name} WHERE ticker = '{ticker}';")
-
-            if latest_date_df is not None:
-                latest_date_in_db = latest_date_df.iloc[0][0]
-                logger.info(f"{ticker} latest update is {latest_date_in_db}")
-            else:
-                latest_date_in_db = datetime.strptime('2000-01-01', "%Y-%m-%d").date()
+            latest_date_in_db = latest_dates.get(ticker, date(2000, 1, 1))
+            logger.info(f"{ticker} latest update is {latest_date_in_db}")
 
             starting_date = str(latest_date_in_db - timedelta(days=(day_shift + 3)))
             data = mysql.select(f"SELECT * FROM {self.main_table_name} "
@@ -103,8 +125,7 @@ class Analyzer:
         result_df.drop(columns=['open', 'close', 'BB_U_20', 'BB_L_20'], inplace=True)
         return result_df
 
-    @staticmethod
-    def MA_cross_angle_diff(data_df: DataFrame) -> DataFrame:
+    def MA_cross_angle_diff(self, data_df: DataFrame) -> DataFrame:
         # logger.info("MA-5 and MA-20 cross point angle check")
         MA_df = data_df[['id', 'ticker', 'date', 'MA_5', 'MA_20', 'MA_5_alpha', 'MA_20_alpha']]
         MA_df.reset_index(drop=True, inplace=True)
@@ -126,26 +147,8 @@ class Analyzer:
                 angle_diff = round(abs(MA_5_alpha_t - MA_20_alpha_t), 0)
 
                 if ((MA_5_y < MA_20_y) and (MA_5_t > MA_20_t)) or ((MA_5_y > MA_20_y) and (MA_5_t < MA_20_t)):
-                    if angle_diff <= 10:
-                        signal = 0
-                    elif 10 < angle_diff < 45:
-                        signal = 1
-                        logger.warning(
-                            f"Signal {signal}: {ticker} MA_5 and MA_20 angle difference is {angle_diff} at {temp_df.iloc[0]['date']}")
-                    elif 45 <= angle_diff < 60:
-                        signal = 2
-                        logger.warning(
-                            f"Signal {signal}: {ticker} MA_5 and MA_20 angle difference is {angle_diff} at {temp_df.iloc[0]['date']}")
-                    elif 60 <= angle_diff < 75:
-                        signal = 3
-                        logger.warning(
-                            f"Signal {signal}: {ticker} MA_5 and MA_20 angle difference is {angle_diff} at {temp_df.iloc[0]['date']}")
-                    elif 75 <= angle_diff < 90:
-                        signal = 4
-                        logger.warning(
-                            f"Signal {signal}: {ticker} MA_5 and MA_20 angle difference is {angle_diff} at {temp_df.iloc[0]['date']}")
-                    elif angle_diff >= 90:
-                        signal = 5
+                    signal = int(self.signal_levels.ma_signal(angle_diff=angle_diff))
+                    if signal:
                         logger.warning(
                             f"Signal {signal}: {ticker} MA_5 and MA_20 angle difference is {angle_diff} at {temp_df.iloc[0]['date']}")
                 else:
@@ -159,8 +162,7 @@ class Analyzer:
         result_df = DataFrame(result, columns=['id', 'ticker', 'date', 'MA_angle_diff', 'MA_signal'])
         return result_df
 
-    @staticmethod
-    def ATR_slope_change(data_df: DataFrame) -> DataFrame:
+    def ATR_slope_change(self, data_df: DataFrame) -> DataFrame:
         # logger.info("ATR slope change check")
         ATR_S_df = data_df[['id', 'ticker', 'date', 'ATR_20_alpha']]
         ATR_S_df.reset_index(drop=True, inplace=True)
@@ -175,26 +177,8 @@ class Analyzer:
                 ATR_alpha_t = temp_df.iloc[0]['ATR_20_alpha']
                 ATR_alpha_y = temp_df.iloc[1]['ATR_20_alpha']
                 angle_diff = round(abs(ATR_alpha_t - ATR_alpha_y), 0)
-                if angle_diff <= 30:
-                    signal = 0
-                elif 30 < angle_diff < 45:
-                    signal = 1
-                    logger.warning(
-                        f"Signal {signal}: {ticker} ATR slope break is {angle_diff} at {temp_df.iloc[0]['date']}")
-                elif 45 <= angle_diff < 60:
-                    signal = 2
-                    logger.warning(
-                        f"Signal {signal}: {ticker} ATR slope break is {angle_diff} at {temp_df.iloc[0]['date']}")
-                elif 60 <= angle_diff < 75:
-                    signal = 3
-                    logger.warning(
-                        f"Signal {signal}: {ticker} ATR slope break is {angle_diff} at {temp_df.iloc[0]['date']}")
-                elif 75 <= angle_diff < 90:
-                    signal = 4
-                    logger.warning(
-                        f"Signal {signal}: {ticker} ATR slope break is {angle_diff} at {temp_df.iloc[0]['date']}")
-                elif angle_diff >= 90:
-                    signal = 5
+                signal = int(self.signal_levels.atr_slope_signal(angle_diff=angle_diff))
+                if signal:
                     logger.warning(
                         f"Signal {signal}: {ticker} ATR slope break is {angle_diff} at {temp_df.iloc[0]['date']}")
             else:
@@ -205,8 +189,7 @@ class Analyzer:
         result_df = DataFrame(result, columns=['id', 'ticker', 'date', 'ATR_angle_diff', 'ATR_slope_change_signal'])
         return result_df
 
-    @staticmethod
-    def ATR_range(data_df: DataFrame) -> DataFrame:
+    def ATR_range(self, data_df: DataFrame) -> DataFrame:
         # logger.info("ATR 1.5 range check")
         ATR_R_df = data_df[['id', 'ticker', 'date', 'open', 'close', 'ATR_20']]
         ATR_R_df.reset_index(drop=True, inplace=True)
@@ -224,26 +207,8 @@ class Analyzer:
                 if ATR_y == 0:
                     ATR_y = 0.001
                 candle_size = abs(open_t - close_t)
-                if candle_size <= ATR_y:
-                    signal = 0
-                elif ATR_y < candle_size < 1.55 * ATR_y:
-                    signal = 1
-                    logger.warning(
-                        f"Signal {signal}: {ticker} Candle size is {round(candle_size / ATR_y, 2)} times of ATR at {temp_df.iloc[0]['date']}")
-                elif 1.55 * ATR_y <= candle_size < 1.7 * ATR_y:
-                    signal = 2
-                    logger.warning(
-                        f"Signal {signal}: {ticker} Candle size is {round(candle_size / ATR_y, 2)} times of ATR at {temp_df.iloc[0]['date']}")
-                elif 1.7 * ATR_y <= candle_size < 1.85 * ATR_y:
-                    signal = 3
-                    logger.warning(
-                        f"Signal {signal}: {ticker} candle size is {round(candle_size / ATR_y, 2)} times of ATR at {temp_df.iloc[0]['date']}")
-                elif 1.85 * ATR_y <= candle_size < 2 * ATR_y:
-                    signal = 4
-                    logger.warning(
-                        f"Signal {signal}: {ticker} candle size is {round(candle_size / ATR_y, 2)} times of ATR at {temp_df.iloc[0]['date']}")
-                elif candle_size >= 2 * ATR_y:
-                    signal = 5
+                signal = int(self.signal_levels.atr_candle_signal(candle_size=candle_size, atr=ATR_y))
+                if signal:
                     logger.warning(
                         f"Signal {signal}: {ticker} candle size is {round(candle_size / ATR_y, 2)} times of ATR at {temp_df.iloc[0]['date']}")
             else:
@@ -291,8 +256,7 @@ class Analyzer:
         result_df = result_df[result_df.date == latest_date]
         return result_df
 
-    @staticmethod
-    def price_change(data_df: DataFrame) -> DataFrame:
+    def price_change(self, data_df: DataFrame) -> DataFrame:
         # logger.info("Price change change check")
         PC_df = data_df[['id', 'ticker', 'date', 'close', 'open']]
         PC_df.reset_index(drop=True, inplace=True)
@@ -307,46 +271,8 @@ class Analyzer:
                 PC_t = (temp_df.iloc[0]['open'] + temp_df.iloc[0]['close']) / 2
                 PC_y = (temp_df.iloc[1]['open'] + temp_df.iloc[1]['close']) / 2
                 PC_diff = round((PC_t - PC_y) * 100 / PC_y, 2)
-                if PC_diff <= -12:
-                    signal = -5
-                    logger.warning(
-                        f"Signal {signal}: {ticker} ATR slope break is {PC_diff} at {temp_df.iloc[0]['date']}")
-                elif -12 < PC_diff <= -10:
-                    signal = -4
-                    logger.warning(
-                        f"Signal {signal}: {ticker} ATR slope break is {PC_diff} at {temp_df.iloc[0]['date']}")
-                elif -10 < PC_diff <= -7.5:
-                    signal = -3
-                    logger.warning(
-                        f"Signal {signal}: {ticker} ATR slope break is {PC_diff} at {temp_df.iloc[0]['date']}")
-                elif -7.5 < PC_diff <= -5:
-                    signal = -2
-                    logger.warning(
-                        f"Signal {signal}: {ticker} ATR slope break is {PC_diff} at {temp_df.iloc[0]['date']}")
-                elif -5 < PC_diff <= -3:
-                    signal = -1
-                    logger.warning(
-                        f"Signal {signal}: {ticker} ATR slope break is {PC_diff} at {temp_df.iloc[0]['date']}")
-                elif -3 < PC_diff < 3:
-                    signal = 0
-                elif 3 <= PC_diff < 5:
-                    signal = 1
-                    logger.warning(
-                        f"Signal {signal}: {ticker} ATR slope break is {PC_diff} at {temp_df.iloc[0]['date']}")
-                elif 5 <= PC_diff < 7.5:
-                    signal = 2
-                    logger.warning(
-                        f"Signal {signal}: {ticker} ATR slope break is {PC_diff} at {temp_df.iloc[0]['date']}")
-                elif 7.5 <= PC_diff < 10:
-                    signal = 3
-                    logger.warning(
-                        f"Signal {signal}: {ticker} ATR slope break is {PC_diff} at {temp_df.iloc[0]['date']}")
-                elif 10 <= PC_diff < 12:
-                    signal = 4
-                    logger.warning(
-                        f"Signal {signal}: {ticker} ATR slope break is {PC_diff} at {temp_df.iloc[0]['date']}")
-                elif 12 <= PC_diff:
-                    signal = 5
+                signal = int(self.signal_levels.price_change_signal(price_diff=PC_diff))
+                if signal:
                     logger.warning(
                         f"Signal {signal}: {ticker} ATR slope break is {PC_diff} at {temp_df.iloc[0]['date']}")
             else:
@@ -388,6 +314,7 @@ class Analyzer:
             else:
                 logger.info(f"Update {table_name} table in the database")
                 mysql.insert_df(data_df=data_df, table_name=table_name, primary_key='id', if_exists='append')
+            Watermark_Service.invalidate(table_name=table_name)
         else:
             logger.warning("Database insertion received empty data frame")
 
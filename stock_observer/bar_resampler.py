@@ -0,0 +1,59 @@
+import numpy as np
+from pandas import DataFrame, to_datetime
+from log_setup import get_logger
+from stock_observer.database.ticker_dictionary import compact_key, split_compact_key
+
+logger = get_logger(__name__)
+
+TIMEFRAMES = ['weekly', 'monthly']
+BAR_COLUMNS = ['id', 'ticker', 'date', 'open', 'high', 'low', 'close', 'volume']
+
+
+def period_starts(days: np.ndarray, timeframe: str) -> np.ndarray:
+    """
+    :param days: datetime64[D] dates
+    :param timeframe: 'weekly' or 'monthly'
+    :return: datetime64[D] first calendar day of the period of every date, the Monday or the 1st of the month
+    """
+    if timeframe == 'weekly':
+        # 1970-01-01 was a Thursday, 3 days after a Monday
+        epoch_days = days.astype(np.int64)
+        return (epoch_days - (epoch_days + 3) % 7).astype('datetime64[D]')
+    if timeframe == 'monthly':
+        return days.astype('datetime64[M]').astype('datetime64[D]')
+    raise ValueError(f"Unknown timeframe {timeframe}, expected one of {TIMEFRAMES}")
+
+
+def resample_bars(data_df: DataFrame, timeframe: str, primary_key_mode: str) -> DataFrame:
+    """
+    Weekly or monthly bars of daily bars in one pass over the rows sorted by (ticker, date): first open, highest
+    high, lowest low, last close and summed volume of every (ticker, period) run of rows.
+    A bar is dated by the first calendar day of its period, so the id of the open period does not change while its
+    days come in and the bar is rewritten in place.
+    :param data_df: daily bars in stage table layout, in any order
+    :param timeframe: 'weekly' or 'monthly'
+    :param primary_key_mode: 'string' or 'compact', see Downloader.add_primary_key
+    :return: bars in stage table layout without the CCI, sorted by ticker and date
+    """
+    if data_df.empty:
+        return DataFrame(columns=BAR_COLUMNS)
+    data_df = data_df.sort_values(by=['ticker', 'date'], kind='mergesort', ignore_index=True)
+    starts = period_starts(days=to_datetime(data_df['date']).to_numpy().astype('datetime64[D]'), timeframe=timeframe)
+    tickers = data_df['ticker'].to_numpy()
+    first = np.flatnonzero(np.r_[True, (tickers[1:] != tickers[:-1]) | (starts[1:] != starts[:-1])])
+    last = np.r_[first[1:], len(data_df)] - 1
+
+    bars_df = DataFrame({'ticker': tickers[first], 'date': starts[first].astype(object),
+                         'open': data_df['open'].to_numpy()[first],
+                         'high': np.maximum.reduceat(data_df['high'].to_numpy(dtype=np.float64), first),
+                         'low': np.minimum.reduceat(data_df['low'].to_numpy(dtype=np.float64), first),
+                         'close': data_df['close'].to_numpy()[last],
+                         'volume': np.add.reduceat(data_df['volume'].to_numpy(), first)})
+    if primary_key_mode == 'compact':
+        ticker_ids, _ = split_compact_key(data_df['id'].to_numpy()[first])
+        ids = compact_key(ticker_ids=ticker_ids, dates=starts[first])
+    else:
+        ids = bars_df['ticker'] + '-' + starts[first].astype(str)
+    bars_df.insert(0, 'id', ids)
+    logger.info(f"Resampled {len(data_df)} daily bars into {len(bars_df)} {timeframe} bars")
+    return bars_df
@@ -29,9 +29,11 @@ class MySQL_Connection:
     def create_table(self, table_name: str, table_type: str, derivative_features=None):
         global query
         logger.info(f"Start creating {table_type} table with {table_name} name in the database")
+        # the compact primary key packs the ticker dictionary id and the epoch day into one BIGINT
+        id_type = 'BIGINT' if self.config['MySQL']['primary key mode'] == 'compact' else 'VARCHAR(20)'
         if table_type == 'stage':
             query = f"""CREATE TABLE {table_name} (
-                        id VARCHAR(20) NOT NULL PRIMARY KEY, 
+                        id {id_type} NOT NULL PRIMARY KEY, 
                         ticker VARCHAR(10) NOT NULL, 
                         date date NOT NULL, 
                         open double, 
@@ -43,7 +45,7 @@ class MySQL_Connection:
         elif table_type == 'main':
             cols = " double, ".join([str(i) for i in derivative_features]) + " double"
             query = f"""CREATE TABLE {table_name} (
-                        id VARCHAR(20) NOT NULL PRIMARY KEY, 
+                        id {id_type} NOT NULL PRIMARY KEY, 
                         ticker VARCHAR(10) NOT NULL, 
                         date date NOT NULL, 
                         open double, 
@@ -55,85 +57,91 @@ class MySQL_Connection:
         elif table_type == 'analysis':
             cols = " double, ".join([str(i) for i in derivative_features]) + " double"
             query = f"""CREATE TABLE {table_name} (
-                        id VARCHAR(20) NOT NULL PRIMARY KEY, 
+                        id {id_type} NOT NULL PRIMARY KEY, 
                         ticker VARCHAR(10) NOT NULL, 
                         date date NOT NULL, 
                         {cols});"""
+        elif table_type == 'ticker_dictionary':
+            query = f"""CREATE TABLE {table_name} (
+                        ticker_id INT NOT NULL AUTO_INCREMENT PRIMARY KEY,
+                        ticker VARCHAR(10) NOT NULL UNIQUE);"""
         elif table_type == 'fundamentals':
             query = f"""CREATE TABLE {table_name} (
                         ticker VARCHAR(20) NOT NULL,
                         date DATE NOT NULL,
                         Market_Index VARCHAR(20) NULL,
-                        Market_Cap VARCHAR(20) NULL, 
-                        Income VARCHAR(20) NULL, 
-                        Sales VARCHAR(20) NULL, 
-                        Book_on_sh FLOAT NULL, 
-                        Cash_on_sh FLOAT NULL, 
-                        Dividend FLOAT NULL, 
-                        Dividend_p VARCHAR(20) NULL, 
+                        Market_Cap DOUBLE NULL,
+                        Income DOUBLE NULL,
+                        Sales DOUBLE NULL,
+                        Book_on_sh DOUBLE NULL,
+                        Cash_on_sh DOUBLE NULL,
+                        Dividend DOUBLE NULL,
+                        Dividend_p DOUBLE NULL,
                         Employees BIGINT NULL,
-                        Optionable VARCHAR(20) NULL, 
-                        Shortable VARCHAR(20) NULL, 
-                        Recom FLOAT NULL , 
-                        P_on_E FLOAT NULL, 
-                        Forward_P_on_E FLOAT NULL, 
-                        PEG FLOAT NULL, 
-                        P_on_S FLOAT NULL, 
-                        P_on_B FLOAT NULL, 
-                        P_on_C FLOAT NULL, 
-                        P_on_FCF FLOAT NULL,
-                        Quick_Ratio FLOAT NULL, 
-                        Current_Ratio FLOAT NULL, 
-                        Debt_on_Eq FLOAT NULL, 
-                        LT_Debt_on_Eq FLOAT NULL, 
-                        SMA20 FLOAT NULL, 
-                        EPS_ttm FLOAT NULL, 
-                        EPS_next_Y FLOAT NULL,
-                        EPS_next_Q FLOAT NULL, 
-                        EPS_this_Y FLOAT NULL, 
-                        EPS_next_5Y FLOAT NULL, 
-                        EPS_past_5Y FLOAT NULL, 
-                        Sales_past_5Y FLOAT NULL,
-                        Sales_Q_Q FLOAT NULL, 
-                        EPS_Q_Q FLOAT NULL, 
-                        Earnings VARCHAR(20) NULL, 
-                        SMA50 FLOAT NULL, 
-                        Insider_Own FLOAT NULL, 
-                        Insider_Trans FLOAT NULL, 
-                        Inst_Own FLOAT NULL,
-                        Inst_Trans FLOAT NULL, 
-                        ROA FLOAT NULL, 
-                        ROE FLOAT NULL, 
-                        ROI FLOAT NULL, 
-                        Gross_Margin FLOAT NULL, 
-                        Oper_Margin FLOAT NULL, 
-                        Profit_Margin FLOAT NULL,
-                        Payout FLOAT NULL, 
-                        SMA200 FLOAT NULL,
-                        Shs_Outstand VARCHAR(20) NULL, 
-                        Shs_Float VARCHAR(20) NULL, 
-                        Short_Float FLOAT NULL, 
-                        Short_Ratio FLOAT NULL,
-                        Target_Price FLOAT NULL, 
-                        _52W_Range VARCHAR(20) NULL, 
-                        _52W_High FLOAT NULL, 
-                        _52W_Low FLOAT NULL, 
-                        RSI_14 FLOAT NULL, 
-                        Rel_Volume FLOAT NULL,
-                        Avg_Volume VARCHAR(20) NULL, 
-                        Volume FLOAT NULL, 
-                        Perf_Week FLOAT NULL, 
-                        Perf_Month FLOAT NULL, 
-                        Perf_Quarter FLOAT NULL, 
-                        Perf_Half_Y FLOAT NULL,
-                        Perf_Year FLOAT NULL, 
-                        Perf_YTD FLOAT NULL, 
-                        Beta FLOAT NULL, 
-                        ATR FLOAT NULL, 
-                        Volatility VARCHAR(20) NULL, 
-                        Prev_Close FLOAT NULL, 
-                        Price FLOAT NULL,
-                        Change_Price FLOAT NULL);"""
+                        Optionable BOOLEAN NULL,
+                        Shortable BOOLEAN NULL,
+                        Recom DOUBLE NULL,
+                        P_on_E DOUBLE NULL,
+                        Forward_P_on_E DOUBLE NULL,
+                        PEG DOUBLE NULL,
+                        P_on_S DOUBLE NULL,
+                        P_on_B DOUBLE NULL,
+                        P_on_C DOUBLE NULL,
+                        P_on_FCF DOUBLE NULL,
+                        Quick_Ratio DOUBLE NULL,
+                        Current_Ratio DOUBLE NULL,
+                        Debt_on_Eq DOUBLE NULL,
+                        LT_Debt_on_Eq DOUBLE NULL,
+                        SMA20 DOUBLE NULL,
+                        EPS_ttm DOUBLE NULL,
+                        EPS_next_Y DOUBLE NULL,
+                        EPS_next_Q DOUBLE NULL,
+                        EPS_this_Y DOUBLE NULL,
+                        EPS_next_5Y DOUBLE NULL,
+                        EPS_past_5Y DOUBLE NULL,
+                        Sales_past_5Y DOUBLE NULL,
+                        Sales_Q_Q DOUBLE NULL,
+                        EPS_Q_Q DOUBLE NULL,
+                        Earnings VARCHAR(20) NULL,
+                        SMA50 DOUBLE NULL,
+                        Insider_Own DOUBLE NULL,
+                        Insider_Trans DOUBLE NULL,
+                        Inst_Own DOUBLE NULL,
+                        Inst_Trans DOUBLE NULL,
+                        ROA DOUBLE NULL,
+                        ROE DOUBLE NULL,
+                        ROI DOUBLE NULL,
+                        Gross_Margin DOUBLE NULL,
+                        Oper_Margin DOUBLE NULL,
+                        Profit_Margin DOUBLE NULL,
+                        Payout DOUBLE NULL,
+                        SMA200 DOUBLE NULL,
+                        Shs_Outstand DOUBLE NULL,
+                        Shs_Float DOUBLE NULL,
+                        Short_Float DOUBLE NULL,
+                        Short_Ratio DOUBLE NULL,
+                        Target_Price DOUBLE NULL,
+                        _52W_Range_Low DOUBLE NULL,
+                        _52W_Range_High DOUBLE NULL,
+                        _52W_High DOUBLE NULL,
+                        _52W_Low DOUBLE NULL,
+                        RSI_14 DOUBLE NULL,
+                        Rel_Volume DOUBLE NULL,
+                        Avg_Volume DOUBLE NULL,
+                        Volume BIGINT NULL,
+                        Perf_Week DOUBLE NULL,
+                        Perf_Month DOUBLE NULL,
+                        Perf_Quarter DOUBLE NULL,
+                        Perf_Half_Y DOUBLE NULL,
+                        Perf_Year DOUBLE NULL,
+                        Perf_YTD DOUBLE NULL,
+                        Beta DOUBLE NULL,
+                        ATR DOUBLE NULL,
+                        Volatility_Week DOUBLE NULL,
+                        Volatility_Month DOUBLE NULL,
+                        Prev_Close DOUBLE NULL,
+                        Price DOUBLE NULL,
+                        Change_Price DOUBLE NULL);"""
         self.cursor.execute(query)
 
     def insert(self, table_name, data_df: DataFrame) -> None:
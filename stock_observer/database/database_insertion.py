@@ -1,6 +1,7 @@
 from pandas import DataFrame
 from log_setup import get_logger
 from configparser import ConfigParser
+from stock_observer.database.watermark import Watermark_Service
 from stock_observer.database.database_communication import MySQL_Connection
 
 logger = get_logger(__name__)
@@ -20,5 +21,6 @@ class DB_Insertion:
             else:
                 logger.info(f"Update {table_name} table in the database")
                 mysql.insert_df(data_df=data_df, table_name=table_name, primary_key='id', if_exists='append')
+            Watermark_Service.invalidate(table_name=table_name)
         else:
             logger.warning("Database insertion received empty data frame")
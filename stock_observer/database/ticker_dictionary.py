@@ -0,0 +1,64 @@
+import numpy as np
+from typing import Dict
+from pandas import DataFrame, Series
+from log_setup import get_logger
+from configparser import ConfigParser
+from stock_observer.database.database_communication import MySQL_Connection
+
+logger = get_logger(__name__)
+
+# bits of the compact key holding the epoch day, enough for dates up to the year 4840
+EPOCH_DAY_BITS = 20
+
+
+def compact_key(ticker_ids: np.ndarray, dates: np.ndarray) -> np.ndarray:
+    """
+    Pack the ticker dictionary id and the epoch day of the date into one BIGINT: (ticker_id << 20) | epoch_day
+    :param ticker_ids: ticker dictionary id of every row
+    :param dates: date of every row
+    :return: int64 array
+    """
+    epoch_days = np.asarray(dates).astype('datetime64[D]').astype(np.int64)
+    return (np.asarray(ticker_ids, dtype=np.int64) << EPOCH_DAY_BITS) | epoch_days
+
+
+def split_compact_key(keys: np.ndarray):
+    """
+    :param keys: compact keys
+    :return: (ticker ids, dates as datetime64[D])
+    """
+    keys = np.asarray(keys, dtype=np.int64)
+    return keys >> EPOCH_DAY_BITS, (keys & ((1 << EPOCH_DAY_BITS) - 1)).astype('datetime64[D]')
+
+
+class Ticker_Dictionary:
+    """
+    Persistent ticker -> small integer id mapping used by the compact primary key mode.
+    Ids are assigned by the AUTO_INCREMENT column of the ticker dictionary table and never change, so the compact
+    keys stay valid across runs.
+    """
+
+    def __init__(self, config: ConfigParser):
+        self.config = config
+        self.table_name = config['MySQL']['ticker dictionary table name']
+
+    def load(self, mysql: MySQL_Connection) -> Dict[str, int]:
+        mapping_df = mysql.select(f"SELECT ticker, ticker_id FROM {self.table_name};")
+        if mapping_df is None:
+            mysql.create_table(table_name=self.table_name, table_type='ticker_dictionary')
+            return {}
+        return dict(zip(mapping_df['ticker'], mapping_df['ticker_id']))
+
+    def ids(self, tickers: Series) -> np.ndarray:
+        """
+        :param tickers: ticker of every row
+        :return: int64 ticker id of every row, unknown tickers are added to the dictionary first
+        """
+        mysql = MySQL_Connection(config=self.config)
+        mapping = self.load(mysql=mysql)
+        new_tickers = sorted(set(tickers.unique()) - set(mapping))
+        if new_tickers:
+            logger.info(f"Adding {len(new_tickers)} tickers to {self.table_name}")
+            mysql.insert_many(table_name=self.table_name, data_df=DataFrame({'ticker': new_tickers}))
+            mapping = self.load(mysql=mysql)
+        return tickers.map(mapping).to_numpy(dtype=np.int64)
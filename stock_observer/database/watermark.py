@@ -0,0 +1,53 @@
+import threading
+from datetime import date
+from typing import Dict
+from log_setup import get_logger
+from configparser import ConfigParser
+from stock_observer.database.database_communication import MySQL_Connection
+
+logger = get_logger(__name__)
+
+
+class Watermark_Service:
+    """
+    Latest stored date of every ticker per table.
+    Each table is read once with a single GROUP BY query and the result is cached for the whole run and shared by all
+    the pipeline stages. Writers call invalidate() after inserting into a table.
+    """
+    __cache: Dict[str, Dict[str, date]] = {}
+    __lock = threading.Lock()
+
+    def __init__(self, config: ConfigParser):
+        self.config = config
+
+    def latest_dates(self, table_name: str) -> Dict[str, date]:
+        """
+        :param table_name: The name of the SQl table
+        :return: {ticker: latest date}, empty when the table does not exist yet
+        """
+        with self.__lock:
+            if table_name not in self.__cache:
+                mysql = MySQL_Connection(config=self.config)
+                latest_date_df = mysql.select(f"SELECT ticker, max(date) AS date FROM {table_name} GROUP BY ticker;")
+                if latest_date_df is not None:
+                    self.__cache[table_name] = dict(zip(latest_date_df['ticker'], latest_date_df['date']))
+                else:
+                    self.__cache[table_name] = {}
+                logger.info(f"Loaded watermarks of {len(self.__cache[table_name])} tickers from {table_name}")
+            return self.__cache[table_name]
+
+    def latest_date(self, table_name: str, ticker: str, default: date) -> date:
+        return self.latest_dates(table_name).get(ticker, default)
+
+    @classmethod
+    def invalidate(cls, table_name: str) -> None:
+        with cls.__lock:
+            cls.__cache.pop(table_name, None)
+
+    @classmethod
+    def preload(cls, table_name: str, latest: Dict[str, date]) -> None:
+        """
+        Set the watermarks of a table without reading the database, used by offline runs and load tests
+        """
+        with cls.__lock:
+            cls.__cache[table_name] = dict(latest)
@@ -6,6 +6,7 @@ from pandas import DataFrame, read_csv
 import configuration
 from pathlib import Path
 from datetime import date, timedelta, datetime
+from stock_observer.database.watermark import Watermark_Service
 from stock_observer.database.database_communication import MySQL_Connection
 from utils import save_csv
 
@@ -30,6 +31,7 @@ class Decision_Maker:
         self.analysis_table_name = self.config['MySQL']['analysis table name']
         self.decision_table_name = self.config['MySQL']['decision table name']
         self.path = config['Data_Sources']['decision equity price csv']
+        self.watermarks = Watermark_Service(config=config)
 
     def decide(self) -> Tuple[str, str]:
         data_df = self.data_load(day_shift=20)
@@ -68,18 +70,13 @@ class Decision_Maker:
     def data_load(self, day_shift=10) -> DataFrame:
         logger.info("Data loading from analysis database")
         ticker_list = read_csv(self.ticker_list_path)
+        latest_dates = self.watermarks.latest_dates(table_name=self.decision_table_name)
+        mysql = MySQL_Connection(config=self.config)
         data_df = DataFrame()
         for row in ticker_list.iterrows():
             ticker = row[1]['ticker']
-            mysql = MySQL_Connection(config=self.config)
-            latest_date_df = mysql.select(
-                f"SELECT max(date) FROM {self.decision_table_name} WHERE ticker = '{ticker}';")
-
-            if latest_date_df is not None:
-                latest_date_in_db = latest_date_df.iloc[0][0]
-                logger.info(f"{ticker} latest update is {latest_date_in_db}")
-            else:
-                latest_date_in_db = datetime.strptime('2018-12-01', "%Y-%m-%d").date()
+            latest_date_in_db = latest_dates.get(ticker, date(2018, 12, 1))
+            logger.info(f"{ticker} latest update is {latest_date_in_db}")
 
             starting_date = str(latest_date_in_db - timedelta(days=(day_shift + 3)))
             data = mysql.select(f"SELECT * FROM {self.analysis_table_name} "
@@ -314,6 +311,7 @@ class Decision_Maker:
             else:
                 logger.info(f"Update {table_name} table in the database")
                 mysql.insert_df(data_df=data_df, table_name=table_name, primary_key='id', if_exists='append')
+            Watermark_Service.invalidate(table_name=table_name)
         else:
             logger.warning("Database insertion received empty data frame")
 
@@ -0,0 +1,90 @@
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Dict, List
+import pandas as pd
+from pandas import DataFrame
+from log_setup import get_logger
+from configparser import ConfigParser
+from utils import now_str, save_csv, resolve_non_conflicting_file_name
+
+logger = get_logger(__name__)
+
+COMPLETE = '__complete__'
+# tickers with these statuses are not downloaded again when a run is resumed
+COMPLETED_STATUS = ('done', 'empty', 'invalid')
+
+
+class Download_Journal:
+    """
+    Append-only journal of a download run.
+    Every finished ticker appends one line to journal.jsonl and its frame is written next to it as <ticker>.csv, so a
+    crashed or killed run can be resumed: a new run of the same mode on the same day picks up the unfinished journal
+    and only downloads the tickers that are missing or failed.
+    """
+
+    def __init__(self, config: ConfigParser, mode: str):
+        self.root = Path(config['General']['download journal directory'])
+        self.lock = threading.Lock()
+        self.directory = self.unfinished_run(mode=mode)
+        if self.directory is None:
+            self.directory = self.root / resolve_non_conflicting_file_name(f"{mode}_{now_str()}", str(self.root))
+            self.directory.mkdir(parents=True, exist_ok=True)
+        self.path = self.directory / 'journal.jsonl'
+        self.status: Dict[str, str] = {}
+        if self.path.exists():
+            with open(self.path) as file:
+                for line in file:
+                    entry = json.loads(line)
+                    self.status[entry['ticker']] = entry['status']
+            logger.info(f"Resuming download journal {self.directory} with {len(self.completed())} finished tickers")
+
+    def unfinished_run(self, mode: str):
+        """
+        :return: directory of the latest run of the mode started today if it did not complete, otherwise None
+        """
+        today = now_str()[:8]
+        runs = sorted(self.root.glob(f"{mode}_{today}-*")) if self.root.exists() else []
+        if runs:
+            journal = runs[-1] / 'journal.jsonl'
+            if not journal.exists() or COMPLETE not in journal.read_text():
+                return runs[-1]
+        return None
+
+    def completed(self) -> List[str]:
+        return [ticker for ticker, status in self.status.items() if status in COMPLETED_STATUS]
+
+    def record(self, ticker: str, status: str, data_df: DataFrame = None, error: str = None) -> None:
+        """
+        Append the result of a ticker to the journal
+        :param ticker: ticker
+        :param status: done, empty, invalid or failed
+        :param data_df: downloaded frame of the ticker
+        :param error: failure reason
+        """
+        if data_df is not None and not data_df.empty:
+            save_csv(data_df, self.directory / f"{ticker}.csv")
+        entry = {'ticker': ticker, 'status': status, 'rows': 0 if data_df is None else len(data_df), 'error': error}
+        with self.lock:
+            with open(self.path, 'a') as file:
+                file.write(json.dumps(entry) + '\n')
+                file.flush()
+                os.fsync(file.fileno())
+            self.status[ticker] = status
+
+    def frames(self, tickers: List[str]) -> DataFrame:
+        """
+        :param tickers: tickers in output order
+        :return: the journaled frames of the done tickers
+        """
+        records = [pd.read_csv(self.directory / f"{ticker}.csv", parse_dates=['date']) for ticker in tickers
+                   if self.status.get(ticker) == 'done']
+        if not records:
+            return DataFrame()
+        return pd.concat(records, ignore_index=True)
+
+    def close(self) -> None:
+        with self.lock:
+            with open(self.path, 'a') as file:
+                file.write(json.dumps({'ticker': COMPLETE, 'status': 'complete'}) + '\n')
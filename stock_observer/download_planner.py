@@ -0,0 +1,44 @@
+from datetime import date, datetime
+from typing import Dict, List
+from log_setup import get_logger
+from configparser import ConfigParser
+from stock_observer.trading_calendar import last_session, trading_days_between
+
+logger = get_logger(__name__)
+
+
+class Download_Planner:
+    """
+    Choose the Alpha Vantage output size of every ticker from the gap between its watermark and the latest session
+    of the local trading-day calendar: 'full' for tickers without history or with a gap longer than the compact
+    payload, 'compact' for short gaps and 'skip' for tickers that are already current.
+    """
+
+    def __init__(self, config: ConfigParser):
+        self.data_available_hour = int(config['Calendar']['data available hour'])
+        self.compact_max_gap = int(config['Calendar']['compact max gap days'])
+
+    def plan(self, tickers: List[str], latest: Dict[str, date], now: datetime = None) -> Dict[str, str]:
+        """
+        :param tickers: the list of tickers
+        :param latest: {ticker: latest stored date}
+        :param now: local time of the run, defaults to now
+        :return: {ticker: 'full', 'compact' or 'skip'}
+        """
+        session = last_session(now=now or datetime.now(), data_available_hour=self.data_available_hour)
+        plan = {}
+        for ticker in tickers:
+            if ticker not in latest:
+                plan[ticker] = 'full'
+                continue
+            gap = trading_days_between(after=latest[ticker], until=session)
+            if gap == 0:
+                plan[ticker] = 'skip'
+            elif gap <= self.compact_max_gap:
+                plan[ticker] = 'compact'
+            else:
+                plan[ticker] = 'full'
+        counts = {size: list(plan.values()).count(size) for size in ('full', 'compact', 'skip')}
+        logger.info(f"Download plan up to the {session} session: {counts['full']} full, {counts['compact']} compact, "
+                    f"{counts['skip']} already current")
+        return plan
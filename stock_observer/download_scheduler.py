@@ -0,0 +1,91 @@
+import time
+import numpy as np
+from log_setup import get_logger
+from configparser import ConfigParser
+from pandas import DataFrame, Series
+from stock_observer.database.watermark import Watermark_Service
+from stock_observer.database.database_communication import MySQL_Connection
+
+logger = get_logger(__name__)
+
+PRIORITIES = ('alerts', 'volatility', 'tier')
+
+
+class Download_Scheduler:
+    """
+    Order the tickers so the important ones are downloaded, transformed and analyzed first while the API quota lasts.
+    The configured priorities are applied in order: open alerts in the decision table, the latest ATR / close in the
+    main table and the tier column of the ticker list (tier 1 first). Ties go to the stalest ticker of the stage
+    table, then to the ticker list order.
+    """
+
+    def __init__(self, config: ConfigParser):
+        self.config = config
+        self.priorities = [priority.strip() for priority in config['Schedule']['priority'].split(',')
+                           if priority.strip()]
+        unknown = set(self.priorities) - set(PRIORITIES)
+        if unknown:
+            raise ValueError(f"Unknown download priorities {sorted(unknown)}, expected some of {PRIORITIES}")
+        self.tier_column = config['Schedule']['tier column']
+        self.alert_days = int(config['Schedule']['alert lookback days'])
+        self.download_window = float(config['Schedule']['download window minutes']) * 60
+        self.decision_table_name = config['MySQL']['decision table name']
+        self.main_table_name = config['MySQL']['main table name']
+        self.stage_table_name = config['MySQL']['stage table name']
+        self.atr_column = f"ATR_{config['Indicator']['atr period']}"
+        self.watermarks = Watermark_Service(config=config)
+
+    def deadline(self) -> float:
+        """
+        :return: time.monotonic() after which the remaining tickers are deferred to the next run, None without a window
+        """
+        return time.monotonic() + self.download_window if self.download_window > 0 else None
+
+    def order(self, ticker_list: DataFrame) -> DataFrame:
+        """
+        :param ticker_list: the list of tickers, optionally with the tier column
+        :return: the ticker list in download order
+        """
+        tickers = ticker_list['ticker']
+        keys = []
+        for priority in self.priorities:
+            if priority == 'alerts':
+                keys.append(-tickers.map(self.open_alerts()).fillna(0).to_numpy(dtype=np.float64))
+            elif priority == 'volatility':
+                keys.append(-tickers.map(self.volatility()).fillna(0).to_numpy(dtype=np.float64))
+            elif self.tier_column in ticker_list.columns:
+                keys.append(ticker_list[self.tier_column].fillna(np.inf).to_numpy(dtype=np.float64))
+        latest = self.watermarks.latest_dates(table_name=self.stage_table_name)
+        keys.append(np.array([latest[ticker].toordinal() if ticker in latest else 0 for ticker in tickers]))
+        keys.append(np.arange(len(ticker_list)))
+        # np.lexsort sorts by the last key first
+        ordered = ticker_list.iloc[np.lexsort(keys[::-1])]
+        logger.info(f"Download order by {', '.join(self.priorities) or 'staleness'}: "
+                    f"{', '.join(ordered['ticker'].head(10))}{' ...' if len(ordered) > 10 else ''}")
+        return ordered
+
+    def open_alerts(self) -> Series:
+        """
+        :return: number of non zero signals per ticker in the decision table during the last alert lookback days
+        """
+        mysql = MySQL_Connection(config=self.config)
+        decision_df = mysql.select(f"SELECT * FROM {self.decision_table_name} WHERE date >= "
+                                   f"(SELECT max(date) FROM {self.decision_table_name}) - "
+                                   f"INTERVAL {self.alert_days} DAY;")
+        if decision_df is None or decision_df.empty:
+            return Series(dtype=np.float64)
+        signals = decision_df[[column for column in decision_df.columns if column.endswith('_signal')]]
+        return (signals.fillna(0) != 0).sum(axis=1).groupby(decision_df['ticker']).sum()
+
+    def volatility(self) -> Series:
+        """
+        :return: latest ATR / close per ticker of the main table
+        """
+        mysql = MySQL_Connection(config=self.config)
+        volatility_df = mysql.select(f"""SELECT m.ticker, m.{self.atr_column} / m.close AS volatility
+                                         FROM {self.main_table_name} m
+                                         JOIN (SELECT ticker, max(date) AS date FROM {self.main_table_name}
+                                               GROUP BY ticker) l ON m.ticker = l.ticker AND m.date = l.date;""")
+        if volatility_df is None or volatility_df.empty:
+            return Series(dtype=np.float64)
+        return volatility_df.set_index('ticker')['volatility']
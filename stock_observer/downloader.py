@@ -1,252 +1,268 @@
-import yfinance as yf
 from pathlib import Path
 from utils import save_csv
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, date
 from log_setup import get_logger
 from configparser import ConfigParser
+from typing import Dict, List, Union
 from pandas import DataFrame, to_datetime
-import time
 import pandas as pd
-from bs4 import BeautifulSoup as bs
-import requests
-from time import sleep
-from stock_observer.database.database_communication import MySQL_Connection
+import time
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from stock_observer.http_client import HTTP_Client
+from stock_observer.fundamentals import FUNDAMENTAL_METRICS, normalize_fundamentals
+from stock_observer.response_cache import Response_Cache
+from stock_observer.download_planner import Download_Planner
+from stock_observer.download_scheduler import Download_Scheduler
+from stock_observer.download_journal import Download_Journal, COMPLETED_STATUS
+from stock_observer.database.watermark import Watermark_Service
+from stock_observer.database.ticker_dictionary import Ticker_Dictionary, compact_key
+from stock_observer.providers.provider_factory import create_provider
+from stock_observer.providers.market_data_provider import Market_Data_Provider, PRICE_COLUMNS, Throttled_Error, \
+    Invalid_Symbol_Error
 
 logger = get_logger(__name__)
 
 
 class Downloader:
-    def __init__(self, config: ConfigParser):
+    def __init__(self, config: ConfigParser, replay: bool = False):
         self.config = config
         self.stock_price_downloaded_csv_path = Path(config['Data_Sources']['equity price csv'])
         self.fundamentals_downloaded_csv_path = Path(config['Data_Sources']['fundamentals csv'])
         self.stage_table_name = self.config['MySQL']['stage table name']
-        self.alphavantage_api_key = self.config['API']['alphavantage API key']
-        self.marketstack_api_key = self.config['API']['marketstack API key']
+        self.download_workers = int(self.config['API']['download workers'])
+        self.finviz_workers = int(self.config['API']['finviz workers'])
+        self.cci_source = self.config['Indicator']['cci source']
+        self.cci_period = int(self.config['Indicator']['cci period'])
+        self.response_cache = Response_Cache(config=config, replay=replay)
+        self.http_client = HTTP_Client(config=config)
+        self.providers: Dict[str, Market_Data_Provider] = {}
+        self.price_provider = self.provider(self.config['Providers']['price provider'])
+        self.indicator_provider = self.provider(self.config['Providers']['indicator provider'])
+        self.fundamentals_provider = self.provider(self.config['Providers']['fundamentals provider'])
+        self.watermarks = Watermark_Service(config=config)
+        self.ticker_status = {}
+        self.primary_key_mode = self.config['MySQL']['primary key mode']
+        self.ticker_dictionary = Ticker_Dictionary(config=config)
+        self.planner = Download_Planner(config=config)
+        self.scheduler = Download_Scheduler(config=config)
+
+    def provider(self, name: str) -> Market_Data_Provider:
+        """
+        :param name: provider name, data types served by the same provider share one instance and its rate limiter
+        """
+        if name not in self.providers:
+            self.providers[name] = create_provider(name=name, config=self.config, http_client=self.http_client,
+                                                   response_cache=self.response_cache)
+        return self.providers[name]
 
     def stock_price_download(self, ticker_list: DataFrame) -> DataFrame:
-        mysql = MySQL_Connection(config=self.config)
-        test = mysql.select(f"SELECT * FROM {self.stage_table_name} LIMIT 3;")
-        if test is None:
-            data_df = self.bulk_downloader(ticker_list=ticker_list)
+        """
+        Download the prices after each ticker's watermark with the output size chosen by the download planner:
+        new tickers get their full history, tickers with a short gap the compact payload and current tickers are
+        not requested at all. Batched price providers get the pending tickers grouped by watermark instead.
+        Tickers are downloaded in the order of the download scheduler and the ones left when the download window
+        closes are deferred to the next run.
+        :param ticker_list: the list of tickers
+        :return: Dataframe
+        """
+        deadline = self.scheduler.deadline()
+        ticker_list = self.scheduler.order(ticker_list=ticker_list)
+        plan = self.planner.plan(tickers=list(ticker_list['ticker']),
+                                 latest=self.watermarks.latest_dates(table_name=self.stage_table_name))
+        self.ticker_status.update((ticker, 'current') for ticker, size in plan.items() if size == 'skip')
+        pending_list = ticker_list[ticker_list['ticker'].map(plan) != 'skip']
+        if pending_list.empty:
+            logger.info("All tickers are current, nothing to download")
+            return DataFrame()
+        if self.price_provider.batched:
+            data_df = self.batch_downloader(ticker_list=pending_list, table_name=self.stage_table_name)
         else:
-            data_df = self.updates_downloader(ticker_list=ticker_list)
-        if not data_df.empty:
-            data_df = data_df[['id', 'ticker', 'date', 'open', 'high', 'low', 'close', 'volume', 'CCI']]
-        return data_df
-
-    def bulk_downloader(self, ticker_list) -> DataFrame:
-        data_df = self.API_downloader_AV(ticker_list=ticker_list, table_name=self.stage_table_name, output_size='full',
-                                         mode='buk')
+            data_df = self.prices_downloader(ticker_list=pending_list, table_name=self.stage_table_name,
+                                             output_size=plan, mode='update', deadline=deadline)
+        if data_df.empty:
+            logger.warning("No new data received")
+            return DataFrame()
         data_df = self.add_primary_key(data_df)
         logger.info(f"Data size is {data_df.shape}")
+        logger.info(
+            f"Saving downloaded data in csv file at {self.stock_price_downloaded_csv_path}_{datetime.now().date()}_"
+            f"{datetime.now().hour}-{datetime.now().minute}.csv")
         save_csv(data_df, Path(f"{self.stock_price_downloaded_csv_path}_{datetime.now().date()}_"
                                f"{datetime.now().hour}-{datetime.now().minute}.csv"))
-        return data_df
+        cols = ['id', 'ticker', 'date', 'open', 'high', 'low', 'close', 'volume', 'CCI']
+        return data_df[[col for col in cols if col in data_df.columns]]
 
-    def updates_downloader(self, ticker_list):
-        data_df = self.API_downloader_AV(ticker_list=ticker_list, table_name=self.stage_table_name,
-                                         output_size='compact', mode='update')
-        if not data_df.empty:
-            data_df = self.add_primary_key(data_df)
-            logger.info(f"Data size is {data_df.shape}")
-            logger.info(
-                f"Saving downloaded data in csv file at {self.stock_price_downloaded_csv_path}_{datetime.now().date()}_"
-                f"{datetime.now().hour}-{datetime.now().minute}.csv")
-            save_csv(data_df, Path(f"{self.stock_price_downloaded_csv_path}_{datetime.now().date()}_"
-                                   f"{datetime.now().hour}-{datetime.now().minute}.csv"))
-            return data_df
-        else:
-            logger.warning("No new data received")
-            return DataFrame()
-
-    def API_downloader_AV(self, ticker_list: list, table_name: str, output_size: str, mode: str) -> DataFrame:
+    def prices_downloader(self, ticker_list: DataFrame, table_name: str, output_size: Union[str, Dict[str, str]],
+                          mode: str, deadline: float = None) -> DataFrame:
         """
-        This function is responsible for check the database for each ticker and get the updates from Quandl
-        :param output_size:
-        :param mode:
+        This function is responsible for check the database for each ticker and get the updates from the price
+        provider. Tickers are downloaded concurrently by a thread pool and every request takes a token from the
+        shared limiter of the provider, so the workers keep as many requests in flight as the API key quota allows.
+        Each finished ticker is written to the download journal, a run that crashed is resumed from it and only
+        the missing or failed tickers are downloaded again.
+        Throttled requests go back to the adaptive limiter, which has lowered its rate, until the ticker succeeds or
+        runs out of the throttle retries of the provider. Unknown symbols are journaled as invalid and not retried.
+        :param output_size: 'full' or 'compact' for all the tickers, or {ticker: output size}
+        :param mode: 'update' keeps only the rows after each ticker's watermark
+        :param deadline: time.monotonic() after which the tickers not started yet are deferred, they stay pending in
+                         the journal
         :param ticker_list: the list of tickers
         :param table_name: The name of the SQl table
         :return: Dataframe
         """
-        try:
-            data_df = DataFrame()
-            for index, item in ticker_list.iterrows():
-                ticker = item['ticker']
-
-                price = self.price_API_AV(ticker=ticker, output_size=output_size)
-                cci = self.cci_indicators_API_AV(ticker=ticker)
-                record = price.merge(cci, on=['ticker', 'date'], how='inner')
-
-                if not record.empty:
-                    record['date'] = record['date'].map(lambda x: datetime.strptime(x, "%Y-%m-%d").date())
-                    if mode == 'update':
-                        mysql = MySQL_Connection(config=self.config)
-                        latest_date_df = mysql.select(
-                            f"""select max(date) from {table_name} where ticker = '{ticker}';""")
-                        if latest_date_df is not None:
-                            latest_date_in_db = latest_date_df.iloc[0][0]
-                            logger.info(f"{ticker} latest update is {latest_date_in_db}")
-                        else:
-                            latest_date_in_db = datetime.strptime('2000-01-01', "%Y-%m-%d").date()
+        journal = Download_Journal(config=self.config, mode=mode)
+        tickers = list(ticker_list['ticker'])
+        completed = set(journal.completed())
+        pending = [ticker for ticker in tickers if ticker not in completed]
+        if completed:
+            logger.info(f"{len(tickers) - len(pending)} tickers already downloaded, {len(pending)} remaining")
 
-                        record = record[record['date'] > latest_date_in_db]
-                    data_df = data_df.append(record)
-                else:
-                    logger.warning(f"{ticker}: No data found for this date range, symbol may be delisted")
-                time.sleep(30)
-            return data_df
-
-        except Exception as e:
-            logger.error("API downloader error")
-            logger.error(e)
+        def download(ticker: str) -> None:
+            if deadline is not None and time.monotonic() > deadline:
+                self.ticker_status[ticker] = 'deferred'
+                return
+            try:
+                throttle_retries = self.price_provider.throttle_retries
+                for attempt in range(throttle_retries + 1):
+                    try:
+                        record = self.ticker_downloader(
+                            ticker=ticker, table_name=table_name, mode=mode,
+                            output_size=output_size[ticker] if isinstance(output_size, dict) else output_size)
+                        break
+                    except Throttled_Error:
+                        self.price_provider.on_throttle()
+                        if attempt == throttle_retries:
+                            raise
+                        logger.info(f"{ticker}: throttled, retry {attempt + 1} of {throttle_retries}")
+                journal.record(ticker=ticker, status='done' if not record.empty else 'empty', data_df=record)
+            except Invalid_Symbol_Error as e:
+                logger.warning(f"{ticker}: {e}")
+                journal.record(ticker=ticker, status='invalid', error=str(e))
+            except Exception as e:
+                logger.error(f"{ticker}: API downloader error")
+                logger.error(e)
+                journal.record(ticker=ticker, status='failed', error=str(e))
 
-    def price_API_AV(self, ticker: str, output_size: str, period: int = 30):
-        logger.info(f"Retrieving data for {ticker}")
-        # Extract data from quandl REST API
-        controller = f'https://www.alphavantage.co/query?function=TIME_SERIES_DAILY&symbol={ticker}' \
-                     f'&outputsize={output_size}&apikey={self.alphavantage_api_key}'
-        response = requests.get(controller)
-        response_dict = response.json()
-        record = DataFrame.from_dict(response_dict['Time Series (Daily)'], orient='index')
-        record['ticker'] = ticker
-        record.reset_index(level=0, inplace=True)
+        with ThreadPoolExecutor(max_workers=self.download_workers) as executor:
+            list(executor.map(download, pending))
 
-        cols = list(record.columns)
-        cols = [cols[-1]] + cols[:-1]
-        record = record[cols]
-        record = record.rename(columns={'index': 'date', '1. open': 'open', '3. low': 'low',
-                                        '2. high': 'high', '4. close': 'close', '5. volume': 'volume'})
-        return record
+        self.ticker_status.update((ticker, journal.status[ticker]) for ticker in tickers if ticker in journal.status)
+        deferred = [ticker for ticker in tickers if self.ticker_status.get(ticker) == 'deferred']
+        if deferred:
+            logger.warning(f"Download window closed, {len(deferred)} tickers deferred to the next run")
+        if all(journal.status.get(ticker) in COMPLETED_STATUS for ticker in tickers):
+            journal.close()
+        else:
+            logger.warning(f"Download journal {journal.directory} is left open, the next run resumes from it")
+        return journal.frames(tickers=tickers)
 
-    def cci_indicators_API_AV(self, ticker: str, interval: str = 'daily', period: int = 30):
-        logger.info(f"Retrieving cci indicator for {ticker}")
-        # Extract data from quandl REST API
-        controller = f'https://www.alphavantage.co/query?function=CCI&symbol={ticker}&interval={interval}' \
-                     f'&time_period={period}&apikey={self.alphavantage_api_key}'
-        response = requests.get(controller)
-        response_dict = response.json()
-        record = DataFrame.from_dict(response_dict['Technical Analysis: CCI'], orient='index')
-        record['ticker'] = ticker
-        record.reset_index(level=0, inplace=True)
+    def ticker_downloader(self, ticker: str, table_name: str, output_size: str, mode: str) -> DataFrame:
+        record = self.price_provider.ticker_prices(ticker=ticker, output_size=output_size)
+        if self.cci_source == 'api':
+            cci = self.indicator_provider.indicator(ticker=ticker, indicator='CCI', period=self.cci_period)
+            record = record.merge(cci, on=['ticker', 'date'], how='inner')
 
-        cols = list(record.columns)
-        cols = [cols[-1]] + cols[:-1]
-        record = record[cols]
-        record = record.rename(columns={'index': 'date'})
-        if record.empty:
-            logger.warning(f"{ticker}: No indicator found")
+        if not record.empty:
+            if mode == 'update':
+                latest_date_in_db = self.watermarks.latest_date(table_name=table_name, ticker=ticker, default=None)
+                if latest_date_in_db is not None:
+                    logger.info(f"{ticker} latest update is {latest_date_in_db}")
+                    record = record[record['date'] > np.datetime64(latest_date_in_db)]
+        else:
+            logger.warning(f"{ticker}: No data found for this date range, symbol may be delisted")
         return record
 
-    def API_downloader_MS(self, ticker_list: list, table_name: str) -> DataFrame:
+    def batch_downloader(self, ticker_list: DataFrame, table_name: str) -> DataFrame:
         """
-        This function is responsible for check the database for each ticker and get the updates from Quandl
+        Download the prices after each ticker's own watermark from a batched price provider.
+        Tickers sharing the same watermark are requested together in one batch_prices call.
         :param ticker_list: the list of tickers
         :param table_name: The name of the SQl table
-        :return: Dataframe
+        :return: Dataframe with datetime64 date, float64 prices and integer volume
         """
-        try:
-            data_df = DataFrame()
-            for index, item in ticker_list.iterrows():
-                ticker = item['ticker']
-                logger.info(f"Retrieving data for {ticker}")
-                # Extract data from quandl REST API
-                controller = f'http://api.marketstack.com/v1/eod?access_key={self.marketstack_api_key}' \
-                             f'&symbols={ticker}' \
-                             f'&date_from=2000-01-01' \
-                             f'&date_to={datetime.today().date()}'
-                response = requests.get(controller)
-                response_dict = response.json()
-                updates = response_dict['data']
-                record = DataFrame(updates)
-                if not record.empty:
-                    record['date'] = record['date'].map(lambda x: datetime.strptime(x, "%Y-%m-%dT%H:%M:%S+%f").date())
-                    record.reset_index(level=0, inplace=True, drop=True)
-                    record = record.rename(columns={'symbol': 'ticker'})
-                    cols = ['ticker', 'date', 'open', 'high', 'low', 'close', 'volume']
-                    record = record[cols]
-                    data_df = data_df.append(record)
-                else:
-                    logger.warning(f"{ticker}: No data found for this date range, symbol may be delisted")
+        latest = self.watermarks.latest_dates(table_name=table_name)
+        groups: Dict[date, List[str]] = {}
+        for ticker in ticker_list['ticker']:
+            groups.setdefault(latest.get(ticker, date(1999, 12, 31)), []).append(ticker)
 
-            mysql = MySQL_Connection(config=self.config)
-            latest_data_df = mysql.select(f"""select max(date) from {table_name};""")
-
-            if latest_data_df is not None:
-                latest_date_in_db = latest_data_df.date[0]
-            else:
-                latest_date_in_db = datetime.strptime('2000-01-01', "%Y-%m-%d").date()
+        records = []
+        for latest_date_in_db, tickers in sorted(groups.items()):
+            try:
+                records.append(self.price_provider.batch_prices(tickers=tickers,
+                                                                date_from=latest_date_in_db + timedelta(days=1)))
+            except Exception as e:
+                logger.error(f"{','.join(tickers)}: API downloader error")
+                logger.error(e)
+                self.ticker_status.update((ticker, 'failed') for ticker in tickers)
 
-            data_df = data_df[data_df['date'] > latest_date_in_db]
+        data_df = pd.concat(records, ignore_index=True) if records else DataFrame(columns=PRICE_COLUMNS)
+        # the date range of a batch already starts after the watermark, this also drops anything the API adds
+        data_df = data_df[data_df['date'] > to_datetime(data_df['ticker'].map(latest).fillna(date(1999, 12, 31)))]
+        data_df = data_df.sort_values(by=['ticker', 'date'], ignore_index=True)
+        received = set(data_df['ticker'])
+        for ticker in ticker_list['ticker']:
+            if self.ticker_status.get(ticker) != 'failed':
+                self.ticker_status[ticker] = 'done' if ticker in received else 'empty'
+                if ticker not in received:
+                    logger.warning(f"{ticker}: No data found for this date range, symbol may be delisted")
+        return data_df
 
-            return data_df
-        except Exception as e:
-            logger.error("API downloader error")
-            logger.error(e)
+    def provider_report(self) -> Dict[str, str]:
+        """
+        :return: {provider: usage summary, e.g. throttle retries, rate limit wait and the learned rate}
+        """
+        return {name: provider.report() for name, provider in self.providers.items() if provider.report()}
 
-    @staticmethod
-    def add_primary_key(data: DataFrame) -> DataFrame:
-        data_df = data.copy()
+    def add_primary_key(self, data: DataFrame) -> DataFrame:
+        """
+        Add the id column in front of the frame: the 'ticker-YYYY-MM-DD' string or, in compact primary key mode, the
+        BIGINT packing the ticker dictionary id with the epoch day
+        :param data: downloaded prices
+        :return: Dataframe
+        """
         logger.info("Adding primary key")
-        data_df['date'] = to_datetime(data_df['date'])
-        data_df['date'] = data_df['date'].map(lambda x: x.date())
-        data_df['date_str'] = data_df['date'].map(lambda x: str(x))
-        data_df['id'] = data_df['ticker'] + "-" + data_df['date_str']
-        cols = list(data_df.columns)
-        cols = [cols[-1]] + cols[:-1]
-        data_df = data_df[cols]
-        data_df.drop(columns='date_str', inplace=True)
+        dates = to_datetime(data['date']).to_numpy().astype('datetime64[D]')
+        if self.primary_key_mode == 'compact':
+            ids = compact_key(ticker_ids=self.ticker_dictionary.ids(data['ticker']), dates=dates)
+        else:
+            ids = data['ticker'] + '-' + dates.astype(str)
+        data_df = data.assign(date=dates)
+        data_df.insert(0, 'id', ids)
         return data_df
 
-    # functions to get and parse data from FinViz
+    # functions to get and parse the fundamentals
     def fundamentals_download(self, ticker_list: DataFrame) -> DataFrame:
-        metric = ['Index', 'Market Cap', 'Income', 'Sales', 'Book/sh', 'Cash/sh', 'Dividend', 'Dividend %',
-                  'Employees', 'Optionable', 'Shortable', 'Recom', 'P/E', 'Forward P/E', 'PEG', 'P/S', 'P/B', 'P/C',
-                  'P/FCF', 'Quick Ratio', 'Current Ratio', 'Debt/Eq', 'LT Debt/Eq', 'SMA20', 'EPS (ttm)', 'EPS next Y',
-                  'EPS next Q', 'EPS this Y', 'EPS next 5Y', 'EPS past 5Y', 'Sales past 5Y', 'Sales Q/Q', 'EPS Q/Q',
-                  'Earnings', 'SMA50', 'Insider Own', 'Insider Trans', 'Inst Own', 'Inst Trans', 'ROA', 'ROE', 'ROI',
-                  'Gross Margin', 'Oper. Margin', 'Profit Margin', 'Payout', 'SMA200', 'Shs Outstand', 'Shs Float',
-                  'Short Float', 'Short Ratio', 'Target Price', '52W Range', '52W High', '52W Low', 'RSI (14)',
-                  'Rel Volume', 'Avg Volume', 'Volume', 'Perf Week', 'Perf Month', 'Perf Quarter', 'Perf Half Y',
-                  'Perf Year', 'Perf YTD', 'Beta', 'ATR', 'Volatility', 'Prev Close', 'Price', 'Change']
-        data_df = pd.DataFrame(columns=metric)
-        data_df = self.get_fundamental_data(data_df, ticker_list)
+        data_df = self.get_fundamental_data(ticker_list)
         save_csv(data_df, Path(f"{self.fundamentals_downloaded_csv_path}_{datetime.now().date()}_"
                                f"{datetime.now().hour}-{datetime.now().minute}.csv"))
         return data_df
 
-    @staticmethod
-    def fundamental_metric(soup, metric):
-        return soup.find(text=metric).find_next(class_='snapshot-td2').text
-
-    def get_fundamental_data(self, data_df, ticker_list):
-        for index, item in ticker_list.iterrows():
-            symbol = item['ticker']
-            logger.info(f"Downloading {symbol} information.")
-            try:
-                url = "http://finviz.com/quote.ashx?t=" + symbol.lower()
-                headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 6.1; WOW64; rv:20.0) Gecko/20100101 Firefox/20.0'}
-                soup = bs(requests.get(url, headers=headers).content, "lxml")
-                for m in data_df.columns:
-                    data_df.loc[symbol, m] = self.fundamental_metric(soup, m)
-            except Exception as e:
-                logger.warning(symbol, 'not found')
-                logger.warning(e)
-            sleep(10)
-
-        for index, item in ticker_list.iterrows():
-            symbol = item['ticker']
-            data_df.loc[symbol, 'date'] = datetime.now().date()
-        cols = list(data_df.columns)
-        cols = [cols[-1]] + cols[:-1]
-        data_df = data_df[cols]
+    def ticker_fundamentals(self, symbol: str) -> dict:
+        logger.info(f"Downloading {symbol} information.")
+        row = {'ticker': symbol, 'date': datetime.now().date()}
+        try:
+            snapshot = self.fundamentals_provider.fundamentals(ticker=symbol)
+            if not snapshot:
+                logger.warning(f"{symbol} not found")
+            row.update((metric, snapshot.get(metric)) for metric in FUNDAMENTAL_METRICS)
+        except Exception as e:
+            logger.warning(f"{symbol} not found")
+            logger.warning(e)
+        return row
 
-        data_df['ticker'] = data_df.index
-        cols = list(data_df.columns)
-        cols = [cols[-1]] + cols[:-1]
-        data_df = data_df[cols]
-        data_df.reset_index(drop=True, inplace=True)
+    def get_fundamental_data(self, ticker_list: DataFrame) -> DataFrame:
+        """
+        Download the fundamentals concurrently under the rate limit of the fundamentals provider and build the
+        fundamentals frame from one row per ticker
+        :param ticker_list: the list of tickers
+        :return: Dataframe
+        """
+        with ThreadPoolExecutor(max_workers=self.finviz_workers) as executor:
+            rows = list(executor.map(self.ticker_fundamentals, ticker_list['ticker']))
+        data_df = DataFrame(rows, columns=['ticker', 'date'] + FUNDAMENTAL_METRICS)
         data_df = self.fundamental_rename(data_df)
+        data_df = normalize_fundamentals(data_df)
         return data_df
 
     @staticmethod
@@ -0,0 +1,111 @@
+import numpy as np
+from datetime import date
+from typing import Dict, List
+from pandas import DataFrame, CategoricalDtype, factorize
+from pandas.api.types import is_integer_dtype
+from log_setup import get_logger
+from configparser import ConfigParser
+from stock_observer.database.ticker_dictionary import compact_key
+
+logger = get_logger(__name__)
+
+EPOCH = date(1970, 1, 1)
+
+
+def epoch_day(day: date) -> int:
+    return (day - EPOCH).days
+
+
+def is_compact(data_df: DataFrame) -> bool:
+    return 'date' in data_df.columns and is_integer_dtype(data_df['date'].dtype)
+
+
+class Frame_Layout:
+    """
+    Opt-in compact in-memory layout of the stage, main and analysis frames, `[General] compact frames`.
+    Tickers are categorical, dates int32 days since 1970-01-01, the features of `[Indicator] float32 features`
+    float32 and the *_signal columns int8. The 'ticker-YYYY-MM-DD' string id is replaced by an int64 key of the
+    ticker code and the epoch day, it only joins rows and is rebuilt from the ticker and the date by expand(). The
+    BIGINT id of the compact primary key mode is kept as it is.
+    Prices and the price scaled features (moving averages, ATR, bands) stay float64, their 3 decimals do not fit the
+    7 significant digits of float32. The frames are expanded back to the table layout before they are written.
+    """
+
+    def __init__(self, config: ConfigParser):
+        self.compact = config['General']['compact frames'] == 'true'
+        self.primary_key_mode = config['MySQL']['primary key mode']
+        self.float32_features = [feature.strip() for feature in config['Indicator']['float32 features'].split(',')]
+
+    def compact_frame(self, data_df: DataFrame) -> DataFrame:
+        """
+        Convert the columns in place, one at a time, so that the frame is never copied as a whole.
+        Calling it again after new columns are added converts only those.
+        :param data_df: frame in table or compact layout
+        :return: the same frame in compact layout, unchanged when compact frames are off
+        """
+        if not self.compact or data_df.empty:
+            return data_df
+        if not isinstance(data_df['ticker'].dtype, CategoricalDtype):
+            data_df['ticker'] = data_df['ticker'].astype('category')
+        if not is_compact(data_df):
+            # the python dates repeat across tickers, only the distinct ones are converted
+            codes, days = factorize(data_df['date'])
+            data_df['date'] = np.asarray(days, dtype='datetime64[D]').astype(np.int32)[codes]
+        if 'id' in data_df.columns and not is_integer_dtype(data_df['id'].dtype):
+            data_df['id'] = compact_key(ticker_ids=data_df['ticker'].cat.codes.to_numpy(),
+                                        dates=data_df['date'].to_numpy().astype('datetime64[D]'))
+        for column in self.float32_columns(data_df):
+            data_df[column] = data_df[column].astype(np.float32)
+        for column in self.signal_columns(data_df):
+            data_df[column] = data_df[column].astype(np.int8)
+        return data_df
+
+    def expand(self, data_df: DataFrame) -> DataFrame:
+        """
+        Convert the columns in place, like compact_frame, the compact frame is not needed once it is expanded
+        :param data_df: frame in table or compact layout
+        :return: the same frame in table layout, object tickers and ids, python dates and float64 features
+        """
+        if not is_compact(data_df):
+            return data_df
+        # one date object and one date string per distinct day, shared by the rows
+        days, codes = np.unique(data_df['date'].to_numpy(), return_inverse=True)
+        days = days.astype('datetime64[D]')
+        data_df['ticker'] = data_df['ticker'].astype(object)
+        if 'id' in data_df.columns and self.primary_key_mode == 'string':
+            day_strings = days.astype(str).astype(object)[codes]
+            data_df['id'] = np.array([f"{ticker}-{day}" for ticker, day in zip(data_df['ticker'], day_strings)],
+                                     dtype=object)
+        data_df['date'] = days.astype(object)[codes]
+        for column in data_df.columns[data_df.dtypes == np.float32]:
+            data_df[column] = data_df[column].astype(np.float64)
+        return data_df
+
+    def float32_columns(self, data_df: DataFrame) -> List[str]:
+        return [column for column in self.float32_features
+                if column in data_df.columns and data_df[column].dtype == np.float64]
+
+    @staticmethod
+    def signal_columns(data_df: DataFrame) -> List[str]:
+        # a signal column with missing values stays float until they are dropped
+        return [column for column in data_df.columns if column.endswith('_signal')
+                and data_df[column].dtype != np.int8 and not data_df[column].isna().any()]
+
+    @staticmethod
+    def ticker_lookup(data_df: DataFrame, values: Dict[str, object], default: object) -> np.ndarray:
+        """
+        Map the categorical tickers of a compact frame through values per category instead of per row
+        :return: values[ticker] of every row, default for the tickers not in values
+        """
+        tickers = data_df['ticker'].cat
+        per_category = np.array([values.get(ticker, default) for ticker in tickers.categories] + [default])
+        return per_category[tickers.codes.to_numpy()]
+
+    @staticmethod
+    def round(data_df: DataFrame, decimals: int) -> DataFrame:
+        """
+        Round the float columns one at a time instead of copying the whole frame with DataFrame.round
+        """
+        for column in data_df.columns[data_df.dtypes == np.float64]:
+            data_df[column] = data_df[column].round(decimals)
+        return data_df
@@ -0,0 +1,80 @@
+from typing import Dict
+from pandas import DataFrame, Series, to_numeric
+from bs4 import BeautifulSoup as bs, SoupStrainer
+from log_setup import get_logger
+
+logger = get_logger(__name__)
+
+# FinViz snapshot table metrics in the column order of the fundamentals table
+FUNDAMENTAL_METRICS = ['Index', 'Market Cap', 'Income', 'Sales', 'Book/sh', 'Cash/sh', 'Dividend', 'Dividend %',
+                       'Employees', 'Optionable', 'Shortable', 'Recom', 'P/E', 'Forward P/E', 'PEG', 'P/S', 'P/B',
+                       'P/C', 'P/FCF', 'Quick Ratio', 'Current Ratio', 'Debt/Eq', 'LT Debt/Eq', 'SMA20', 'EPS (ttm)',
+                       'EPS next Y', 'EPS next Q', 'EPS this Y', 'EPS next 5Y', 'EPS past 5Y', 'Sales past 5Y',
+                       'Sales Q/Q', 'EPS Q/Q', 'Earnings', 'SMA50', 'Insider Own', 'Insider Trans', 'Inst Own',
+                       'Inst Trans', 'ROA', 'ROE', 'ROI', 'Gross Margin', 'Oper. Margin', 'Profit Margin', 'Payout',
+                       'SMA200', 'Shs Outstand', 'Shs Float', 'Short Float', 'Short Ratio', 'Target Price',
+                       '52W Range', '52W High', '52W Low', 'RSI (14)', 'Rel Volume', 'Avg Volume', 'Volume',
+                       'Perf Week', 'Perf Month', 'Perf Quarter', 'Perf Half Y', 'Perf Year', 'Perf YTD', 'Beta',
+                       'ATR', 'Volatility', 'Prev Close', 'Price', 'Change']
+
+SNAPSHOT_TABLE = SoupStrainer('table', class_='snapshot-table2')
+
+
+def parse_snapshot_table(html: bytes) -> Dict[str, str]:
+    """
+    Parse the FinViz quote page snapshot table in a single pass.
+    Only the snapshot table is built into a tree and its cells alternate between metric name and value.
+    :param html: quote page
+    :return: {metric: value}, empty when the page has no snapshot table
+    """
+    soup = bs(html, 'lxml', parse_only=SNAPSHOT_TABLE)
+    cells = [cell.get_text() for cell in soup.find_all('td')]
+    return dict(zip(cells[0::2], cells[1::2]))
+
+
+SUFFIX_MULTIPLIERS = {'K': 1e3, 'M': 1e6, 'B': 1e9, 'T': 1e12}
+
+# columns that are not plain numbers, every other fundamentals column is a float64 number
+TEXT_COLUMNS = ['Market_Index', 'Earnings']
+INTEGER_COLUMNS = ['Employees', 'Volume']
+BOOLEAN_COLUMNS = ['Optionable', 'Shortable']
+# columns holding two numbers, split into the two named columns
+PAIR_COLUMNS = {'_52W_Range': ['_52W_Range_Low', '_52W_Range_High'],
+                'Volatility': ['Volatility_Week', 'Volatility_Month']}
+
+
+def to_number(values: Series) -> Series:
+    """
+    Vectorized conversion of FinViz values like '1,234', '1.2B', '3.4%' or '-' to float64.
+    Percentages keep their percent points (3.4% -> 3.4) and missing markers become NaN.
+    """
+    text = values.astype(str).str.strip().str.replace(',', '', regex=False)
+    parts = text.str.extract(r'^([-+]?\d*\.?\d+)([KMBT]?)%?$')
+    multiplier = parts[1].map(SUFFIX_MULTIPLIERS).fillna(1)
+    return to_numeric(parts[0], errors='coerce') * multiplier
+
+
+def normalize_fundamentals(data_df: DataFrame) -> DataFrame:
+    """
+    Convert the raw FinViz text of the renamed fundamentals columns to typed columns: float64 numbers, nullable
+    Int64 counts, nullable boolean flags and the two numbers of ranges split into their own columns
+    :param data_df: fundamentals with raw text values
+    :return: Dataframe
+    """
+    logger.info("Normalizing fundamentals")
+    columns = {}
+    for column in data_df.columns:
+        values = data_df[column]
+        if column in ['ticker', 'date'] + TEXT_COLUMNS:
+            columns[column] = values.where(values != '-')
+        elif column in INTEGER_COLUMNS:
+            columns[column] = to_number(values).round().astype('Int64')
+        elif column in BOOLEAN_COLUMNS:
+            columns[column] = values.map({'Yes': True, 'No': False}).astype('boolean')
+        elif column in PAIR_COLUMNS:
+            pair = values.astype(str).str.extract(r'^\s*(\S+?)\s*(?:-\s+|\s+)(\S+)\s*$')
+            for i, name in enumerate(PAIR_COLUMNS[column]):
+                columns[name] = to_number(pair[i])
+        else:
+            columns[column] = to_number(values)
+    return DataFrame(columns, index=data_df.index)
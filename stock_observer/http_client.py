@@ -0,0 +1,118 @@
+import time
+import random
+import threading
+import requests
+import numpy as np
+from typing import Dict
+from urllib.parse import urlparse
+from collections import defaultdict
+from log_setup import get_logger
+from configparser import ConfigParser
+from requests.adapters import HTTPAdapter
+
+logger = get_logger(__name__)
+
+# server errors and throttle responses that are worth another try
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+class HTTP_Client:
+    """
+    Shared HTTP layer of the Downloader.
+    Each host gets its own pooled session so connections are kept alive between requests, the number of concurrent
+    requests per host is capped, failed requests are retried with jittered exponential backoff and the latency of
+    every request is recorded per host.
+    """
+
+    def __init__(self, config: ConfigParser):
+        self.config = config
+        self.timeout = float(config['HTTP']['timeout seconds'])
+        self.max_retries = int(config['HTTP']['max retries'])
+        self.backoff = float(config['HTTP']['backoff seconds'])
+        self.max_connections = int(config['HTTP']['max connections per host'])
+        self.lock = threading.Lock()
+        self.sessions: Dict[str, requests.Session] = {}
+        self.semaphores: Dict[str, threading.BoundedSemaphore] = {}
+        self.latencies = defaultdict(list)
+        self.retries = defaultdict(int)
+
+    def session(self, host: str) -> requests.Session:
+        with self.lock:
+            if host not in self.sessions:
+                max_connections = int(self.config['HTTP'].get(f'{host} max connections', self.max_connections))
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_connections)
+                session = requests.Session()
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                self.sessions[host] = session
+                self.semaphores[host] = threading.BoundedSemaphore(max_connections)
+            return self.sessions[host]
+
+    def get(self, url: str, params: dict = None, headers: dict = None) -> requests.Response:
+        """
+        GET the url through the pooled session of its host
+        :param url: request url
+        :param params: query parameters
+        :param headers: request headers
+        :return: response, raises requests.HTTPError when the last attempt still fails
+        """
+        host = urlparse(url).netloc
+        session = self.session(host)
+        for attempt in range(self.max_retries + 1):
+            response = None
+            with self.semaphores[host]:
+                connections = self.connection_count(session, url)
+                start = time.perf_counter()
+                try:
+                    response = session.get(url, params=params, headers=headers, timeout=self.timeout)
+                except (requests.ConnectionError, requests.Timeout) as e:
+                    error = e
+                latency = time.perf_counter() - start
+            with self.lock:
+                self.latencies[host].append((latency, self.connection_count(session, url) > connections))
+            if response is not None and response.status_code not in RETRY_STATUS:
+                break
+            if attempt == self.max_retries:
+                if response is None:
+                    raise error
+                break
+            with self.lock:
+                self.retries[host] += 1
+            delay = random.uniform(0, self.backoff * 2 ** attempt)
+            if response is not None and response.headers.get('Retry-After', '').isdigit():
+                delay = max(delay, float(response.headers['Retry-After']))
+            logger.warning(f"{host} request failed ({response.status_code if response is not None else error}), "
+                           f"retry {attempt + 1} of {self.max_retries} in {delay:.1f}s")
+            time.sleep(delay)
+        response.raise_for_status()
+        return response
+
+    @staticmethod
+    def connection_count(session: requests.Session, url: str) -> int:
+        """
+        Number of connections the session has opened so far for the url, used to tell the requests that paid a
+        new TCP+TLS handshake apart from the ones served on a kept alive connection
+        """
+        pools = session.get_adapter(url).poolmanager.pools
+        return sum(pools[key].num_connections for key in pools.keys())
+
+    def latency_report(self) -> Dict[str, str]:
+        """
+        Summarize the recorded latencies per host. Requests that had to open a new connection are reported apart
+        from the ones that reused a kept alive connection to show the handshake cost.
+        :return: {host: summary}
+        """
+        report = {}
+        with self.lock:
+            for host, records in self.latencies.items():
+                latency = np.array([record[0] for record in records]) * 1000
+                new_connection = np.array([record[1] for record in records])
+                summary = f"{len(latency)} requests, {self.retries[host]} retries, " \
+                          f"p50 {np.percentile(latency, 50):.0f}ms, p95 {np.percentile(latency, 95):.0f}ms, " \
+                          f"p99 {np.percentile(latency, 99):.0f}ms, max {latency.max():.0f}ms"
+                if new_connection.any():
+                    summary += f", new connection mean {latency[new_connection].mean():.0f}ms"
+                if (~new_connection).any():
+                    summary += f", reused connection mean {latency[~new_connection].mean():.0f}ms"
+                report[host] = summary
+        return report
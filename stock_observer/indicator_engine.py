@@ -0,0 +1,109 @@
+import numpy as np
+from typing import Dict, List
+from itertools import repeat
+from concurrent.futures import ProcessPoolExecutor
+from pandas import DataFrame, CategoricalDtype
+from log_setup import get_logger
+from configparser import ConfigParser
+from stock_observer.kernels import segment_positions
+from stock_observer.indicator_registry import indicator_registry, producers, resolve
+
+logger = get_logger(__name__)
+
+# price columns a shard carries, next to the int32 ticker code
+SHARD_COLUMNS = ['open', 'high', 'low', 'close']
+
+
+def indicator_arrays(bars: Dict[str, np.ndarray], parameters: Dict[str, object]) -> Dict[str, np.ndarray]:
+    """
+    Indicators of bars sorted by (ticker, date). Module level, so that the workers of a process pool can run it.
+    :param bars: int32 'ticker' code and float64 open, high, low and close arrays
+    :param parameters: see Indicator_Engine.parameters
+    :return: {feature: float64 array} of the computed features
+    """
+    positions = segment_positions(bars['ticker'])
+    arrays = dict(bars)
+    for indicator in resolve(registry=indicator_registry(parameters), features=parameters['computed features'],
+                             available=set(bars)):
+        arrays.update(indicator.kernel(arrays, positions))
+    return {feature: arrays[feature] for feature in parameters['computed features']}
+
+
+def shard_bounds(ticker_codes: np.ndarray, shards: int) -> List[int]:
+    """
+    Row bounds of shards of about the same number of rows that never split a ticker
+    :param ticker_codes: ticker code of every row, sorted
+    :return: [0, ..., len(ticker_codes)]
+    """
+    starts = np.flatnonzero(np.r_[True, ticker_codes[1:] != ticker_codes[:-1]])
+    targets = np.linspace(0, len(ticker_codes), shards + 1)[1:-1]
+    inner = starts[np.minimum(np.searchsorted(starts, targets), len(starts) - 1)]
+    return sorted(set([0] + [int(bound) for bound in inner if bound > 0] + [len(ticker_codes)]))
+
+
+class Indicator_Engine:
+    """
+    Computes the features of the main table, `[Indicator] features`, in one pass.
+    The frame is sorted once by (ticker, date), after that every ticker is a contiguous segment and the indicators
+    are NumPy kernels over the flat columns, windows never reach into the previous ticker and no merge is needed.
+    Only the indicators the features depend on are run, in dependency order, see indicator_registry. Features no
+    indicator produces, like the CCI downloaded into the stage table, are taken from the frame as they are.
+    With more than one worker the sorted rows are cut into shards of whole tickers that are computed by a process
+    pool. A shard travels as a few NumPy arrays rather than a pickled DataFrame and the results are concatenated in
+    shard order, so the output is the same for any number of workers.
+    """
+    def __init__(self, config: ConfigParser, workers: int = 1, cci_source: str = None):
+        """
+        :param workers: processes computing the shards
+        :param cci_source: overrides `[Indicator] cci source`, resampled bars have no downloaded CCI
+        """
+        self.moving_avg_period_1 = int(config['Indicator']['moving average 1st period'])
+        self.moving_avg_period_2 = int(config['Indicator']['moving average 2nd period'])
+        self.cci_period = int(config['Indicator']['cci period'])
+        self.atr_period = int(config['Indicator']['atr period'])
+        self.bollinger_bands_period = int(config['Indicator']['bollinger bands period'])
+        self.cci_source = cci_source or config['Indicator']['cci source']
+        self.features = [feature.strip() for feature in config['Indicator']['features'].split(',')]
+        self.workers = workers
+        self.parameters = {'moving average periods': [self.moving_avg_period_1, self.moving_avg_period_2],
+                           'cci source': self.cci_source, 'cci period': self.cci_period,
+                           'atr period': self.atr_period, 'bollinger bands period': self.bollinger_bands_period}
+        produced = producers(indicator_registry(self.parameters))
+        self.computed_features = [feature for feature in self.features if feature in produced]
+        self.parameters['computed features'] = self.computed_features
+
+    def compute(self, data_df: DataFrame) -> DataFrame:
+        """
+        :param data_df: daily bars of any number of tickers, in any order
+        :return: Dataframe sorted by ticker and date with the indicator columns added
+        """
+        logger.info(f"Calculating {', '.join(self.computed_features)} for {len(data_df)} rows with "
+                    f"{self.workers} workers")
+        missing = [feature for feature in self.features
+                   if feature not in self.computed_features and feature not in data_df.columns]
+        if missing:
+            raise ValueError(f"Features {missing} are neither computed nor columns of the stage data")
+        data_df = data_df.sort_values(by=['ticker', 'date'], kind='mergesort', ignore_index=True)
+        tickers = data_df['ticker']
+        # the codes of categorical tickers are compared instead of the strings
+        tickers = tickers.cat.codes if isinstance(tickers.dtype, CategoricalDtype) else tickers
+        first_rows = segment_positions(tickers.to_numpy()) == 0
+        bars = {'ticker': (np.cumsum(first_rows) - 1).astype(np.int32)}
+        for column in SHARD_COLUMNS:
+            bars[column] = data_df[column].to_numpy(dtype=np.float64)
+
+        bounds = [0, len(data_df)]
+        if self.workers > 1 and len(data_df):
+            bounds = shard_bounds(ticker_codes=bars['ticker'], shards=self.workers)
+        if len(bounds) > 2:
+            shards = [{column: values[start:end] for column, values in bars.items()}
+                      for start, end in zip(bounds[:-1], bounds[1:])]
+            with ProcessPoolExecutor(max_workers=self.workers) as executor:
+                results = list(executor.map(indicator_arrays, shards, repeat(self.parameters)))
+            indicators = {column: np.concatenate([result[column] for result in results]) for column in results[0]}
+        else:
+            indicators = indicator_arrays(bars=bars, parameters=self.parameters)
+
+        for column, values in indicators.items():
+            data_df[column] = values
+        return data_df
@@ -0,0 +1,129 @@
+import numpy as np
+from typing import Callable, Dict, List, Set
+from stock_observer.kernels import rolling_mean, rolling_bollinger, rolling_cci, true_range, line_angles
+
+Arrays = Dict[str, np.ndarray]
+
+
+class Indicator:
+    """
+    A node of the indicator graph: the arrays it reads, the arrays it writes and the kernel between them.
+    Inputs are price columns or outputs of other indicators, so intermediates like the open/close midpoint are
+    computed once and shared by every indicator that reads them.
+    """
+
+    def __init__(self, name: str, inputs: List[str], outputs: List[str],
+                 kernel: Callable[[Arrays, np.ndarray], Arrays]):
+        """
+        :param name: name of the indicator
+        :param inputs: arrays read by the kernel
+        :param outputs: arrays returned by the kernel
+        :param kernel: function of the arrays and of the row positions inside the tickers (see segment_positions)
+        """
+        self.name = name
+        self.inputs = inputs
+        self.outputs = outputs
+        self.kernel = kernel
+
+
+def midpoint(arrays: Arrays, positions: np.ndarray) -> Arrays:
+    return {'op': (arrays['open'] + arrays['close']) / 2}
+
+
+def typical_price(arrays: Arrays, positions: np.ndarray) -> Arrays:
+    return {'typical_price': (arrays['high'] + arrays['low'] + arrays['close']) / 3}
+
+
+def ticker_true_range(arrays: Arrays, positions: np.ndarray) -> Arrays:
+    return {'true_range': true_range(high=arrays['high'], low=arrays['low'], close=arrays['close'],
+                                     positions=positions)}
+
+
+def moving_average(source: str, output: str, period: int) -> Indicator:
+    return Indicator(name=output, inputs=[source], outputs=[output],
+                     kernel=lambda arrays, positions: {output: rolling_mean(values=arrays[source], positions=positions,
+                                                                            window=period)})
+
+
+def bollinger_bands(period: int) -> Indicator:
+    # the middle band is the moving average of the same period, it is the output of both
+    def kernel(arrays: Arrays, positions: np.ndarray) -> Arrays:
+        middle, _, lower, upper = rolling_bollinger(values=arrays['op'], positions=positions, window=period)
+        return {f'MA_{period}': middle, f'BB_L_{period}': lower, f'BB_U_{period}': upper}
+    return Indicator(name=f'BB_{period}', inputs=['op'],
+                     outputs=[f'MA_{period}', f'BB_L_{period}', f'BB_U_{period}'], kernel=kernel)
+
+
+def commodity_channel_index(period: int) -> Indicator:
+    return Indicator(name='CCI', inputs=['typical_price'], outputs=['CCI'],
+                     kernel=lambda arrays, positions: {'CCI': rolling_cci(typical_price=arrays['typical_price'],
+                                                                          positions=positions, window=period)})
+
+
+def line_angle(feature: str) -> Indicator:
+    return Indicator(name=f'{feature}_alpha', inputs=[feature], outputs=[f'{feature}_alpha'],
+                     kernel=lambda arrays, positions: {f'{feature}_alpha': line_angles(
+                         values=arrays[feature], positions=positions).round(0)})
+
+
+def indicator_registry(parameters: Dict[str, object]) -> List[Indicator]:
+    """
+    :param parameters: periods and CCI source, see Indicator_Engine.parameters
+    :return: every indicator the Transformer can compute
+    """
+    bollinger_period = parameters['bollinger bands period']
+    atr_period = parameters['atr period']
+    registry = [Indicator(name='op', inputs=['open', 'close'], outputs=['op'], kernel=midpoint),
+                Indicator(name='typical_price', inputs=['high', 'low', 'close'], outputs=['typical_price'],
+                          kernel=typical_price),
+                Indicator(name='true_range', inputs=['high', 'low', 'close'], outputs=['true_range'],
+                          kernel=ticker_true_range),
+                bollinger_bands(period=bollinger_period),
+                moving_average(source='true_range', output=f'ATR_{atr_period}', period=atr_period),
+                line_angle(feature=f'ATR_{atr_period}')]
+    for period in parameters['moving average periods']:
+        if period != bollinger_period:
+            registry.append(moving_average(source='op', output=f'MA_{period}', period=period))
+        registry.append(line_angle(feature=f'MA_{period}'))
+    if parameters['cci source'] == 'local':
+        registry.append(commodity_channel_index(period=parameters['cci period']))
+    return registry
+
+
+def producers(registry: List[Indicator]) -> Dict[str, Indicator]:
+    """
+    :return: {output: indicator}
+    """
+    return {output: indicator for indicator in registry for output in indicator.outputs}
+
+
+def resolve(registry: List[Indicator], features: List[str], available: Set[str]) -> List[Indicator]:
+    """
+    Indicators needed for the features, each one after the indicators it reads from
+    :param registry: see indicator_registry
+    :param features: arrays to compute
+    :param available: arrays there are already, the price columns
+    :return: indicators in computing order, every one of them once
+    """
+    producer = producers(registry)
+    plan: List[Indicator] = []
+    visiting = set()
+
+    def visit(name: str) -> None:
+        if name in available:
+            return
+        if name not in producer:
+            raise ValueError(f"No indicator produces {name}, known outputs are {sorted(producer)}")
+        indicator = producer[name]
+        if indicator in plan:
+            return
+        if indicator.name in visiting:
+            raise ValueError(f"Indicator {indicator.name} depends on itself")
+        visiting.add(indicator.name)
+        for source in indicator.inputs:
+            visit(source)
+        plan.append(indicator)
+
+    for feature in features:
+        visit(feature)
+    return plan
@@ -0,0 +1,129 @@
+import os
+import pickle
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from datetime import date
+from typing import Dict, List, Tuple
+from pandas import DataFrame
+from log_setup import get_logger
+from configparser import ConfigParser
+from stock_observer.kernels import ANGLE_WINDOW
+from stock_observer.frame_layout import Frame_Layout
+
+logger = get_logger(__name__)
+
+# a ticker is resumed only when its last kept bar is unchanged in the stage table
+PRICE_FIELDS = ['open', 'high', 'low', 'close']
+
+
+class Indicator_State:
+    """
+    Last bars of every ticker kept between transform runs, so that a daily run loads only the new bars of a ticker
+    from the stage table and computes the indicators over the kept bars plus the new ones.
+    A ticker keeps as many bars as the longest indicator window and the line angle behind it need, so the rolling
+    sums, the previous close of the ATR and the last values of the angles are all rebuilt from the kept bars and every
+    new row is identical to a full recompute. Running sums are not carried from run to run, they would drift and the
+    mean deviation of the CCI can not be updated from sums anyway.
+    A ticker is recomputed from the full lookback when its state does not end at the main table watermark (a run whose
+    transform output was not inserted) or when its last kept bar changed in the stage table (revised history).
+    """
+
+    def __init__(self, config: ConfigParser, timeframe: str = 'daily'):
+        """
+        :param timeframe: 'daily', or the timeframe of resampled bars that keep their own state file
+        """
+        path = Path(config['Data_Sources']['indicator state file'])
+        self.path = path if timeframe == 'daily' else path.with_name(f"{path.stem}_{timeframe}{path.suffix}")
+        moving_avg_periods = [int(config['Indicator']['moving average 1st period']),
+                              int(config['Indicator']['moving average 2nd period']),
+                              int(config['Indicator']['bollinger bands period'])]
+        # the angle of row t needs the features of the rows t - 4 to t, the ATR one more bar for the previous close
+        self.warm_up_bars = max([period + ANGLE_WINDOW - 2 for period in moving_avg_periods] +
+                                [int(config['Indicator']['atr period']) + ANGLE_WINDOW - 1,
+                                 int(config['Indicator']['cci period']) - 1])
+        if timeframe != 'daily':
+            # the kept open period is rebuilt from the stage, the bars before it are the warm up of its row
+            self.warm_up_bars += 1
+        self.tail_df = DataFrame()
+        self.frame_layout = Frame_Layout(config=config)
+
+    def load(self) -> None:
+        if not self.path.exists():
+            return
+        with open(self.path, 'rb') as file:
+            state = pickle.load(file)
+        if state['warm up bars'] < self.warm_up_bars:
+            logger.info(f"Indicator state of {state['warm up bars']} bars is too short, recomputing all tickers")
+            return
+        self.tail_df = state['bars'].astype({'ticker': str})
+        self.tail_df['date'] = self.tail_df['date'].dt.date
+        logger.info(f"Loaded indicator state of {self.tail_df['ticker'].nunique()} tickers from {self.path}")
+
+    def resumable(self, latest_dates: Dict[str, date]) -> Dict[str, date]:
+        """
+        :param latest_dates: main table watermarks
+        :return: {ticker: date of the last kept bar} of the tickers whose state ends at the watermark
+        """
+        if self.tail_df.empty:
+            return {}
+        last_dates = self.tail_df.groupby('ticker', sort=False)['date'].last()
+        return {ticker: day for ticker, day in last_dates.items() if latest_dates.get(ticker) == day}
+
+    def prepend(self, data_df: DataFrame, since: Dict[str, date]) -> Tuple[DataFrame, List[str]]:
+        """
+        Put the kept bars in front of the stage rows loaded from the last kept bar on
+        :param data_df: stage rows, from since[ticker] on for the resumed tickers
+        :param since: resumed tickers, see resumable
+        :return: the stage rows with the kept bars and the revised tickers, whose rows are removed
+        """
+        if not since:
+            return data_df, []
+        tail_df = self.tail_df[self.tail_df['ticker'].isin(list(since))]
+        last_df = tail_df.groupby('ticker', sort=False).tail(1)
+        check_df = last_df[['ticker', 'date'] + PRICE_FIELDS].merge(data_df[['ticker', 'date'] + PRICE_FIELDS],
+                                                                   on=['ticker', 'date'], how='left',
+                                                                   suffixes=('', '_stage'))
+        changed = np.zeros(len(check_df), dtype=bool)
+        for field in PRICE_FIELDS:
+            changed |= (check_df[field] != check_df[f'{field}_stage']).to_numpy()
+        revised = check_df.loc[changed, 'ticker'].tolist()
+        if revised:
+            logger.info(f"History of {len(revised)} tickers was revised, recomputing them")
+        tail_df = tail_df.drop(index=last_df.index)
+        tail_df = tail_df[~tail_df['ticker'].isin(revised)]
+        data_df = data_df[~data_df['ticker'].isin(revised)]
+        return pd.concat([tail_df, data_df], ignore_index=True), revised
+
+    def history(self, since: Dict[str, date]) -> DataFrame:
+        """
+        Kept bars in front of the ones rebuilt from the stage, used for the resampled bars whose open period is
+        rebuilt from its first day instead of being checked for revisions
+        :param since: {ticker: date of the first rebuilt bar} of the resumed tickers
+        :return: kept bars of these tickers dated before since[ticker]
+        """
+        if not since or self.tail_df.empty:
+            return DataFrame()
+        tail_df = self.tail_df[self.tail_df['ticker'].isin(list(since))]
+        return tail_df[(tail_df['date'] < tail_df['ticker'].map(since)).to_numpy()]
+
+    def save(self, data_df: DataFrame) -> None:
+        """
+        Keep the last bars of every ticker of the frame and write the state
+        :param data_df: stage columns of the transformed frame, in table or compact layout
+        """
+        tail_df = self.frame_layout.expand(data_df.groupby('ticker', sort=False).tail(self.warm_up_bars))
+        if not self.tail_df.empty:
+            kept_df = self.tail_df[~self.tail_df['ticker'].isin(tail_df['ticker'].unique())]
+            tail_df = pd.concat([kept_df, tail_df], ignore_index=True)
+        self.tail_df = tail_df.reset_index(drop=True)
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temporary_path = self.path.with_suffix('.tmp')
+        # categorical tickers and datetime64 dates are pickled as arrays instead of one object per row
+        bars = self.tail_df.astype({'ticker': 'category'})
+        bars['date'] = pd.to_datetime(bars['date'])
+        with open(temporary_path, 'wb') as file:
+            pickle.dump({'warm up bars': self.warm_up_bars, 'bars': bars}, file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporary_path, self.path)
+        logger.info(f"Saved indicator state of {self.tail_df['ticker'].nunique()} tickers to {self.path}")
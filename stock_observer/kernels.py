@@ -0,0 +1,154 @@
+"""
+Vectorized NumPy kernels for the indicators.
+
+All kernels work on flat arrays of a frame sorted by (ticker, date), so each ticker is a contiguous segment.
+Windows that would reach into the previous ticker are masked with the position of every row inside its segment.
+"""
+import numpy as np
+from typing import Tuple
+from numpy.lib.stride_tricks import as_strided
+
+# number of windows materialized at once by the chunked kernels
+CHUNK_SIZE = 65536
+# number of rows of the line angle window
+ANGLE_WINDOW = 5
+
+
+def segment_positions(keys: np.ndarray) -> np.ndarray:
+    """
+    Position of every row inside its contiguous run of equal keys, 0 on the first row of each ticker
+    :param keys: ticker of every row, sorted by (ticker, date)
+    :return: int64 array
+    """
+    n = len(keys)
+    index = np.arange(n)
+    starts = np.ones(n, dtype=bool)
+    starts[1:] = keys[1:] != keys[:-1]
+    return index - np.maximum.accumulate(np.where(starts, index, 0))
+
+
+def rolling_windows(values: np.ndarray, window: int) -> np.ndarray:
+    """
+    Read-only (len(values) - window + 1, window) view of all the sliding windows, without copying the data
+    """
+    values = np.ascontiguousarray(values, dtype=np.float64)
+    stride = values.strides[0]
+    return as_strided(values, shape=(max(len(values) - window + 1, 0), window), strides=(stride, stride),
+                      writeable=False)
+
+
+def rolling_cci(typical_price: np.ndarray, positions: np.ndarray, window: int) -> np.ndarray:
+    """
+    Commodity Channel Index: (TP - SMA(TP)) / (0.015 * mean(|TP - SMA(TP)|)) over the last `window` bars.
+    The mean deviation is taken around the SMA of the current window, like Alpha Vantage does.
+    :param typical_price: (high + low + close) / 3
+    :param positions: position of every row inside its ticker, see segment_positions
+    :param window: CCI period
+    :return: float64 array, NaN until a ticker has `window` bars
+    """
+    result = np.full(len(typical_price), np.nan)
+    windows = rolling_windows(typical_price, window)
+    for start in range(0, len(windows), CHUNK_SIZE):
+        chunk = windows[start:start + CHUNK_SIZE]
+        mean = chunk.mean(axis=1)
+        deviation = np.abs(chunk - mean[:, None]).mean(axis=1)
+        deviation[deviation == 0] = 0.00001
+        result[start + window - 1:start + window - 1 + len(chunk)] = (chunk[:, -1] - mean) / (0.015 * deviation)
+    result[positions < window - 1] = np.nan
+    return result
+
+
+def rolling_mean(values: np.ndarray, positions: np.ndarray, window: int) -> np.ndarray:
+    """
+    Simple moving average over the last `window` rows of every ticker
+    :param values: one value per row, sorted by (ticker, date)
+    :param positions: position of every row inside its ticker, see segment_positions
+    :param window: number of rows
+    :return: float64 array, NaN until a ticker has `window` rows
+    """
+    result = np.full(len(values), np.nan)
+    windows = rolling_windows(values, window)
+    for start in range(0, len(windows), CHUNK_SIZE):
+        chunk = windows[start:start + CHUNK_SIZE]
+        result[start + window - 1:start + window - 1 + len(chunk)] = chunk.mean(axis=1)
+    result[positions < window - 1] = np.nan
+    return result
+
+
+def rolling_bollinger(values: np.ndarray, positions: np.ndarray, window: int,
+                      width: float = 2) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Moving average, sample standard deviation (ddof=1, like pandas) and Bollinger Bands of every ticker in one pass.
+    The variance of every window is taken around its own mean with the corrected two-pass formula
+    (sum(d^2) - sum(d)^2 / n) / (n - 1), d = x - mean, whose second term compensates the rounding of the mean.
+    Unlike the sum of squares formula (sum(x^2) - sum(x)^2 / n) it does not lose the significant digits on
+    high-priced tickers with small moves.
+    :param values: one value per row, sorted by (ticker, date)
+    :param positions: position of every row inside its ticker, see segment_positions
+    :param window: number of rows
+    :param width: number of standard deviations between the average and a band
+    :return: average, standard deviation, lower band and upper band, float64 arrays, NaN until a ticker has `window`
+    rows
+    """
+    middle = np.full(len(values), np.nan)
+    deviation = np.full(len(values), np.nan)
+    windows = rolling_windows(values, window)
+    for start in range(0, len(windows), CHUNK_SIZE):
+        chunk = windows[start:start + CHUNK_SIZE]
+        mean = chunk.mean(axis=1)
+        centred = chunk - mean[:, None]
+        variance = (np.einsum('ij,ij->i', centred, centred) - centred.sum(axis=1) ** 2 / window) / (window - 1)
+        middle[start + window - 1:start + window - 1 + len(chunk)] = mean
+        deviation[start + window - 1:start + window - 1 + len(chunk)] = np.sqrt(np.maximum(variance, 0))
+    middle[positions < window - 1] = np.nan
+    deviation[positions < window - 1] = np.nan
+    return middle, deviation, middle - width * deviation, middle + width * deviation
+
+
+def true_range(high: np.ndarray, low: np.ndarray, close: np.ndarray, positions: np.ndarray) -> np.ndarray:
+    """
+    max(high - low, |high - previous close|, |previous close - low|) with the previous close of the same ticker.
+    The first bar of a ticker has no previous close, its true range is high - low.
+    :param positions: position of every row inside its ticker, see segment_positions
+    :return: float64 array
+    """
+    previous_close = np.empty(len(close))
+    previous_close[1:] = close[:-1]
+    previous_close[positions == 0] = np.nan
+    return np.fmax(np.abs(high - low), np.fmax(np.abs(high - previous_close), np.abs(previous_close - low)))
+
+
+def line_angles(values: np.ndarray, positions: np.ndarray) -> np.ndarray:
+    """
+    Angle in degrees of the line through the last 5 rows of every ticker, the vectorized Transformer.slope_cal.
+    The window is scaled to a unit square, the 4 slopes between consecutive points are weighted 4, 3, 2, 1 from the
+    newest and the weighted slope is turned into an angle. The arithmetic follows slope_cal step by step, so the
+    result is bit-identical to it.
+    :param values: (rows,) or (rows, features) array, sorted by (ticker, date)
+    :param positions: position of every row inside its ticker, see segment_positions
+    :return: float64 array of the same shape, NaN until a ticker has 5 rows
+    """
+    window = ANGLE_WINDOW
+    values = np.ascontiguousarray(values, dtype=np.float64)
+    shape = values.shape
+    values = values.reshape(len(values), -1)
+    x = np.array([1, 2, 3, 4, 5])
+    x_n = (x - x.min()) / (x.max() - x.min())
+    result = np.full(values.shape, np.nan)
+    row_stride, feature_stride = values.strides
+    windows = as_strided(values, shape=(max(len(values) - window + 1, 0), window, values.shape[1]),
+                         strides=(row_stride, row_stride, feature_stride), writeable=False)
+    for start in range(0, len(windows), CHUNK_SIZE):
+        chunk = windows[start:start + CHUNK_SIZE]
+        min_y = chunk.min(axis=1)
+        d_y = chunk.max(axis=1) - min_y
+        d_y[d_y == 0] = 0.01
+        y_n = (chunk - min_y[:, None, :]) / d_y[:, None, :]
+        s1 = (y_n[:, 4] - y_n[:, 3]) / (x_n[4] - x_n[3])
+        s2 = (y_n[:, 3] - y_n[:, 2]) / (x_n[3] - x_n[2])
+        s3 = (y_n[:, 2] - y_n[:, 1]) / (x_n[2] - x_n[1])
+        s4 = (y_n[:, 1] - y_n[:, 0]) / (x_n[1] - x_n[0])
+        slope = (s1 * 4 + s2 * 3 + s3 * 2 + s4 * 1) / 10
+        result[start + window - 1:start + window - 1 + len(chunk)] = np.arctan(slope) / np.pi * 180
+    result[positions < window - 1] = np.nan
+    return result.reshape(shape)
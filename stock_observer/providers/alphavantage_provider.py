@@ -0,0 +1,106 @@
+import json
+import numpy as np
+from operator import itemgetter
+from pandas import DataFrame
+from log_setup import get_logger
+from configparser import ConfigParser
+from stock_observer.http_client import HTTP_Client
+from stock_observer.response_cache import Response_Cache
+from stock_observer.rate_limiter import Adaptive_Token_Bucket
+from stock_observer.providers.market_data_provider import HTTP_Provider, PRICE_COLUMNS, Throttled_Error, \
+    Invalid_Symbol_Error
+
+logger = get_logger(__name__)
+
+AV_PRICE_FIELDS = ('1. open', '2. high', '3. low', '4. close', '5. volume')
+# keys of the Alpha Vantage bodies returned instead of the data when the quota is used up
+AV_THROTTLE_KEYS = ('Note', 'Information')
+
+
+class AlphaVantage_Provider(HTTP_Provider):
+    """
+    Alpha Vantage daily prices and technical indicators, one ticker per request under the adaptive rate limiter
+    """
+    name = 'alphavantage'
+
+    def __init__(self, config: ConfigParser, http_client: HTTP_Client, response_cache: Response_Cache):
+        super().__init__(http_client=http_client, response_cache=response_cache)
+        self.api_key = config['API']['alphavantage API key']
+        self.url = config['API']['alphavantage url']
+        self.limiter = Adaptive_Token_Bucket(
+            requests_per_minute=float(config['API']['alphavantage requests per minute']),
+            min_requests_per_minute=float(config['API']['alphavantage min requests per minute']),
+            increase=float(config['API']['alphavantage rate increase']),
+            cooldown=float(config['API']['alphavantage throttle cooldown seconds']))
+        self.throttle_retries = int(config['API']['alphavantage throttle retries'])
+
+    def ticker_prices(self, ticker: str, output_size: str) -> DataFrame:
+        logger.info(f"Retrieving data for {ticker}")
+        params = {'function': 'TIME_SERIES_DAILY', 'symbol': ticker, 'outputsize': output_size,
+                  'apikey': self.api_key}
+        response = self.request(endpoint='alphavantage price', url=self.url, params=params, limiter=self.limiter,
+                                validate=lambda body: b'"Time Series (Daily)"' in body)
+        time_series = self.response_data(response=response, key='Time Series (Daily)', ticker=ticker)
+        return self.parse_time_series_daily(time_series=time_series, ticker=ticker)
+
+    def indicator(self, ticker: str, indicator: str, period: int) -> DataFrame:
+        logger.info(f"Retrieving {indicator} indicator for {ticker}")
+        params = {'function': indicator, 'symbol': ticker, 'interval': 'daily', 'time_period': period,
+                  'apikey': self.api_key}
+        key = f"Technical Analysis: {indicator}"
+        response = self.request(endpoint=f'alphavantage {indicator.lower()}', url=self.url, params=params,
+                                limiter=self.limiter, validate=lambda body: f'"{key}"'.encode() in body)
+        values = self.response_data(response=response, key=key, ticker=ticker)
+        record = DataFrame({'ticker': ticker,
+                            'date': np.array(list(values.keys()), dtype='datetime64[D]').astype('datetime64[ns]'),
+                            indicator: np.array(list(map(itemgetter(indicator), values.values())), dtype=str)
+                            .astype(np.float64)}, columns=['ticker', 'date', indicator])
+        if record.empty:
+            logger.warning(f"{ticker}: No indicator found")
+        return record
+
+    def response_data(self, response: bytes, key: str, ticker: str) -> dict:
+        """
+        Classify an Alpha Vantage response body and return its data
+        :param response: response body
+        :param key: key of the data in the body
+        :param ticker: ticker
+        :return: the data, empty when the API has no data for the ticker.
+                 Raises Throttled_Error for quota messages and Invalid_Symbol_Error for unknown symbols.
+        """
+        response_dict = json.loads(response)
+        if key in response_dict:
+            self.limiter.on_success()
+            return response_dict[key]
+        for throttle_key in AV_THROTTLE_KEYS:
+            if throttle_key in response_dict:
+                raise Throttled_Error(response_dict[throttle_key])
+        if 'Error Message' in response_dict:
+            raise Invalid_Symbol_Error(response_dict['Error Message'])
+        logger.warning(f"{ticker}: Alpha Vantage returned no {key}")
+        return {}
+
+    @staticmethod
+    def parse_time_series_daily(time_series: dict, ticker: str) -> DataFrame:
+        """
+        Turn the Alpha Vantage 'Time Series (Daily)' object straight into typed columns. The values of all the days
+        are gathered with a C level itemgetter into one string array that NumPy converts column by column, there is
+        no per-row Python parsing.
+        :param time_series: {date: {'1. open': ..., '5. volume': ...}}
+        :param ticker: ticker
+        :return: Dataframe with datetime64 date, float64 prices and int64 volume
+        """
+        dates = np.array(list(time_series.keys()), dtype='datetime64[D]')
+        values = np.array(list(map(itemgetter(*AV_PRICE_FIELDS), time_series.values())), dtype=str)
+        values = values.reshape(len(dates), len(AV_PRICE_FIELDS))
+        return DataFrame({'ticker': ticker, 'date': dates.astype('datetime64[ns]'),
+                          'open': values[:, 0].astype(np.float64), 'high': values[:, 1].astype(np.float64),
+                          'low': values[:, 2].astype(np.float64), 'close': values[:, 3].astype(np.float64),
+                          'volume': values[:, 4].astype(np.int64)}, columns=PRICE_COLUMNS)
+
+    def on_throttle(self) -> None:
+        self.limiter.on_throttle()
+
+    def report(self) -> str:
+        return f"{self.limiter.throttled} throttle retries, {self.limiter.wait_seconds:.1f}s rate limit wait, " \
+               f"effective rate {self.limiter.rate * 60:.2f} of {self.limiter.max_rate * 60:.2f} requests per minute"
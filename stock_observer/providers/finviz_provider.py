@@ -0,0 +1,32 @@
+from typing import Dict
+from log_setup import get_logger
+from configparser import ConfigParser
+from stock_observer.http_client import HTTP_Client
+from stock_observer.response_cache import Response_Cache
+from stock_observer.rate_limiter import Token_Bucket
+from stock_observer.fundamentals import parse_snapshot_table
+from stock_observer.providers.market_data_provider import HTTP_Provider
+
+logger = get_logger(__name__)
+
+
+class FinViz_Provider(HTTP_Provider):
+    """
+    FinViz quote page snapshot table, scraped at a polite rate
+    """
+    name = 'finviz'
+    headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 6.1; WOW64; rv:20.0) Gecko/20100101 Firefox/20.0'}
+
+    def __init__(self, config: ConfigParser, http_client: HTTP_Client, response_cache: Response_Cache):
+        super().__init__(http_client=http_client, response_cache=response_cache)
+        self.url = config['API']['finviz url']
+        self.limiter = Token_Bucket(requests_per_minute=float(config['API']['finviz requests per minute']))
+
+    def fundamentals(self, ticker: str) -> Dict[str, str]:
+        response = self.request(endpoint='finviz quote', url=self.url, params={'t': ticker.lower()},
+                                limiter=self.limiter, headers=self.headers,
+                                validate=lambda body: b'snapshot-td2' in body)
+        return parse_snapshot_table(response)
+
+    def report(self) -> str:
+        return f"{self.limiter.wait_seconds:.1f}s rate limit wait"
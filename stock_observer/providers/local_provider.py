@@ -0,0 +1,75 @@
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from datetime import date
+from typing import Dict, List
+from concurrent.futures import ThreadPoolExecutor
+from pandas import DataFrame
+from log_setup import get_logger
+from configparser import ConfigParser
+from stock_observer.providers.market_data_provider import Market_Data_Provider, PRICE_COLUMNS, \
+    Invalid_Symbol_Error
+
+logger = get_logger(__name__)
+
+
+class Local_Provider(Market_Data_Provider):
+    """
+    Daily prices and fundamentals served from fixture files at disk speed, for offline runs and load tests.
+    Prices of a ticker are read from <local data directory>/<TICKER>.parquet or <TICKER>.csv with the date, open,
+    high, low, close and volume columns. Fundamentals are read from fundamentals.csv with one row per ticker and the
+    raw FinViz metric names as columns. Parquet fixtures need pyarrow or fastparquet.
+    """
+    name = 'local'
+    batched = True
+
+    def __init__(self, config: ConfigParser, http_client=None, response_cache=None):
+        self.directory = Path(config['Providers']['local data directory'])
+        self.workers = int(config['API']['download workers'])
+        self.fundamentals_df = None
+        self.files = 0
+
+    def ticker_prices(self, ticker: str, output_size: str) -> DataFrame:
+        parquet_path = self.directory / f"{ticker}.parquet"
+        csv_path = self.directory / f"{ticker}.csv"
+        if parquet_path.exists():
+            record = pd.read_parquet(parquet_path)
+        elif csv_path.exists():
+            record = pd.read_csv(csv_path, parse_dates=['date'])
+        else:
+            raise Invalid_Symbol_Error(f"no fixture for {ticker} in {self.directory}")
+        self.files += 1
+        record = DataFrame({'ticker': ticker, 'date': pd.to_datetime(record['date']),
+                            'open': record['open'].to_numpy(dtype=np.float64),
+                            'high': record['high'].to_numpy(dtype=np.float64),
+                            'low': record['low'].to_numpy(dtype=np.float64),
+                            'close': record['close'].to_numpy(dtype=np.float64),
+                            'volume': record['volume'].to_numpy(dtype=np.int64)}, columns=PRICE_COLUMNS)
+        record = record.sort_values(by='date', ignore_index=True)
+        return record if output_size == 'full' else record.tail(100).reset_index(drop=True)
+
+    def batch_prices(self, tickers: List[str], date_from: date) -> DataFrame:
+        def read(ticker: str) -> DataFrame:
+            try:
+                record = self.ticker_prices(ticker=ticker, output_size='full')
+            except Invalid_Symbol_Error as e:
+                logger.warning(e)
+                return None
+            return record[record['date'] >= pd.Timestamp(date_from)]
+
+        # the fixture files are parsed by `download workers` threads
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            records = [record for record in executor.map(read, tickers) if record is not None]
+        if not records:
+            return DataFrame(columns=PRICE_COLUMNS)
+        return pd.concat(records, ignore_index=True)
+
+    def fundamentals(self, ticker: str) -> Dict[str, str]:
+        if self.fundamentals_df is None:
+            self.fundamentals_df = pd.read_csv(self.directory / 'fundamentals.csv', dtype=str).set_index('ticker')
+        if ticker not in self.fundamentals_df.index:
+            return {}
+        return self.fundamentals_df.loc[ticker].dropna().to_dict()
+
+    def report(self) -> str:
+        return f"{self.files} fixture files read from {self.directory}" if self.files else ''
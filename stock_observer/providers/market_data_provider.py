@@ -0,0 +1,107 @@
+import pandas as pd
+from datetime import date
+from typing import Dict, List
+from pandas import DataFrame
+from log_setup import get_logger
+from stock_observer.rate_limiter import Token_Bucket
+from stock_observer.http_client import HTTP_Client
+from stock_observer.response_cache import Response_Cache
+
+logger = get_logger(__name__)
+
+PRICE_COLUMNS = ['ticker', 'date', 'open', 'high', 'low', 'close', 'volume']
+
+
+class Throttled_Error(Exception):
+    """The API answered with a quota message instead of the data"""
+
+
+class Invalid_Symbol_Error(ValueError):
+    """The API does not know the requested symbol"""
+
+
+class Market_Data_Provider:
+    """
+    Source of market data for the Downloader.
+    A provider implements the data types it supports: daily prices of one ticker, daily prices of many tickers at
+    once, indicators and fundamentals. Prices are returned as typed frames with the PRICE_COLUMNS, datetime64 dates,
+    float64 prices and an integer volume.
+    Batched providers fetch many tickers per request, the Downloader then uses batch_prices instead of one
+    ticker_prices call per ticker.
+    """
+    name = 'provider'
+    batched = False
+    # times a throttled ticker is requested again
+    throttle_retries = 0
+
+    def ticker_prices(self, ticker: str, output_size: str) -> DataFrame:
+        """
+        :param ticker: ticker
+        :param output_size: 'full' for the whole history, 'compact' for the latest 100 sessions
+        :return: Dataframe
+        """
+        raise NotImplementedError(f"{self.name} does not provide daily prices")
+
+    def batch_prices(self, tickers: List[str], date_from: date) -> DataFrame:
+        """
+        :param tickers: tickers
+        :param date_from: first date of the range
+        :return: Dataframe of all the tickers, sorted by ticker and date
+        """
+        records = []
+        for ticker in tickers:
+            record = self.ticker_prices(ticker=ticker, output_size='full')
+            records.append(record[record['date'] >= pd.Timestamp(date_from)])
+        if not records:
+            return DataFrame(columns=PRICE_COLUMNS)
+        return pd.concat(records, ignore_index=True).sort_values(by=['ticker', 'date'], ignore_index=True)
+
+    def indicator(self, ticker: str, indicator: str, period: int) -> DataFrame:
+        """
+        :return: Dataframe with ticker, date and the indicator column
+        """
+        raise NotImplementedError(f"{self.name} does not provide the {indicator} indicator")
+
+    def fundamentals(self, ticker: str) -> Dict[str, str]:
+        """
+        :return: {metric: raw value} of the FinViz snapshot metrics, empty when the ticker is not found
+        """
+        raise NotImplementedError(f"{self.name} does not provide fundamentals")
+
+    def on_throttle(self) -> None:
+        pass
+
+    def report(self) -> str:
+        """
+        :return: summary of the provider usage for the pipeline report, empty when there is nothing to report
+        """
+        return ''
+
+
+class HTTP_Provider(Market_Data_Provider):
+    """
+    Provider downloading from a web API through the shared HTTP client and response cache
+    """
+
+    def __init__(self, http_client: HTTP_Client, response_cache: Response_Cache):
+        self.http_client = http_client
+        self.response_cache = response_cache
+
+    def request(self, endpoint: str, url: str, params: dict, limiter: Token_Bucket = None, headers: dict = None,
+                validate=None) -> bytes:
+        """
+        Get the response body from the response cache or download it
+        :param endpoint: endpoint name used by the cache to pick the TTL
+        :param url: endpoint url
+        :param params: query parameters
+        :param limiter: rate limiter of the API, a token is taken only when the request goes to the network
+        :param headers: request headers
+        :param validate: only response bodies that pass this check are cached
+        :return: response body
+        """
+        def download() -> bytes:
+            if limiter is not None:
+                limiter.acquire()
+            return self.http_client.get(url, params=params, headers=headers).content
+
+        return self.response_cache.fetch(endpoint=endpoint, params=params, download=download, validate=validate)
@@ -0,0 +1,88 @@
+import json
+import numpy as np
+import pandas as pd
+from datetime import date, datetime, timedelta
+from typing import List
+from operator import itemgetter
+from pandas import DataFrame, Series
+from log_setup import get_logger
+from configparser import ConfigParser
+from stock_observer.http_client import HTTP_Client
+from stock_observer.response_cache import Response_Cache
+from stock_observer.providers.market_data_provider import HTTP_Provider, PRICE_COLUMNS
+
+logger = get_logger(__name__)
+
+
+class Marketstack_Provider(HTTP_Provider):
+    """
+    Marketstack end of day prices. Up to `marketstack symbols per request` comma separated symbols go in one request
+    and every response is followed page by page with limit/offset until the reported total is reached.
+    """
+    name = 'marketstack'
+    batched = True
+
+    def __init__(self, config: ConfigParser, http_client: HTTP_Client, response_cache: Response_Cache):
+        super().__init__(http_client=http_client, response_cache=response_cache)
+        self.api_key = config['API']['marketstack API key']
+        self.url = config['API']['marketstack url']
+        self.symbols_per_request = int(config['API']['marketstack symbols per request'])
+        self.page_limit = int(config['API']['marketstack page limit'])
+        self.requests = 0
+
+    def ticker_prices(self, ticker: str, output_size: str) -> DataFrame:
+        # 150 calendar days hold the latest 100 sessions
+        date_from = date(2000, 1, 1) if output_size == 'full' else date.today() - timedelta(days=150)
+        record = self.batch_prices(tickers=[ticker], date_from=date_from)
+        return record if output_size == 'full' else record.tail(100).reset_index(drop=True)
+
+    def batch_prices(self, tickers: List[str], date_from: date) -> DataFrame:
+        pages = []
+        for start in range(0, len(tickers), self.symbols_per_request):
+            pages.extend(self.eod_pages(symbols=tickers[start:start + self.symbols_per_request], date_from=date_from))
+        if not pages:
+            return DataFrame(columns=PRICE_COLUMNS)
+        return pd.concat(pages, ignore_index=True).sort_values(by=['ticker', 'date'], ignore_index=True)
+
+    def eod_pages(self, symbols: List[str], date_from: date) -> List[DataFrame]:
+        """
+        :param symbols: tickers requested together
+        :param date_from: first date of the range
+        :return: typed frame of every page of the response
+        """
+        logger.info(f"Retrieving data for {len(symbols)} tickers from {date_from}")
+        pages = []
+        offset = 0
+        while True:
+            params = {'access_key': self.api_key, 'symbols': ','.join(symbols),
+                      'date_from': str(date_from), 'date_to': str(datetime.today().date()),
+                      'limit': self.page_limit, 'offset': offset}
+            response = self.request(endpoint='marketstack eod', url=self.url, params=params,
+                                    validate=lambda body: b'"data"' in body)
+            self.requests += 1
+            response_dict = json.loads(response)
+            updates = response_dict['data']
+            if updates:
+                pages.append(self.parse_eod(updates))
+            offset += len(updates)
+            if not updates or offset >= response_dict.get('pagination', {}).get('total', 0):
+                return pages
+
+    @staticmethod
+    def parse_eod(updates: List[dict]) -> DataFrame:
+        """
+        :param updates: 'data' list of a Marketstack eod response
+        :return: Dataframe with datetime64 date, float64 prices and Int64 volume
+        """
+        values = list(zip(*map(itemgetter('symbol', 'date', 'open', 'high', 'low', 'close', 'volume'), updates)))
+        return DataFrame({'ticker': np.array(values[0], dtype=object),
+                          # dates come as 2020-01-02T00:00:00+0000
+                          'date': np.array([day[:10] for day in values[1]], dtype='datetime64[D]')
+                          .astype('datetime64[ns]'),
+                          'open': np.array(values[2], dtype=np.float64), 'high': np.array(values[3], dtype=np.float64),
+                          'low': np.array(values[4], dtype=np.float64), 'close': np.array(values[5], dtype=np.float64),
+                          'volume': Series(np.array(values[6], dtype=np.float64)).round().astype('Int64')},
+                         columns=PRICE_COLUMNS)
+
+    def report(self) -> str:
+        return f"{self.requests} eod requests" if self.requests else ''
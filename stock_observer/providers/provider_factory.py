@@ -0,0 +1,23 @@
+from configparser import ConfigParser
+from stock_observer.http_client import HTTP_Client
+from stock_observer.response_cache import Response_Cache
+from stock_observer.providers.market_data_provider import Market_Data_Provider
+from stock_observer.providers.alphavantage_provider import AlphaVantage_Provider
+from stock_observer.providers.marketstack_provider import Marketstack_Provider
+from stock_observer.providers.finviz_provider import FinViz_Provider
+from stock_observer.providers.yfinance_provider import YFinance_Provider
+from stock_observer.providers.local_provider import Local_Provider
+
+PROVIDERS = {provider.name: provider for provider in [AlphaVantage_Provider, Marketstack_Provider, FinViz_Provider,
+                                                      YFinance_Provider, Local_Provider]}
+
+
+def create_provider(name: str, config: ConfigParser, http_client: HTTP_Client,
+                    response_cache: Response_Cache) -> Market_Data_Provider:
+    """
+    :param name: provider name of the [Providers] section
+    :return: the provider
+    """
+    if name not in PROVIDERS:
+        raise ValueError(f"Unknown market data provider {name}, expected one of {sorted(PROVIDERS)}")
+    return PROVIDERS[name](config=config, http_client=http_client, response_cache=response_cache)
@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+import yfinance as yf
+from datetime import date
+from typing import List
+from pandas import DataFrame, MultiIndex
+from log_setup import get_logger
+from configparser import ConfigParser
+from stock_observer.providers.market_data_provider import Market_Data_Provider, PRICE_COLUMNS
+
+logger = get_logger(__name__)
+
+
+class YFinance_Provider(Market_Data_Provider):
+    """
+    Yahoo Finance daily prices through yfinance, which downloads many tickers per call with its own threads
+    """
+    name = 'yfinance'
+    batched = True
+
+    def __init__(self, config: ConfigParser, http_client=None, response_cache=None):
+        self.calls = 0
+
+    def ticker_prices(self, ticker: str, output_size: str) -> DataFrame:
+        record = self.download(tickers=[ticker], period='max' if output_size == 'full' else '6mo')
+        return record if output_size == 'full' else record.tail(100).reset_index(drop=True)
+
+    def batch_prices(self, tickers: List[str], date_from: date) -> DataFrame:
+        return self.download(tickers=tickers, start=str(date_from))
+
+    def download(self, tickers: List[str], **kwargs) -> DataFrame:
+        logger.info(f"Retrieving data for {len(tickers)} tickers from Yahoo Finance")
+        self.calls += 1
+        data = yf.download(tickers=' '.join(tickers), group_by='ticker', auto_adjust=False, progress=False,
+                           threads=True, **kwargs)
+        if data.empty:
+            return DataFrame(columns=PRICE_COLUMNS)
+        if not isinstance(data.columns, MultiIndex):
+            data.columns = MultiIndex.from_product([tickers, data.columns])
+        record = data.stack(level=0).rename_axis(['date', 'ticker']).reset_index()
+        record = record.dropna(subset=['Close'])
+        return DataFrame({'ticker': record['ticker'].to_numpy(dtype=object),
+                          'date': pd.to_datetime(record['date']).to_numpy(),
+                          'open': record['Open'].to_numpy(dtype=np.float64),
+                          'high': record['High'].to_numpy(dtype=np.float64),
+                          'low': record['Low'].to_numpy(dtype=np.float64),
+                          'close': record['Close'].to_numpy(dtype=np.float64),
+                          'volume': record['Volume'].fillna(0).to_numpy(dtype=np.int64)},
+                         columns=PRICE_COLUMNS).sort_values(by=['ticker', 'date'], ignore_index=True)
+
+    def report(self) -> str:
+        return f"{self.calls} download calls" if self.calls else ''
@@ -0,0 +1,96 @@
+import time
+import threading
+from log_setup import get_logger
+
+logger = get_logger(__name__)
+
+
+class Token_Bucket:
+    """
+    Thread safe token bucket shared by all the workers that call the same API key.
+    The bucket refills at requests_per_minute / 60 tokens per second and holds at most `capacity` tokens, so the
+    sustained request rate never goes above the quota of the key.
+    """
+
+    def __init__(self, requests_per_minute: float, capacity: int = 1):
+        if requests_per_minute <= 0:
+            raise ValueError(f"requests per minute must be positive, got {requests_per_minute}")
+        self.rate = requests_per_minute / 60
+        self.capacity = max(1, capacity)
+        self.tokens = float(self.capacity)
+        self.last_refill = time.monotonic()
+        self.wait_seconds = 0.0
+        self.lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        if now > self.last_refill:
+            self.tokens = min(self.capacity, self.tokens + (now - self.last_refill) * self.rate)
+            self.last_refill = now
+
+    def acquire(self) -> float:
+        """
+        Block until a token is available and take it
+        :return: the number of seconds the caller waited
+        """
+        waited = 0.0
+        while True:
+            with self.lock:
+                self._refill()
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    self.wait_seconds += waited
+                    return waited
+                delay = (1 - self.tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+
+class Adaptive_Token_Bucket(Token_Bucket):
+    """
+    Token bucket that learns the effective rate of an API online with additive increase, multiplicative decrease.
+    A throttled response halves the rate and holds every request back for `cooldown` seconds, the other throttled
+    responses of requests already in flight during the cooldown do not lower it again. Every successful response
+    adds `increase` requests per minute back, up to the configured rate.
+    """
+
+    def __init__(self, requests_per_minute: float, capacity: int = 1, min_requests_per_minute: float = 1,
+                 increase: float = 0.5, cooldown: float = 60):
+        super().__init__(requests_per_minute=requests_per_minute, capacity=capacity)
+        self.max_rate = self.rate
+        self.min_rate = min(min_requests_per_minute / 60, self.rate)
+        self.increase = increase / 60
+        self.cooldown = cooldown
+        self.paused_until = 0.0
+        self.throttled = 0
+
+    def acquire(self) -> float:
+        waited = 0.0
+        while True:
+            with self.lock:
+                delay = self.paused_until - time.monotonic()
+                if delay <= 0:
+                    break
+                self.wait_seconds += delay
+            time.sleep(delay)
+            waited += delay
+        return waited + super().acquire()
+
+    def on_throttle(self) -> None:
+        with self.lock:
+            self.throttled += 1
+            now = time.monotonic()
+            if now >= self.paused_until:
+                self._refill()
+                self.rate = max(self.min_rate, self.rate / 2)
+                self.tokens = min(self.tokens, 0.0)
+                self.paused_until = now + self.cooldown
+                self.last_refill = self.paused_until
+                logger.warning(f"Throttled, rate lowered to {self.rate * 60:.2f} requests per minute, "
+                               f"pausing for {self.cooldown:.0f}s")
+
+    def on_success(self) -> None:
+        with self.lock:
+            if self.rate < self.max_rate:
+                self._refill()
+                self.rate = min(self.max_rate, self.rate + self.increase)
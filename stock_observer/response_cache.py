@@ -0,0 +1,107 @@
+import os
+import json
+import time
+import zlib
+import hashlib
+import threading
+from pathlib import Path
+from typing import Callable, Optional
+from log_setup import get_logger
+from configparser import ConfigParser
+
+logger = get_logger(__name__)
+
+# request parameters that identify the account, not the data, and never take part in the cache key
+SECRET_PARAMS = ('apikey', 'access_key')
+
+
+class Cache_Miss_Error(KeyError):
+    """
+    Raised in replay mode when a response is not in the cache
+    """
+
+
+class Response_Cache:
+    """
+    Content addressed on-disk cache of HTTP response bodies.
+    Entries are keyed by endpoint + request parameters, stored zlib compressed, expire after the TTL of their endpoint
+    and the least recently used entries are evicted once the cache grows over its size cap.
+    In replay mode expired entries are still served and nothing is downloaded.
+    """
+
+    def __init__(self, config: ConfigParser, replay: bool = False):
+        self.config = config
+        self.replay = replay
+        self.directory = Path(config['Cache']['cache directory'])
+        self.max_size = int(float(config['Cache']['max size mb']) * 1024 * 1024)
+        self.lock = threading.Lock()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.size = sum(path.stat().st_size for path in self.directory.glob('*/*.z'))
+
+    def ttl(self, endpoint: str) -> float:
+        return float(self.config['Cache'][f'{endpoint} ttl hours']) * 3600
+
+    @staticmethod
+    def key(endpoint: str, params: dict) -> str:
+        items = sorted((str(k), str(v)) for k, v in params.items() if k not in SECRET_PARAMS)
+        return hashlib.sha256(json.dumps([endpoint, items]).encode()).hexdigest()
+
+    def path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.z"
+
+    def get(self, endpoint: str, params: dict) -> Optional[bytes]:
+        path = self.path(self.key(endpoint, params))
+        try:
+            with open(path, 'rb') as file:
+                header, body = file.read().split(b'\n', 1)
+        except FileNotFoundError:
+            return None
+        if not self.replay and time.time() - json.loads(header)['created'] > self.ttl(endpoint):
+            return None
+        # the modification time records the last access and drives the LRU eviction
+        os.utime(path)
+        return zlib.decompress(body)
+
+    def put(self, endpoint: str, params: dict, body: bytes) -> None:
+        path = self.path(self.key(endpoint, params))
+        path.parent.mkdir(parents=True, exist_ok=True)
+        data = json.dumps({'endpoint': endpoint, 'created': time.time()}).encode() + b'\n' + zlib.compress(body)
+        temp_path = path.with_suffix(f'.{threading.get_ident()}.tmp')
+        with open(temp_path, 'wb') as file:
+            file.write(data)
+        with self.lock:
+            old_size = path.stat().st_size if path.exists() else 0
+            os.replace(temp_path, path)
+            self.size += len(data) - old_size
+            if self.size > self.max_size:
+                self.evict()
+
+    def evict(self) -> None:
+        entries = sorted((entry.stat().st_mtime, entry.stat().st_size, entry)
+                         for entry in self.directory.glob('*/*.z'))
+        for _, size, entry in entries:
+            if self.size <= self.max_size * 0.9:
+                break
+            entry.unlink()
+            self.size -= size
+        logger.info(f"Response cache evicted down to {self.size / 1024 / 1024:.1f} MB")
+
+    def fetch(self, endpoint: str, params: dict, download: Callable[[], bytes],
+              validate: Callable[[bytes], bool] = None) -> bytes:
+        """
+        Return the cached body of the request or download and cache it
+        :param endpoint: endpoint name, selects the TTL
+        :param params: request parameters
+        :param download: function that downloads the body
+        :param validate: only bodies that pass this check are cached
+        :return: response body
+        """
+        body = self.get(endpoint, params)
+        if body is not None:
+            return body
+        if self.replay:
+            raise Cache_Miss_Error(f"{endpoint} {self.key(endpoint, params)} is not in the response cache")
+        body = download()
+        if validate is None or validate(body):
+            self.put(endpoint, params, body)
+        return body
@@ -0,0 +1,147 @@
+import numpy as np
+from pandas import DataFrame, CategoricalDtype
+from log_setup import get_logger
+from configparser import ConfigParser
+from stock_observer.kernels import segment_positions
+
+logger = get_logger(__name__)
+
+# rows of the sliding window of Analyzer.analyze, a row gets signals when it is the last row of a full window
+ANALYSIS_WINDOW = 30
+SIGNAL_COLUMNS = ['BB_U_signal', 'BB_L_signal', 'MA_angle_diff', 'MA_signal', 'ATR_angle_diff',
+                  'ATR_slope_change_signal', 'candle_ATR_ratio', 'ATR_candle_size_signal', 'CCI_signal', 'price_diff',
+                  'price_diff_signal']
+
+
+def last_index(condition: np.ndarray) -> np.ndarray:
+    """
+    :return: index of the last row up to every row where the condition holds, -1 before the first one
+    """
+    return np.maximum.accumulate(np.where(condition, np.arange(len(condition)), -1))
+
+
+def reached_levels(values: np.ndarray, levels: np.ndarray, exceeded: int = 0) -> np.ndarray:
+    """
+    Number of levels every value reached, by binary search in the sorted levels
+    :param values: float array
+    :param levels: ascending levels
+    :param exceeded: the first levels count only when the value is above them, the others already at them
+    :return: int64 array, 0 for missing values
+    """
+    values = np.asarray(values)
+    reached = np.searchsorted(levels[:exceeded], values, side='left') + \
+        np.searchsorted(levels[exceeded:], values, side='right')
+    return np.where(np.isnan(values), 0, reached)
+
+
+class Signal_Levels:
+    """
+    Levels of the bucketed Analyzer signals, `[Signals]`. A signal is the number of levels its value reached, so
+    the levels are looked up for whole columns at once and a new set of levels needs no code change.
+    """
+
+    def __init__(self, config: ConfigParser):
+        self.ma_angle = self.levels(config, 'ma angle levels')
+        self.atr_slope = self.levels(config, 'atr slope levels')
+        self.atr_candle = self.levels(config, 'atr candle levels')
+        self.price_change = self.levels(config, 'price change levels')
+
+    @staticmethod
+    def levels(config: ConfigParser, key: str) -> np.ndarray:
+        levels = np.array([float(level) for level in config['Signals'][key].split(',')])
+        if np.any(np.diff(levels) <= 0):
+            raise ValueError(f"[Signals] {key} must be ascending, got {config['Signals'][key]}")
+        return levels
+
+    def ma_signal(self, angle_diff: np.ndarray) -> np.ndarray:
+        # an angle difference at the first level is not a signal yet
+        return reached_levels(values=angle_diff, levels=self.ma_angle, exceeded=1)
+
+    def atr_slope_signal(self, angle_diff: np.ndarray) -> np.ndarray:
+        return reached_levels(values=angle_diff, levels=self.atr_slope, exceeded=1)
+
+    def atr_candle_signal(self, candle_size: np.ndarray, atr: np.ndarray) -> np.ndarray:
+        """
+        The levels are multiples of the ATR of every row, so the candle is compared with every multiple of its own
+        ATR instead of a binary search of its ratio, whose rounding could move it across a level. A candle of
+        exactly the first multiple is not a signal yet
+        """
+        candle_size, atr = np.asarray(candle_size), np.asarray(atr)
+        reached = (candle_size > self.atr_candle[0] * atr).astype(np.int64)
+        for level in self.atr_candle[1:]:
+            reached += candle_size >= level * atr
+        return reached
+
+    def price_change_signal(self, price_diff: np.ndarray) -> np.ndarray:
+        # the same levels downwards give the negative signals
+        price_diff = np.asarray(price_diff)
+        return reached_levels(values=price_diff, levels=self.price_change) - \
+            reached_levels(values=-price_diff, levels=self.price_change)
+
+
+def window_signals(data_df: DataFrame, levels: Signal_Levels, window: int = ANALYSIS_WINDOW) -> DataFrame:
+    """
+    The signals of the Analyzer for the last row of every full window of a ticker, computed over whole columns.
+    Every signal reads the last row of the window and the row before it (t and y), except the CCI hysteresis that
+    is replayed over the window with the last rows where the CCI crossed each level. Same values as the signal
+    functions of the Analyzer applied to every window, rows whose features are missing get a 0 signal where those
+    stop with an unset signal, the missing values drop them from the analysis anyway.
+    :param data_df: main table rows of any number of tickers, in any order
+    :param levels: levels of the bucketed signals
+    :param window: rows of the sliding window
+    :return: id, ticker, date and the SIGNAL_COLUMNS of the last row of every window, sorted by ticker and date
+    """
+    data_df = data_df.sort_values(by=['ticker', 'date'], kind='mergesort', ignore_index=True)
+    tickers = data_df['ticker']
+    tickers = tickers.cat.codes if isinstance(tickers.dtype, CategoricalDtype) else tickers
+    rows = np.flatnonzero(segment_positions(tickers.to_numpy()) >= window - 1)
+    previous_rows = rows - 1
+
+    def column(name: str, at: np.ndarray = rows) -> np.ndarray:
+        return data_df[name].to_numpy()[at]
+
+    signals_df = data_df.loc[rows, ['id', 'ticker', 'date']].reset_index(drop=True)
+
+    # Bollinger Bands, max() and min() of (open, close) keep the open unless the close is strictly beyond it
+    open_t, close_t = column('open'), column('close')
+    signals_df['BB_U_signal'] = (np.where(close_t > open_t, close_t, open_t) > column('BB_U_20')).astype(np.int64)
+    signals_df['BB_L_signal'] = (np.where(close_t < open_t, close_t, open_t) < column('BB_L_20')).astype(np.int64)
+
+    ma_5_t, ma_20_t = column('MA_5'), column('MA_20')
+    ma_5_y, ma_20_y = column('MA_5', previous_rows), column('MA_20', previous_rows)
+    angle_diff = np.round(np.abs(column('MA_5_alpha') - column('MA_20_alpha')), 0)
+    cross = ((ma_5_y < ma_20_y) & (ma_5_t > ma_20_t)) | ((ma_5_y > ma_20_y) & (ma_5_t < ma_20_t))
+    signals_df['MA_angle_diff'] = angle_diff
+    signals_df['MA_signal'] = np.where(cross, levels.ma_signal(angle_diff=angle_diff), 0)
+
+    angle_diff = np.round(np.abs(column('ATR_20_alpha') - column('ATR_20_alpha', previous_rows)), 0)
+    signals_df['ATR_angle_diff'] = angle_diff
+    signals_df['ATR_slope_change_signal'] = levels.atr_slope_signal(angle_diff=angle_diff)
+
+    atr_y = column('ATR_20', previous_rows)
+    atr_y = np.where(atr_y == 0, 0.001, atr_y)
+    candle_size = np.abs(open_t - close_t)
+    signals_df['candle_ATR_ratio'] = np.round(candle_size / atr_y, 2)
+    signals_df['ATR_candle_size_signal'] = levels.atr_candle_signal(candle_size=candle_size, atr=atr_y)
+
+    # CCI hysteresis: above +100 arms the drop signal and the next row below -50 fires and disarms it, below -100
+    # arms the raise signal and the next row above +50 fires it. The flags start unarmed on the first window row.
+    cci = data_df['CCI'].to_numpy()
+    window_start = rows - (window - 1)
+    armed_above = last_index(cci > 100)[previous_rows]
+    disarmed_above = last_index(cci < -50)[previous_rows]
+    armed_below = last_index(cci < -100)[previous_rows]
+    disarmed_below = last_index(cci > 50)[previous_rows]
+    drop = (cci[rows] < -50) & (armed_above >= window_start) & (disarmed_above < armed_above)
+    raise_ = (cci[rows] > 50) & (armed_below >= window_start) & (disarmed_below < armed_below)
+    signals_df['CCI_signal'] = np.where(drop, -1, np.where(raise_, 1, 0))
+
+    price_t = (open_t + close_t) / 2
+    price_y = (column('open', previous_rows) + column('close', previous_rows)) / 2
+    price_diff = np.round((price_t - price_y) * 100 / price_y, 2)
+    signals_df['price_diff'] = price_diff
+    signals_df['price_diff_signal'] = levels.price_change_signal(price_diff=price_diff)
+
+    fired = {name: int(np.count_nonzero(signals_df[name])) for name in SIGNAL_COLUMNS if name.endswith('_signal')}
+    logger.info(f"Signals of {len(signals_df)} rows, non zero: {fired}")
+    return signals_df
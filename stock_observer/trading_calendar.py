@@ -0,0 +1,107 @@
+"""
+Local NYSE trading-day calendar.
+
+Regular NYSE holidays are generated from their rules, Good Friday from the date of Easter, and the unscheduled
+closures since 2000 are listed explicitly. Day counts use numpy business days with the holidays removed.
+"""
+import numpy as np
+from functools import lru_cache
+from datetime import date, datetime, timedelta
+from log_setup import get_logger
+
+logger = get_logger(__name__)
+
+# market closures that do not follow a holiday rule
+SPECIAL_CLOSURES = ['2001-09-11', '2001-09-12', '2001-09-13', '2001-09-14', '2004-06-11', '2007-01-02',
+                    '2012-10-29', '2012-10-30', '2018-12-05', '2025-01-09']
+
+
+def easter(year: int) -> date:
+    """
+    Gregorian Easter Sunday (anonymous Gregorian algorithm)
+    """
+    a, b, c = year % 19, year // 100, year % 100
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    offset = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * offset) // 451
+    month, day = divmod(h + offset - 7 * m + 114, 31)
+    return date(year, month, day + 1)
+
+
+def nth_weekday(year: int, month: int, weekday: int, n: int) -> date:
+    """
+    :param weekday: Monday is 0
+    :param n: 1 for the first, -1 for the last weekday of the month
+    """
+    if n > 0:
+        first = date(year, month, 1)
+        return first + timedelta(days=(weekday - first.weekday()) % 7 + 7 * (n - 1))
+    last = date(year + month // 12, month % 12 + 1, 1) - timedelta(days=1)
+    return last - timedelta(days=(last.weekday() - weekday) % 7)
+
+
+def observed(holiday: date) -> date:
+    """
+    Holidays on a Saturday are observed on the Friday before and the ones on a Sunday on the Monday after
+    """
+    if holiday.weekday() == 5:
+        return holiday - timedelta(days=1)
+    if holiday.weekday() == 6:
+        return holiday + timedelta(days=1)
+    return holiday
+
+
+def year_holidays(year: int) -> list:
+    holidays = [nth_weekday(year, 1, 0, 3),  # Martin Luther King Jr. Day
+                nth_weekday(year, 2, 0, 3),  # Washington's Birthday
+                easter(year) - timedelta(days=2),  # Good Friday
+                nth_weekday(year, 5, 0, -1),  # Memorial Day
+                observed(date(year, 7, 4)),  # Independence Day
+                nth_weekday(year, 9, 0, 1),  # Labor Day
+                nth_weekday(year, 11, 3, 4),  # Thanksgiving Day
+                observed(date(year, 12, 25))]  # Christmas
+    # New Year's Day on a Saturday is not moved back into the previous year
+    if date(year, 1, 1).weekday() != 5:
+        holidays.append(observed(date(year, 1, 1)))
+    if year >= 2022:
+        holidays.append(observed(date(year, 6, 19)))  # Juneteenth
+    return holidays
+
+
+@lru_cache(maxsize=None)
+def holidays(first_year: int = 1999, last_year: int = None) -> np.ndarray:
+    """
+    :return: sorted datetime64[D] array of the NYSE closures on weekdays
+    """
+    last_year = last_year or date.today().year + 1
+    days = [day for year in range(first_year, last_year + 1) for day in year_holidays(year)]
+    return np.unique(np.array([str(day) for day in days] + SPECIAL_CLOSURES, dtype='datetime64[D]'))
+
+
+def is_trading_day(day: date) -> bool:
+    return bool(np.is_busday(np.datetime64(day, 'D'), holidays=holidays()))
+
+
+def trading_days_between(after: date, until: date) -> int:
+    """
+    :return: number of trading days in (after, until]
+    """
+    if until <= after:
+        return 0
+    return int(np.busday_count(np.datetime64(after, 'D') + 1, np.datetime64(until, 'D') + 1, holidays=holidays()))
+
+
+def last_session(now: datetime, data_available_hour: int) -> date:
+    """
+    :param now: local time
+    :param data_available_hour: local hour after which the daily bar of a session is published
+    :return: the latest session whose daily bar is available at `now`
+    """
+    day = np.datetime64(now.date(), 'D')
+    if now.hour < data_available_hour:
+        day -= 1
+    return np.busday_offset(day, 0, roll='backward', holidays=holidays()).astype(date)
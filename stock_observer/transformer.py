@@ -3,16 +3,23 @@ from pathlib import Path
 from utils import save_csv
 from log_setup import get_logger
 from configparser import ConfigParser
-from pandas import DataFrame, read_csv
-from datetime import timedelta, datetime
+from typing import Dict, List
+from pandas import DataFrame, read_csv, concat
+from datetime import timedelta, datetime, date
 from utils import str_to_datetime
+from stock_observer.kernels import segment_positions, rolling_cci, line_angles
+from stock_observer.indicator_engine import Indicator_Engine
+from stock_observer.indicator_state import Indicator_State
+from stock_observer.frame_layout import Frame_Layout, is_compact, epoch_day
+from stock_observer.bar_resampler import TIMEFRAMES, BAR_COLUMNS, resample_bars
+from stock_observer.database.watermark import Watermark_Service
 from stock_observer.database.database_communication import MySQL_Connection
 
 logger = get_logger(__name__)
 
 
 class Transformer:
-    def __init__(self, config: ConfigParser):
+    def __init__(self, config: ConfigParser, workers: int = 1):
         self.config = config
         self.ticker_list_path = Path(config['Data_Sources']['tickers list csv'])
         self.transformed_data_path = Path(config['Data_Sources']['transformed equity price csv'])
@@ -23,63 +30,130 @@ class Transformer:
         self.cci_period = int(self.config['Indicator']['cci period'])
         self.atr_period = int(self.config['Indicator']['atr period'])
         self.bollinger_bands_period = int(self.config['Indicator']['bollinger bands period'])
+        self.cci_source = self.config['Indicator']['cci source']
+        self.watermarks = Watermark_Service(config=config)
+        self.indicator_engine = Indicator_Engine(config=config, workers=workers)
+        self.features = self.indicator_engine.features
+        self.indicator_state = Indicator_State(config=config)
+        self.frame_layout = Frame_Layout(config=config)
+        self.primary_key_mode = self.config['MySQL']['primary key mode']
+        self.timeframes = [timeframe.strip() for timeframe in self.config['Indicator']['timeframes'].split(',')
+                           if timeframe.strip()]
+        unknown = [timeframe for timeframe in self.timeframes if timeframe not in TIMEFRAMES]
+        if unknown:
+            raise ValueError(f"Unknown timeframes {unknown}, expected some of {TIMEFRAMES}")
+        self.timeframe_tables = {timeframe: self.config['MySQL'][f'{timeframe} table name']
+                                 for timeframe in self.timeframes}
+        # the CCI of the resampled bars is always computed, the downloaded one is daily
+        self.timeframe_engines = {timeframe: Indicator_Engine(config=config, workers=workers, cci_source='local')
+                                  for timeframe in self.timeframes}
+        self.timeframe_states = {timeframe: Indicator_State(config=config, timeframe=timeframe)
+                                 for timeframe in self.timeframes}
 
     def transform(self) -> DataFrame:
-        data_df = self.data_load(day_shift=70)
-
-        data_df = self.add_moving_avg(data_df=data_df, n_days=self.moving_avg_period_1)
-        data_df = self.add_moving_avg(data_df=data_df, n_days=self.moving_avg_period_2)
-        # data_df = self.add_cci(data_df=data_df, n_days=self.cci_period)
-        data_df = self.add_atr(data_df=data_df, n_days=self.atr_period)
-        data_df = self.add_bollinger_bands(data_df=data_df, n_days=self.bollinger_bands_period)
-        data_df = self.add_angle(data_df=data_df, feature='MA_5')
-        data_df = self.add_angle(data_df=data_df, feature='MA_20')
-        data_df = self.add_angle(data_df=data_df, feature='ATR_20')
+        # tickers with a kept state load only their new bars, the others the last 70 days
+        tickers = read_csv(self.ticker_list_path)['ticker'].tolist()
+        self.indicator_state.load()
+        resumable = self.indicator_state.resumable(
+            latest_dates=self.watermarks.latest_dates(table_name=self.main_table_name))
+        since = {ticker: resumable[ticker] for ticker in tickers if ticker in resumable}
+        data_df = self.data_load(day_shift=70, tickers=tickers, since=since)
+        data_df, revised = self.indicator_state.prepend(data_df=data_df, since=since)
+        if revised:
+            data_df = concat([data_df, self.data_load(day_shift=70, tickers=revised)], ignore_index=True)
+        stage_columns = list(data_df.columns)
+        data_df = self.frame_layout.compact_frame(data_df)
+
+        data_df = self.indicator_engine.compute(data_df=data_df)
+        data_df = self.frame_layout.compact_frame(data_df)
+        self.indicator_state.save(data_df=data_df[stage_columns])
 
         data_df = self.data_date_filter(data_df)
-        data_df = data_df.round(3)
+        if self.frame_layout.compact:
+            data_df = self.frame_layout.round(self.frame_layout.expand(data_df), decimals=3)
+        else:
+            data_df = data_df.round(3)
         logger.info(f"Saving transformed data in csv file at {self.transformed_data_path}_{datetime.now().date()}_"
                     f"{datetime.now().hour}-{datetime.now().minute}.csv")
         save_csv(data_df, Path(f"{self.transformed_data_path}_{datetime.now().date()}_"
                                f"{datetime.now().hour}-{datetime.now().minute}.csv"))
         return data_df
 
-    def data_load(self, day_shift: int) -> DataFrame:
+    def transform_timeframes(self) -> Dict[str, DataFrame]:
+        """
+        :return: {timeframe: rows to write into its table} of every timeframe of `[Indicator] timeframes`
+        """
+        return {timeframe: self.transform_timeframe(timeframe=timeframe) for timeframe in self.timeframes}
+
+    def transform_timeframe(self, timeframe: str) -> DataFrame:
+        """
+        Bars resampled from the daily stage bars with their indicators.
+        A ticker whose kept state ends at the table watermark, the open period stored by the last run, reloads the
+        daily bars from the first day of that period only and its kept bars go in front of the rebuilt ones. The
+        other tickers are rebuilt from their whole history. The rows from the watermark on are returned, so the
+        open period replaces its stored row and the periods after it are added.
+        :param timeframe: 'weekly' or 'monthly'
+        :return: rows to write into the table of the timeframe
+        """
+        logger.info(f"Transforming {timeframe} bars")
+        tickers = read_csv(self.ticker_list_path)['ticker'].tolist()
+        state = self.timeframe_states[timeframe]
+        state.load()
+        latest_dates = self.watermarks.latest_dates(table_name=self.timeframe_tables[timeframe])
+        resumable = state.resumable(latest_dates=latest_dates)
+        since = {ticker: resumable.get(ticker, date(2000, 1, 1)) for ticker in tickers}
+        daily_df = self.data_load(day_shift=0, tickers=tickers, since=since)
+        bars_df = resample_bars(data_df=daily_df, timeframe=timeframe, primary_key_mode=self.primary_key_mode)
+        history_df = state.history(since={ticker: resumable[ticker] for ticker in tickers if ticker in resumable})
+        data_df = concat([history_df, bars_df], ignore_index=True)
+
+        data_df = self.timeframe_engines[timeframe].compute(data_df=data_df)
+        state.save(data_df=data_df[BAR_COLUMNS])
+
+        rewrite_from = data_df['ticker'].map(latest_dates).fillna(date(2000, 1, 1))
+        data_df = data_df[data_df['date'] >= rewrite_from].reset_index(drop=True)
+        data_df = data_df.round(3)
+        save_csv(data_df, Path(f"{self.transformed_data_path}_{timeframe}_{datetime.now().date()}_"
+                               f"{datetime.now().hour}-{datetime.now().minute}.csv"))
+        return data_df
+
+    def data_load(self, day_shift: int, tickers: List[str] = None, since: Dict[str, date] = None) -> DataFrame:
+        """
+        :param day_shift: days loaded before the main table watermark of a ticker
+        :param tickers: tickers to load, all the tickers of the ticker list by default
+        :param since: {ticker: first date to load} of the tickers resumed from the indicator state
+        :return: stage table rows
+        """
         logger.info("Data loading from staging database")
-        ticker_list = read_csv(self.ticker_list_path)
+        if tickers is None:
+            tickers = read_csv(self.ticker_list_path)['ticker'].tolist()
+        since = since or {}
+        latest_dates = self.watermarks.latest_dates(table_name=self.main_table_name)
+        mysql = MySQL_Connection(config=self.config)
         data_df = DataFrame()
-        for row in ticker_list.iterrows():
-            ticker = row[1]['ticker']
-            mysql = MySQL_Connection(config=self.config)
-            latest_date_df = mysql.select(f"SELECT max(date) FROM {self.main_table_name} WHERE ticker = '{ticker}';")
-
-            if latest_date_df is not None:
-                latest_date_in_db = latest_date_df.iloc[0][0]
-                logger.info(f"{ticker} latest update is {latest_date_in_db}")
-            else:
-                latest_date_in_db = datetime.strptime('2000-01-01', "%Y-%m-%d").date()
+        for ticker in tickers:
+            latest_date_in_db = latest_dates.get(ticker, date(2000, 1, 1))
+            logger.info(f"{ticker} latest update is {latest_date_in_db}")
 
-            starting_date = str(latest_date_in_db - timedelta(days=(day_shift + 3)))
-            data = mysql.select(f"SELECT * FROM {self.stage_table_name} "
-                                f"WHERE ticker = '{ticker}' AND date > '{starting_date}';")
+            if ticker in since:
+                condition = f"date >= '{since[ticker]}'"
+            else:
+                condition = f"date > '{latest_date_in_db - timedelta(days=(day_shift + 3))}'"
+            data = mysql.select(f"SELECT * FROM {self.stage_table_name} WHERE ticker = '{ticker}' AND {condition};")
             data_df = data_df.append(data, ignore_index=True)
         return data_df
 
     def data_date_filter(self, data_df: DataFrame) -> DataFrame:
         logger.info('Filter duplicated records')
-        ticker_list = data_df.ticker.unique()
-        filtered_df = DataFrame()
-        for ticker in ticker_list:
-            temp_df = data_df[data_df['ticker'] == ticker]
-            mysql = MySQL_Connection(config=self.config)
-            latest_date_df = mysql.select(f"SELECT max(date) FROM {self.main_table_name} WHERE ticker = '{ticker}';")
-
-            if latest_date_df is not None:
-                latest_date_in_db = latest_date_df.iloc[0][0]
-            else:
-                latest_date_in_db = datetime.strptime('2000-01-01', "%Y-%m-%d").date()
-            data = temp_df[temp_df['date'] > latest_date_in_db]
-            filtered_df = filtered_df.append(data, ignore_index=True)
+        latest_dates = self.watermarks.latest_dates(table_name=self.main_table_name)
+        if is_compact(data_df):
+            latest_date_in_db = self.frame_layout.ticker_lookup(
+                data_df=data_df, values={ticker: epoch_day(day) for ticker, day in latest_dates.items()},
+                default=epoch_day(date(2000, 1, 1)))
+        else:
+            latest_date_in_db = data_df['ticker'].map(latest_dates).fillna(date(2000, 1, 1))
+        filtered_df = data_df[data_df['date'] > latest_date_in_db]
+        filtered_df = filtered_df.reset_index(drop=True)
         return filtered_df
 
     @staticmethod
@@ -103,45 +177,22 @@ class Transformer:
         data_df.drop(columns='op', inplace=True)
         return data_df
 
-    def add_cci(self, data_df: DataFrame, n_days: int) -> DataFrame:
+    @staticmethod
+    def add_cci(data_df: DataFrame, n_days: int) -> DataFrame:
+        """
+        Commodity Channel Index computed per ticker from the daily bars, replacing the Alpha Vantage CCI download.
+        Uses the Alpha Vantage definition: typical price (high + low + close) / 3, its n-day simple moving average
+        and the mean absolute deviation around that average. From the same unadjusted daily bars the result matches
+        the Alpha Vantage CCI within 0.01, the difference comes from their 4 decimal rounding.
+        :param data_df: daily bars
+        :param n_days: CCI period
+        :return: Dataframe sorted by ticker and date with the CCI column
+        """
         logger.info("Calculating CCI")
-        # Find the lowest and highest price in the last x days
-        data_df.index = data_df.date
-        highest = data_df.groupby(by='ticker')['high'].rolling(window=n_days, min_periods=n_days).max().reset_index(
-            drop=False)
-        lowest = data_df.groupby(by='ticker')['low'].rolling(window=n_days, min_periods=n_days).min().reset_index(
-            drop=False)
-
-        highest.rename(columns={'high': f'highest_{n_days}'}, inplace=True)
-        lowest.rename(columns={'low': f'lowest_{n_days}'}, inplace=True)
-
-        data_df.reset_index(drop=True, inplace=True)
-        data_df = data_df.merge(highest, on=['ticker', 'date'], how='inner')
-        data_df = data_df.merge(lowest, on=['ticker', 'date'], how='inner')
-        data_df.sort_values(by=['ticker', 'date'], inplace=True)
-        data_df.reset_index(drop=True, inplace=True)
-
-        # compute typical price: (Hn+Ln+C)/3
-        data_df['typical_price'] = (data_df[f'highest_{n_days}'] + data_df['close'] + data_df[f'lowest_{n_days}']) / 3
-
-        # compute moving average on typical price: sum(typical_price)/30
-        data_df = self.add_rolling_ave(data_df=data_df, n_days=n_days, feature='typical_price')  # TODO shift 1 day back
-        data_df.rename(columns={f'rolling_result_{n_days}': f'moving_avg_of_typical_price_{n_days}'},
-                       inplace=True)
-
-        # compute mean deviation: sum(|typical_price - moving average|)/30
-        data_df['tp_mv'] = abs(data_df['typical_price'] - data_df[f'moving_avg_of_typical_price_{n_days}'])
-        data_df = self.add_rolling_ave(data_df=data_df, n_days=n_days, feature='tp_mv')
-        data_df.rename(columns={f'rolling_result_{n_days}': f'mean_deviation_{n_days}'}, inplace=True)
-
-        # compute Commodity Channel Index (CCI): (typical_price - moving_average)/(0.015 * mean_deviation)
-        data_df[f'mean_deviation_{n_days}'] = data_df[f'mean_deviation_{n_days}'] \
-            .map(lambda x: 0.00001 if x == 0 else x)
-        data_df[f'CCI_{n_days}'] = (data_df['typical_price'] - data_df[
-            f'moving_avg_of_typical_price_{n_days}']) / (0.015 * data_df[f'mean_deviation_{n_days}'])
-
-        # data_df.drop(columns=['typical_price', 'tp_mv', f'moving_avg_of_typical_price_{n_days}',
-        #                       f'mean_deviation_{n_days}', f'lowest_{n_days}', f'highest_{n_days}'], inplace=True)
+        data_df = data_df.sort_values(by=['ticker', 'date']).reset_index(drop=True)
+        typical_price = ((data_df['high'] + data_df['low'] + data_df['close']) / 3).to_numpy(dtype=np.float64)
+        positions = segment_positions(data_df['ticker'].to_numpy())
+        data_df['CCI'] = rolling_cci(typical_price=typical_price, positions=positions, window=n_days)
         return data_df
 
     def add_atr(self, data_df: DataFrame, n_days: int) -> DataFrame:
@@ -223,3 +274,19 @@ class Transformer:
         data_df.sort_values(by=['ticker', 'date'], inplace=True)
         data_df.reset_index(drop=True, inplace=True)
         return data_df
+
+    @staticmethod
+    def add_angles(data_df: DataFrame, features: list) -> DataFrame:
+        """
+        Line angle of every feature over its last 5 rows, all features in one pass with the line_angles kernel.
+        Same values as add_angle with slope_cal.
+        :param data_df: Dataframe sorted by ticker and date, like the Indicator_Engine returns it
+        :param features: columns to calculate the angle of
+        :return: Dataframe with a {feature}_alpha column for every feature
+        """
+        logger.info(f"Calculating line angle for {', '.join(features)}")
+        positions = segment_positions(data_df['ticker'].to_numpy())
+        angles = line_angles(values=data_df[features].to_numpy(dtype=np.float64), positions=positions).round(0)
+        for i, feature in enumerate(features):
+            data_df[f'{feature}_alpha'] = angles[:, i]
+        return data_df
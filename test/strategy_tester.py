@@ -1,10 +1,10 @@
-from copy import deepcopy
 from log_setup import get_logger
 from configparser import ConfigParser
 from pandas import DataFrame, read_csv
 import configuration
 from stock_observer.database.database_communication import MySQL_Connection
 from stock_observer.analyzer import Analyzer
+from stock_observer.frame_layout import Frame_Layout
 from pathlib import Path
 from datetime import datetime
 from utils import save_csv
@@ -19,33 +19,14 @@ class Strategy_Tester:
         self.ticker_list = Path(config['Data_Sources']['test tickers list csv'])
         self.strategy_csv_path = Path(config['Data_Sources']['strategy test result csv'])
         self.strategy_table_name = self.config['MySQL']['strategy tester table name']
+        self.frame_layout = Frame_Layout(config=config)
 
     def strategy_tester(self):
-        data_df = self.data_load(start='2018-12-01')
-        ticker_list = data_df.ticker.unique()
-        data = DataFrame()
-        for ticker in ticker_list:
-            logger.info(f"---------- Analyzing {ticker} -----------")
-            temp_df = data_df[data_df.ticker == ticker].copy()
-            temp_df.sort_values(by=['date'], inplace=True, ascending=True)
-            temp_df.reset_index(drop=True, inplace=True)
-            total_record = len(temp_df)
-            num_of_record_in_each_chunk = 30
-            for i in range(0, total_record - num_of_record_in_each_chunk + 1):
-                data_df_chunk = deepcopy(temp_df[i:(i + num_of_record_in_each_chunk)])
-                analyzer = Analyzer(self.config)
-                BB_result_df = analyzer.BB_check(data_df=data_df_chunk)
-                MA_result_df = analyzer.MA_cross_angle_diff(data_df=data_df_chunk)
-                ATR_slope_result_df = analyzer.ATR_slope_change(data_df=data_df_chunk)
-                ATR_range_result_df = analyzer.ATR_range(data_df=data_df_chunk)
-                CCI_result_df = analyzer.CCI_change(data_df=data_df_chunk)
-                price_change_result_df = analyzer.price_change(data_df=data_df_chunk)
-                analyzed_data = analyzer.result_integrator(BB=BB_result_df, MA=MA_result_df, ATR_S=ATR_slope_result_df,
-                                                           ATR_R=ATR_range_result_df, CCI=CCI_result_df,
-                                                           PC=price_change_result_df)
-                data = data.append(analyzed_data)
+        data_df = self.frame_layout.compact_frame(self.data_load(start='2018-12-01'))
+        data = Analyzer(self.config).signals(data_df=data_df)
         result = data_df.merge(data, on=['id', 'ticker', 'date'], how='outer')
         result.drop_duplicates(subset='id', inplace=True)
+        result = self.frame_layout.expand(result)
         save_csv(result, Path(f"{self.strategy_csv_path}_{datetime.now().date()}_"
                               f"{datetime.now().hour}-{datetime.now().minute}.csv"))
         self.result_logger(data_df=result, table_name=self.strategy_table_name, table_type="analysis")